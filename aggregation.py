@@ -0,0 +1,335 @@
+from datetime import date
+import time
+
+import numpy as np
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+WEEKDAY_NAMES = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+
+# 时长分布直方图：每个区间的分钟数和区间个数（最后一个区间包含所有更长的会话）
+HISTOGRAM_BIN_MINUTES = 15
+HISTOGRAM_BINS = 12
+
+
+def period_key(date_obj, period):
+    """日期所属的统计区间键：日如 2025-01-05，ISO 周如 2025-W01，月如 2025-01，年如 2025"""
+    if period == "day":
+        return date_obj.strftime("%Y-%m-%d")
+    if period == "week":
+        year, week, _ = date_obj.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "month":
+        return date_obj.strftime("%Y-%m")
+    return str(date_obj.year)
+
+
+class SessionArrays:
+    """按日期升序排列的会话列数组：日期序号、时长（秒）、周期分数、是否完成"""
+
+    def __init__(self, day, seconds, fraction, completed):
+        self.day = day
+        self.seconds = seconds
+        self.fraction = fraction
+        self.completed = completed
+        self._daily = None
+
+    def __len__(self):
+        return len(self.day)
+
+    def daily(self):
+        """按天合并后的 (日期序号, 秒数, 周期数, 会话数)，之后的区间汇总都在天的粒度上进行"""
+        if self._daily is None:
+            starts = _group_starts(self.day)
+            if len(starts) == 0:
+                empty = np.zeros(0, dtype=np.int64)
+                self._daily = (empty, empty, np.zeros(0), empty)
+            else:
+                self._daily = (
+                    self.day[starts],
+                    np.add.reduceat(self.seconds, starts),
+                    np.add.reduceat(self.fraction, starts),
+                    np.diff(np.r_[starts, len(self.day)]),
+                )
+        return self._daily
+
+
+def load_session_arrays(daily_log):
+    """把 daily_log 转换成列数组，每天的日期只解析一次，每一列用一次 np.fromiter 生成"""
+    ordinals, counts, sessions = [], [], []
+    for date_str in sorted(daily_log):
+        try:
+            ordinal = date.fromisoformat(date_str).toordinal()
+        except ValueError:
+            continue  # Skip invalid date strings
+        day_sessions = daily_log[date_str]
+        ordinals.append(ordinal)
+        counts.append(len(day_sessions))
+        sessions.extend(day_sessions)
+    count = len(sessions)
+    return SessionArrays(
+        np.repeat(np.array(ordinals, dtype=np.int64), counts),
+        np.fromiter((s["duration_seconds"] for s in sessions), dtype=np.int64, count=count),
+        np.fromiter((s["cycle_fraction"] for s in sessions), dtype=np.float64, count=count),
+        np.fromiter((s["completed_cycle"] for s in sessions), dtype=bool, count=count),
+    )
+
+
+def concat_arrays(*parts):
+    """合并多份列数组（例如归档 + 当前数据），保证结果仍按日期升序"""
+    day = np.concatenate([part.day for part in parts])
+    seconds = np.concatenate([part.seconds for part in parts])
+    fraction = np.concatenate([part.fraction for part in parts])
+    completed = np.concatenate([part.completed for part in parts])
+    if len(day) > 1 and np.any(day[1:] < day[:-1]):
+        order = np.argsort(day, kind="stable")
+        day, seconds, fraction, completed = (
+            day[order],
+            seconds[order],
+            fraction[order],
+            completed[order],
+        )
+    return SessionArrays(day, seconds, fraction, completed)
+
+
+class SessionBuffer:
+    """可追加的会话列数组：容量不够时翻倍，追加一条会话均摊 O(1)，不再每次复制全部历史。
+
+    arrays() 返回前 n 条的 SessionArrays 视图，在下一次追加前缓存；
+    追加的日期早于最后一天（补记、系统时间被调回过）时，下一次 arrays() 重新排序一次。
+    """
+
+    COLUMNS = ("day", "seconds", "fraction", "completed")
+
+    def __init__(self, arrays):
+        self._size = len(arrays)
+        capacity = max(16, self._size * 2)
+        for name in self.COLUMNS:
+            column = getattr(arrays, name)
+            buffer = np.zeros(capacity, dtype=column.dtype)
+            buffer[: self._size] = column
+            setattr(self, "_" + name, buffer)
+        self._sorted = True
+        self._view = None
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self):
+        capacity = len(self._day) * 2
+        for name in self.COLUMNS:
+            setattr(self, "_" + name, np.resize(getattr(self, "_" + name), capacity))
+
+    def append(self, ordinal, seconds, fraction, completed):
+        n = self._size
+        if n == len(self._day):
+            self._grow()
+        if n and ordinal < self._day[n - 1]:
+            self._sorted = False
+        self._day[n] = ordinal
+        self._seconds[n] = seconds
+        self._fraction[n] = fraction
+        self._completed[n] = completed
+        self._size = n + 1
+        self._view = None
+
+    def arrays(self):
+        if self._view is None:
+            n = self._size
+            if not self._sorted:
+                order = np.argsort(self._day[:n], kind="stable")
+                for name in self.COLUMNS:
+                    column = getattr(self, "_" + name)
+                    column[:n] = column[:n][order]
+                self._sorted = True
+            self._view = SessionArrays(*(getattr(self, "_" + name)[:n] for name in self.COLUMNS))
+        return self._view
+
+
+def _group_ids(day, period):
+    """每个日期所属区间的编号；日期升序时编号也是非递减的"""
+    if period == "day":
+        return day
+    if period == "week":
+        return day - (day - 1) % 7  # 所在 ISO 周周一的日期序号
+    as_dates = (day - EPOCH_ORDINAL).astype("datetime64[D]")
+    if period == "month":
+        return as_dates.astype("datetime64[M]").astype(np.int64)
+    return as_dates.astype("datetime64[Y]").astype(np.int64)
+
+
+def _group_starts(group_ids):
+    if len(group_ids) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, group_ids[1:] != group_ids[:-1]])
+
+
+def totals_by_period(arrays, period):
+    """按区间汇总，返回与 rollup 相同结构的行（区间倒序）"""
+    days, day_seconds, day_cycles, day_counts = arrays.daily()
+    starts = _group_starts(_group_ids(days, period))
+    if len(starts) == 0:
+        return []
+    ends = np.r_[starts[1:], len(days)]
+    total_seconds = np.add.reduceat(day_seconds, starts)
+    total_cycles = np.add.reduceat(day_cycles, starts)
+    session_counts = np.add.reduceat(day_counts, starts)
+    first_day = days[starts]
+    last_day = days[ends - 1]
+    rows = []
+    for i in range(len(starts) - 1, -1, -1):
+        start_date = date.fromordinal(int(first_day[i]))
+        rows.append(
+            {
+                "key": period_key(start_date, period),
+                "total_seconds": int(total_seconds[i]),
+                "total_cycles": float(total_cycles[i]),
+                "sessions": int(session_counts[i]),
+                "start_date": start_date.isoformat(),
+                "end_date": date.fromordinal(int(last_day[i])).isoformat(),
+            }
+        )
+    return rows
+
+
+def build_rollups(arrays, periods):
+    """一次性生成各区间的汇总（data_store.rebuild_rollups 使用）"""
+    rollups = {}
+    for period in periods:
+        rollups[period] = {}
+        for row in totals_by_period(arrays, period):
+            key = row.pop("key")
+            rollups[period][key] = row
+    return rollups
+
+
+class DayPrefixIndex:
+    """按日期序号排列的每日合计的前缀和，任意日期区间的合计用两次二分查找得到。
+
+    cum_*[i] 是前 i 天的合计（cum_*[0] 为 0），新的一天追加在末尾时是均摊 O(1)。
+    """
+
+    def __init__(self, days, seconds, cycles, sessions):
+        self._size = len(days)
+        capacity = max(16, self._size * 2)
+        self._days = np.zeros(capacity, dtype=np.int64)
+        self._cum_seconds = np.zeros(capacity + 1, dtype=np.int64)
+        self._cum_cycles = np.zeros(capacity + 1, dtype=np.float64)
+        self._cum_sessions = np.zeros(capacity + 1, dtype=np.int64)
+        self._days[: self._size] = days
+        np.cumsum(seconds, out=self._cum_seconds[1 : self._size + 1])
+        np.cumsum(cycles, out=self._cum_cycles[1 : self._size + 1])
+        np.cumsum(sessions, out=self._cum_sessions[1 : self._size + 1])
+
+    @classmethod
+    def from_day_buckets(cls, buckets):
+        """从 rollups["day"]（日期字符串 -> 当天合计）建立索引"""
+        rows = []
+        for date_str, bucket in buckets.items():
+            try:
+                ordinal = date.fromisoformat(date_str).toordinal()
+            except ValueError:
+                continue  # Skip invalid date strings
+            rows.append(
+                (ordinal, bucket["total_seconds"], bucket["total_cycles"], bucket["sessions"])
+            )
+        rows.sort()
+        columns = list(zip(*rows)) or [(), (), (), ()]
+        return cls(*(np.array(column) for column in columns))
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self):
+        capacity = len(self._days) * 2
+        self._days = np.resize(self._days, capacity)
+        for name in ("_cum_seconds", "_cum_cycles", "_cum_sessions"):
+            setattr(self, name, np.resize(getattr(self, name), capacity + 1))
+
+    def add(self, ordinal, seconds, cycles, sessions):
+        """把一天的增量计入索引"""
+        n = self._size
+        i = int(np.searchsorted(self._days[:n], ordinal))
+        if i < n and self._days[i] == ordinal:
+            # 已有的日期：它和之后所有日期的前缀和都要加上增量
+            self._cum_seconds[i + 1 : n + 1] += seconds
+            self._cum_cycles[i + 1 : n + 1] += cycles
+            self._cum_sessions[i + 1 : n + 1] += sessions
+            return
+        if n == len(self._days):
+            self._grow()
+        # 新的日期：通常是最后一天（i == n），只有系统时间被调回过才需要移动后面的元素
+        self._days[i + 1 : n + 1] = self._days[i:n]
+        self._days[i] = ordinal
+        for cum, value in (
+            (self._cum_seconds, seconds),
+            (self._cum_cycles, cycles),
+            (self._cum_sessions, sessions),
+        ):
+            cum[i + 2 : n + 2] = cum[i + 1 : n + 1] + value
+            cum[i + 1] = cum[i] + value
+        self._size = n + 1
+
+    def query(self, start_ordinal, end_ordinal):
+        """闭区间 [start, end] 内的 (总秒数, 总周期数, 会话数)"""
+        days = self._days[: self._size]
+        lo = int(np.searchsorted(days, start_ordinal, side="left"))
+        hi = int(np.searchsorted(days, end_ordinal, side="right"))
+        if hi <= lo:
+            return 0, 0.0, 0
+        return (
+            int(self._cum_seconds[hi] - self._cum_seconds[lo]),
+            float(self._cum_cycles[hi] - self._cum_cycles[lo]),
+            int(self._cum_sessions[hi] - self._cum_sessions[lo]),
+        )
+
+
+def weekday_averages(arrays):
+    """周一到周日，每个有学习记录的日子平均学习的秒数"""
+    days, day_seconds, _, _ = arrays.daily()
+    weekdays = (days - 1) % 7
+    sums = np.bincount(weekdays, weights=day_seconds, minlength=7)
+    counts = np.bincount(weekdays, minlength=7)
+    return np.divide(sums, counts, out=np.zeros(7), where=counts > 0)
+
+
+def duration_histogram(arrays, bin_minutes=HISTOGRAM_BIN_MINUTES, bins=HISTOGRAM_BINS):
+    """会话时长分布：第 i 个区间统计 [i*bin_minutes, (i+1)*bin_minutes) 分钟的会话数"""
+    bin_index = np.minimum(arrays.seconds // (bin_minutes * 60), bins - 1)
+    return np.bincount(bin_index, minlength=bins)
+
+
+if __name__ == "__main__":
+    # 性能测试：生成大量模拟会话，分别统计转换和聚合的耗时
+    rng = np.random.default_rng(0)
+    session_count = 300_000
+    first_day = date(2015, 1, 1).toordinal()
+    sample_days = np.sort(rng.integers(first_day, first_day + 3650, session_count))
+    daily_log = {}
+    for ordinal, secs in zip(sample_days.tolist(), rng.integers(60, 5400, session_count).tolist()):
+        daily_log.setdefault(date.fromordinal(ordinal).isoformat(), []).append(
+            {"duration_seconds": secs, "completed_cycle": False, "cycle_fraction": secs / 5400}
+        )
+
+    t0 = time.perf_counter()
+    arrays = load_session_arrays(daily_log)
+    t1 = time.perf_counter()
+    for period in ("week", "month", "year"):
+        totals_by_period(arrays, period)
+    t2 = time.perf_counter()
+    weekday_averages(arrays)
+    duration_histogram(arrays)
+    t3 = time.perf_counter()
+    rollups = build_rollups(arrays, ("day",))
+    prefix = DayPrefixIndex.from_day_buckets(rollups["day"])
+    t4 = time.perf_counter()
+    query_count = 10_000
+    starts = rng.integers(first_day, first_day + 3650, query_count).tolist()
+    for start in starts:
+        prefix.query(start, start + 90)
+    t5 = time.perf_counter()
+    print(f"{len(arrays)} 条会话，{len(daily_log)} 天")
+    print(f"转换为数组: {(t1 - t0) * 1000:.1f} ms")
+    print(f"周/月/年汇总: {(t2 - t1) * 1000:.2f} ms")
+    print(f"星期平均 + 时长分布: {(t3 - t2) * 1000:.2f} ms")
+    print(f"建立前缀和索引: {(t4 - t3) * 1000:.1f} ms")
+    print(f"日期区间查询: {(t5 - t4) / query_count * 1e6:.1f} us/次")
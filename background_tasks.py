@@ -0,0 +1,139 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 后台线程数：统计、文件读写、图片解码都是短任务，两个线程足够
+DEFAULT_WORKERS = 2
+# Tk 主线程检查结果队列的间隔（毫秒）
+POLL_MS = 50
+
+
+class TaskRunner:
+    """后台线程池 + 一个线程安全的结果队列。
+
+    submit() 把耗时的任务交给后台线程执行，完成后回调被放进队列，
+    由 Tk 主线程通过 after 定时取出执行，所以回调里可以直接操作控件。
+    只在有任务未完成时才轮询队列，空闲时没有任何定时回调。
+    schedule / cancel 与 WriteBehind 相同（root.after 或 TimerWheel.after 及对应的取消函数）。
+    """
+
+    def __init__(self, schedule, cancel, workers=DEFAULT_WORKERS, poll_ms=POLL_MS):
+        self._schedule = schedule
+        self._cancel = cancel
+        self._poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="background"
+        )
+        self._results = queue.SimpleQueue()
+        self._in_flight = 0  # 已提交、结果还没有被主线程处理的任务数（只在主线程修改）
+        self._poll_id = None
+        self._closed = False
+
+    def _start_polling(self):
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self._schedule(self._poll_ms, self._drain)
+
+    def submit(self, func, *args, on_done=None, on_error=None):
+        """在后台线程执行 func(*args)；结果交给主线程上的 on_done(result)，异常交给 on_error(exc)。
+
+        只能在主线程调用。
+        """
+
+        def run():
+            # 每个任务结束时都恰好放入一项，主线程据此知道何时可以停止轮询
+            try:
+                result = func(*args)
+            except Exception as e:
+                if on_error is None:
+                    print(f"后台任务 {getattr(func, '__name__', func)} 出错: {e}")
+                self._results.put((on_error, (e,)))
+                return None
+            self._results.put((on_done, (result,)))
+            return result
+
+        self._in_flight += 1
+        self._start_polling()
+        return self._executor.submit(run)
+
+    def watch(self, future, on_done=None, on_error=None):
+        """等待其他线程中的 concurrent.futures.Future（例如 MediaService.submit 的结果），
+        完成后在主线程调用 on_done(result) 或 on_error(exc)。只能在主线程调用。
+        """
+
+        def done(future):
+            try:
+                result = future.result()
+            except BaseException as e:  # 包括被取消的请求
+                if on_error is None:
+                    print(f"后台请求出错: {e!r}")
+                self._results.put((on_error, (e,)))
+                return
+            self._results.put((on_done, (result,)))
+
+        self._in_flight += 1
+        self._start_polling()
+        future.add_done_callback(done)
+        return future
+
+    def _drain(self):
+        self._poll_id = None
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            if callback is None:
+                continue
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"后台任务回调出错: {e}")
+        if self._in_flight > 0:
+            self._start_polling()
+
+    def shutdown(self):
+        """停止轮询并等待正在执行的任务结束，未开始的任务直接丢弃"""
+        self._closed = True
+        if self._poll_id is not None:
+            self._cancel(self._poll_id)
+            self._poll_id = None
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    # 演示：主线程每 100ms 更新一次“计时器”，同时在后台执行一个耗时 1 秒的任务，
+    # 统计主线程两次更新之间的最大间隔，确认计时器不会因为后台任务而卡住
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+        root.withdraw()
+    except tk.TclError as e:
+        print(f"无法创建 Tk 窗口（{e}），跳过演示")
+        raise SystemExit
+
+    def cancel(after_id):
+        root.after_cancel(after_id)
+
+    runner = TaskRunner(root.after, cancel)
+    ticks = []
+
+    def tick():
+        ticks.append(time.perf_counter())
+        root.after(100, tick)
+
+    def heavy_job(n):
+        time.sleep(1.0)
+        return sum(range(n))
+
+    def on_done(result):
+        gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+        print(f"后台结果: {result}")
+        print(f"计时器更新 {len(ticks)} 次，最大间隔 {max(gaps) * 1000:.0f} ms")
+        runner.shutdown()
+        root.destroy()
+
+    tick()
+    runner.submit(heavy_job, 1_000_000, on_done=on_done)
+    root.mainloop()
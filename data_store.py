@@ -0,0 +1,538 @@
+import contextlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import aggregation
+import schema
+from aggregation import period_key
+from session_archive import SessionArchive, daily_log_to_records
+
+# 存储后端需要提供的接口（JournalStore / SqliteStore）：
+#   load(defaults) / read(defaults)            读取完整数据（load 同时重置存储内部状态）
+#   append_session(data, date_str, session)    记录一次学习会话
+#   save_settings(data, keys)                  保存设置项
+#   save_snapshot(data)                        整体重写（清空数据、导入时使用）
+#   aggregate(data, period)                    按 "week" / "month" / "year" 汇总
+#   archive                                    已归档历史（SessionArchive），没有则为 None
+#
+# learning_data["rollups"] 保存按日/ISO 周/月/年预先汇总好的数据，
+# 每次记录会话时 O(1) 更新，查看统计时直接读取，不再遍历 daily_log。
+# JournalStore 的快照只保留未归档月份的日汇总，已归档的日期由归档的列数组汇总。
+ROLLUP_PERIODS = ("day", "week", "month", "year")
+
+# 日志累计多少条后折叠进快照
+COMPACT_THRESHOLD = 200
+# 设置项在最后一次修改后安静多久（毫秒）才真正写盘
+SAVE_DEBOUNCE_MS = 1000
+
+
+def atomic_write_json(path, data):
+    """先写临时文件再重命名替换，写到一半崩溃也不会损坏原文件"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def empty_rollups():
+    return {period: {} for period in ROLLUP_PERIODS}
+
+
+def new_data(defaults):
+    """基于默认值创建一份新的数据（daily_log、rollups 都是新的对象）"""
+    return {
+        **defaults,
+        "schema_version": schema.SCHEMA_VERSION,
+        "daily_log": {},
+        "rollups": empty_rollups(),
+    }
+
+
+def session_totals(sessions):
+    """一天的会话合计为 (秒数, 周期数, 会话数)"""
+    total_seconds, total_cycles = 0, 0.0
+    for session in sessions:
+        total_seconds += session["duration_seconds"]
+        total_cycles += session["cycle_fraction"]
+    return total_seconds, total_cycles, len(sessions)
+
+
+def add_to_rollups(rollups, date_str, total_seconds, total_cycles, count):
+    """把一天内的增量计入各个统计区间，返回被修改的 (period, key) 列表"""
+    try:
+        date_obj = datetime.fromisoformat(date_str)
+    except ValueError:
+        return []  # Skip invalid date strings
+    touched = []
+    for period in ROLLUP_PERIODS:
+        key = period_key(date_obj, period)
+        bucket = rollups[period].get(key)
+        if bucket is None:
+            bucket = rollups[period][key] = {
+                "total_seconds": 0,
+                "total_cycles": 0.0,
+                "sessions": 0,
+                "start_date": date_str,
+                "end_date": date_str,
+            }
+        bucket["total_seconds"] += total_seconds
+        bucket["total_cycles"] += total_cycles
+        bucket["sessions"] += count
+        bucket["start_date"] = min(bucket["start_date"], date_str)
+        bucket["end_date"] = max(bucket["end_date"], date_str)
+        touched.append((period, key))
+    return touched
+
+
+def rebuild_rollups(data):
+    """从 daily_log 完整重建汇总（用于没有 rollups 的旧数据），在列数组上一次完成"""
+    arrays = aggregation.load_session_arrays(data["daily_log"])
+    data["rollups"] = aggregation.build_rollups(arrays, ROLLUP_PERIODS)
+
+
+def rollup_rows(data, period):
+    """读取预先汇总好的区间，按区间倒序返回"""
+    buckets = data["rollups"][period]
+    return [{"key": key, **buckets[key]} for key in sorted(buckets, reverse=True)]
+
+
+def apply_session(data, date_str, session):
+    """把一条学习记录合并进内存数据（实时记录和日志重放共用同一逻辑）。
+
+    返回被修改的汇总区间 (period, key) 列表。
+    """
+    data["daily_log"].setdefault(date_str, []).append(session)
+    cycle_fraction = session["cycle_fraction"]
+    data["total_seconds"] = data.get("total_seconds", 0) + int(
+        session["duration_seconds"] * cycle_fraction
+    )
+    data["total_cycles"] = data.get("total_cycles", 0) + cycle_fraction
+    return add_to_rollups(data["rollups"], date_str, *session_totals([session]))
+
+
+def _in_closed_month(date_str, current_month):
+    try:
+        date.fromisoformat(date_str)
+    except ValueError:
+        return False  # 无法识别的日期保留在当前数据中
+    return date_str[:7] < current_month
+
+
+class JournalStore:
+    """快照 + 追加日志的存储方式。
+
+    每次记录学习会话只向日志文件追加一行紧凑的 JSON，保存代价与历史长度无关；
+    日志累计到 compact_threshold 条后再整体写一次快照并清空日志。
+    写快照时已结束月份的记录会移入列式归档文件（SessionArchive），
+    快照中的 daily_log 只保留当月数据，archive_records 记录归档的有效条数。
+    旧版本的单文件 learning_data.json 直接被当作快照读取，无需转换。
+    """
+
+    def __init__(
+        self, snapshot_path, journal_path, archive_path, compact_threshold=COMPACT_THRESHOLD
+    ):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.archive = SessionArchive(archive_path)
+        self.compact_threshold = compact_threshold
+        self._seq = 0  # 最后一条日志的序号
+        self._pending = 0  # 尚未折叠进快照的日志条数
+        self._migrated = False  # 最近一次读取的快照是否做了格式升级
+
+    def read(self, defaults):
+        """读取包括归档在内的完整数据（用于导入其他后端），不改变存储自身的状态"""
+        data, _, _, _ = self._read(defaults)
+        archive = SessionArchive(self.archive.path)
+        archive.open(data.pop("archive_records", 0))
+        live_log = data["daily_log"]
+        data["daily_log"] = archive.to_daily_log()
+        for date_str, sessions in live_log.items():
+            data["daily_log"].setdefault(date_str, []).extend(sessions)
+        return data
+
+    def load(self, defaults):
+        data, self._seq, self._pending, torn = self._read(defaults)
+        self.archive.open(data.get("archive_records", 0))
+        current_month = datetime.now().strftime("%Y-%m")
+        if torn or self._migrated or any(
+            _in_closed_month(d, current_month)
+            for d in itertools.chain(data["daily_log"], data["rollups"]["day"])
+        ):
+            # 日志中有崩溃时写了一半的行、格式升级后，或进入新的月份后第一次启动
+            # （把上个月及更早的记录移入归档），立即写一次快照，之后的启动不必再做这些工作
+            self.save_snapshot(data)
+        return data
+
+    def _read(self, defaults):
+        data = new_data(defaults)
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    loaded_data = json.load(f)
+                loaded_data.setdefault("schema_version", 0)  # 没有版本号的是最早的格式
+                data.update(loaded_data)
+                self._migrated = schema.migrate(data)
+                if "rollups" not in loaded_data:
+                    rebuild_rollups(data)  # 旧数据没有汇总，导入时重建一次
+            except (json.JSONDecodeError, IOError):
+                pass
+
+        # 快照里记录了已折叠的最后一条日志序号，重放时跳过这些条目，
+        # 这样即使在写完快照、删除日志之前崩溃也不会重复计入
+        snapshot_seq = data.get("journal_seq", 0)
+        seq, pending, torn = snapshot_seq, 0, False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        torn = True  # 崩溃时写了一半的行，跳过
+                        continue
+                    if entry.get("seq", 0) <= snapshot_seq:
+                        continue
+                    self._apply(data, entry)
+                    seq = entry["seq"]
+                    pending += 1
+        return data, seq, pending, torn
+
+    def _apply(self, data, entry):
+        op = entry.get("op")
+        if op == "session":
+            apply_session(data, entry["date"], entry["session"])
+        elif op == "settings":
+            data.update(entry["values"])
+
+    def append_session(self, data, date_str, session):
+        """记录一次学习会话：更新内存数据并向日志追加一行"""
+        apply_session(data, date_str, session)
+        self._append({"op": "session", "date": date_str, "session": session}, data)
+
+    def save_settings(self, data, keys):
+        """只把设置项追加进日志，不重写整个数据文件"""
+        self._append({"op": "settings", "values": {k: data[k] for k in keys}}, data)
+
+    def _append(self, entry, data):
+        self._seq += 1
+        entry["seq"] = self._seq
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self.journal_path, "a+b") as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line  # 上一次写了一半就崩溃了，新条目从新的一行开始
+            f.write(line)
+        self._pending += 1
+        if self._pending >= self.compact_threshold:
+            self.save_snapshot(data)
+
+    def save_snapshot(self, data):
+        """把当前完整数据写成快照并清空日志（压缩，也用于清空数据）"""
+        data["journal_seq"] = self._seq
+        self._archive_closed_months(data)
+        atomic_write_json(self.snapshot_path, data)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._pending = 0
+
+    def _archive_closed_months(self, data):
+        # 先追加归档再写快照：两步之间崩溃时，快照里的 archive_records 仍是旧值，
+        # 多出来的归档记录会被忽略，数据不会重复
+        archive_count = data.get("archive_records", 0)
+        if archive_count == 0 and len(self.archive):
+            self.archive.clear()  # 清空学习数据
+        elif archive_count != len(self.archive):
+            self.archive.open(archive_count)
+        current_month = datetime.now().strftime("%Y-%m")
+        day_rollups = data["rollups"]["day"]
+        for date_str in [d for d in day_rollups if _in_closed_month(d, current_month)]:
+            del day_rollups[date_str]
+        closed = {
+            date_str: sessions_data
+            for date_str, sessions_data in data["daily_log"].items()
+            if _in_closed_month(date_str, current_month)
+        }
+        if not closed:
+            return
+        data["archive_records"] = self.archive.append(daily_log_to_records(closed))
+        for date_str in closed:
+            del data["daily_log"][date_str]
+
+    def aggregate(self, data, period):
+        return rollup_rows(data, period)
+
+
+class WriteBehind:
+    """延迟合并写入：mark_dirty() 只做标记，安静 delay_ms 毫秒后才调用一次 flush_fn。
+
+    schedule(delay_ms, callback) -> timer_id 与 cancel(timer_id) 由调用方提供
+    （在 Tk 中就是 root.after / root.after_cancel），因此这里不依赖界面。
+    """
+
+    def __init__(self, flush_fn, schedule, cancel, delay_ms=SAVE_DEBOUNCE_MS):
+        self._flush_fn = flush_fn
+        self._schedule = schedule
+        self._cancel = cancel
+        self.delay_ms = delay_ms
+        self._dirty = False
+        self._timer_id = None
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def mark_dirty(self):
+        self._dirty = True
+        # 每次修改都把写入推迟到安静期之后，拖动滑块时不会产生任何文件 I/O
+        if self._timer_id is not None:
+            self._cancel(self._timer_id)
+        self._timer_id = self._schedule(self.delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._timer_id = None
+        self.flush()
+
+    def flush(self):
+        """立即写入挂起的修改（关闭窗口、退出程序时调用）"""
+        if self._timer_id is not None:
+            self._cancel(self._timer_id)
+            self._timer_id = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._flush_fn()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    week TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    duration_seconds INTEGER NOT NULL DEFAULT 0,
+    completed_cycle INTEGER NOT NULL DEFAULT 0,
+    cycle_fraction REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(date);
+CREATE INDEX IF NOT EXISTS idx_sessions_week ON sessions(week, date);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    key TEXT NOT NULL,
+    total_seconds INTEGER NOT NULL,
+    total_cycles REAL NOT NULL,
+    sessions INTEGER NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    PRIMARY KEY (period, key)
+);
+"""
+
+class SqliteStore:
+    """SQLite 存储：学习会话一行一条并按日期建索引，设置项单独一张表。
+
+    数据库为空时会从 legacy_store（通常是 JournalStore）导入已有的 JSON 数据。
+    统计视图在后台线程中读取，所以连接允许跨线程使用，每次使用都持有 self._lock。
+    """
+
+    def __init__(self, db_path, legacy_store=None):
+        self.db_path = db_path
+        self.legacy_store = legacy_store
+        self.archive = None  # 数据库本身已经是紧凑存储，不再单独归档
+        self._lock = threading.RLock()
+        try:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.executescript(SQLITE_SCHEMA)
+        except sqlite3.Error as e:
+            raise IOError(f"无法打开数据库 {db_path}: {e}") from e
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        try:
+            with self._lock, self._conn:
+                yield self._conn
+        except sqlite3.Error as e:
+            raise IOError(f"数据库写入失败: {e}") from e
+
+    def load(self, defaults):
+        with self._lock:
+            return self._load(defaults)
+
+    def _load(self, defaults):
+        is_empty = not self._conn.execute("SELECT 1 FROM settings LIMIT 1").fetchone()
+        if is_empty and self.legacy_store is not None:
+            data = self.legacy_store.read(defaults)
+            data.pop("journal_seq", None)
+            self.save_snapshot(data)
+            return data
+        data = self.read(defaults)
+        if schema.migrate(data):
+            # 迁移可能改写了会话（例如起止时间的格式），整体写回一次
+            self.save_snapshot(data)
+            return data
+        if data["daily_log"] and not any(data["rollups"].values()):
+            # 旧版本数据库没有汇总表数据，重建一次
+            rebuild_rollups(data)
+            with self._transaction() as conn:
+                self._write_rollups(
+                    conn,
+                    data,
+                    [(p, key) for p in ROLLUP_PERIODS for key in data["rollups"][p]],
+                )
+        return data
+
+    def read(self, defaults):
+        data = new_data(defaults)
+        try:
+            with self._lock:
+                data["schema_version"] = 0
+                for key, value in self._conn.execute("SELECT key, value FROM settings"):
+                    data[key] = json.loads(value)
+                rollups = self._conn.execute(
+                    "SELECT period, key, total_seconds, total_cycles, sessions,"
+                    " start_date, end_date FROM rollups"
+                )
+                for period, key, total_seconds, total_cycles, count, start, end in rollups:
+                    data["rollups"][period][key] = {
+                        "total_seconds": total_seconds,
+                        "total_cycles": total_cycles,
+                        "sessions": count,
+                        "start_date": start,
+                        "end_date": end,
+                    }
+                rows = self._conn.execute(
+                    "SELECT date, start_time, end_time, duration_seconds, completed_cycle,"
+                    " cycle_fraction FROM sessions ORDER BY date, id"
+                )
+                for date_str, start, end, duration, completed, fraction in rows:
+                    data["daily_log"].setdefault(date_str, []).append(
+                        {
+                            "start_time": start,
+                            "end_time": end,
+                            "duration_seconds": duration,
+                            "completed_cycle": bool(completed),
+                            "cycle_fraction": fraction,
+                        }
+                    )
+        except sqlite3.Error as e:
+            raise IOError(f"读取数据库失败: {e}") from e
+        return data
+
+    @staticmethod
+    def _session_row(date_str, session):
+        week = period_key(datetime.fromisoformat(date_str), "week")
+        return (
+            date_str,
+            week,
+            session["start_time"],
+            session["end_time"],
+            session["duration_seconds"],
+            int(session["completed_cycle"]),
+            session["cycle_fraction"],
+        )
+
+    def _insert_sessions(self, conn, rows):
+        conn.executemany(
+            "INSERT INTO sessions (date, week, start_time, end_time, duration_seconds,"
+            " completed_cycle, cycle_fraction) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def _write_rollups(self, conn, data, touched):
+        conn.executemany(
+            "INSERT OR REPLACE INTO rollups (period, key, total_seconds, total_cycles,"
+            " sessions, start_date, end_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    period,
+                    key,
+                    bucket["total_seconds"],
+                    bucket["total_cycles"],
+                    bucket["sessions"],
+                    bucket["start_date"],
+                    bucket["end_date"],
+                )
+                for period, key in touched
+                for bucket in (data["rollups"][period][key],)
+            ],
+        )
+
+    def _write_settings(self, conn, values):
+        conn.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    def append_session(self, data, date_str, session):
+        touched = apply_session(data, date_str, session)
+        # 会话、汇总和总计在同一个事务里写入
+        with self._transaction() as conn:
+            self._insert_sessions(conn, [self._session_row(date_str, session)])
+            self._write_rollups(conn, data, touched)
+            self._write_settings(
+                conn,
+                {
+                    "total_seconds": data["total_seconds"],
+                    "total_cycles": data["total_cycles"],
+                },
+            )
+
+    def save_settings(self, data, keys):
+        with self._transaction() as conn:
+            self._write_settings(conn, {k: data[k] for k in keys})
+
+    def save_snapshot(self, data):
+        rows = []
+        for date_str, sessions in data["daily_log"].items():
+            try:
+                rows.extend(self._session_row(date_str, session) for session in sessions)
+            except ValueError:
+                continue  # Skip invalid date strings
+        rebuild_rollups(data)
+        all_buckets = [(p, key) for p in ROLLUP_PERIODS for key in data["rollups"][p]]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM sessions")
+            conn.execute("DELETE FROM settings")
+            conn.execute("DELETE FROM rollups")
+            self._insert_sessions(conn, rows)
+            self._write_rollups(conn, data, all_buckets)
+            self._write_settings(
+                conn,
+                {k: v for k, v in data.items() if k not in ("daily_log", "rollups")},
+            )
+
+    def aggregate(self, data, period):
+        # 直接读取主键有序的汇总表，不再对 sessions 做 GROUP BY
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, total_seconds, total_cycles, sessions, start_date, end_date"
+                    " FROM rollups WHERE period = ? ORDER BY key DESC",
+                    (period,),
+                ).fetchall()
+        except sqlite3.Error as e:
+            raise IOError(f"读取数据库失败: {e}") from e
+        return [
+            {
+                "key": key,
+                "total_seconds": total_seconds,
+                "total_cycles": total_cycles,
+                "sessions": count,
+                "start_date": start_date,
+                "end_date": end_date,
+            }
+            for key, total_seconds, total_cycles, count, start_date, end_date in rows
+        ]
@@ -3,10 +3,18 @@ import tkinter as tk
 from tkinter import messagebox, font
 import time
 import random
-import json
-from datetime import datetime, timedelta
+from datetime import date, datetime
 import os
 import sound_manager
+import data_store
+import background_tasks
+import timer_engine
+import timer_wheel
+import session_checkpoint
+import profiles
+import records_view
+import media_tracker
+from records_model import RecordsModel
 import win32api
 import win32con
 import customtkinter
@@ -59,6 +67,34 @@ BREAK_INTERVAL_OPTIONS = {
 DEFAULT_BREAK_INTERVAL = "3-5分钟"
 
 DATA_FILE = "learning_data.json"
+# 学习会话追加日志，累计一定条数后折叠进 DATA_FILE
+JOURNAL_FILE = "learning_data.journal"
+# 已结束月份的学习记录归档（定长记录的二进制文件，读取时内存映射）
+ARCHIVE_FILE = "learning_data.archive"
+# 数据存储后端："json"（快照 + 日志，默认）或 "sqlite"
+# 切换到 sqlite 后首次启动会自动导入已有的 JSON 数据
+STORAGE_BACKEND = "json"
+DB_FILE = "learning_data.db"
+# 进行中周期的检查点（开始时间、已学习时间、短休息计划），程序异常退出后用来恢复或补记
+CHECKPOINT_FILE = "learning_data.checkpoint"
+# 计时期间最多每隔多少秒写一次检查点（暂停、继续时另外立即写一次）
+CHECKPOINT_INTERVAL = 30
+# 检查点在这么多秒以内的，启动时询问是否继续计时；更早的直接补记为未完成的周期
+CHECKPOINT_RESUME_WINDOW = 30 * 60
+# 其他学习档案的数据目录（每个档案一个子目录，默认档案使用上面的文件）
+PROFILES_DIR = "profiles"
+NEW_PROFILE_OPTION = "新建档案..."
+# 获取媒体会话管理器最多等待的时间（秒）
+MEDIA_CONNECT_TIMEOUT = 1.0
+# 每次媒体控制调用的截止时间（秒），超时按失败处理。
+# 要留出获取会话管理器和每个会话命令的超时，命令超时的会话才会按部分失败返回，
+# 全部失败时才能改用模拟媒体键
+MEDIA_CALL_DEADLINE = MEDIA_CONNECT_TIMEOUT + media_tracker.COMMAND_TIMEOUT + 0.5
+# 媒体控制的延迟/失败统计，退出时写入（也可以在设置中查看）
+MEDIA_STATS_FILE = "media_stats.json"
+
+# 保存在数据文件中的设置项
+SETTINGS_KEYS = ("auto_pause_media", "auto_resume_media", "cycle_duration", "break_interval")
 
 # 要修改音频文件请到 sound_manager.py 中修改 SOUND_FILE_NAME 参数
 # 源代码是 SOUND_FILE_NAME = "twinkling_sound.mp3"
@@ -74,6 +110,10 @@ POPUP_IMAGE_FONT_COLOR = "black"
 POPUP_IS_KEEP_ASPECT_RATIO = (
     True  # True 则固定POPUP_HEIGHT，根据图片长宽比例调整POPUP_WIDTH。否则固定窗口大小
 )
+# 后台预先解码弹窗图片时缩小到的最大尺寸，弹窗显示时只需再做一次小图缩放
+POPUP_IMAGE_DECODE_SIZE = (1280, 1280)
+# 支持的图片扩展名
+POPUP_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff")
 
 
 # --- DPI Awareness (修复Windows上的模糊问题) ---
@@ -86,42 +126,55 @@ except AttributeError:
         pass  # 不支持的旧版Windows
 
 # --- 媒体控制 ---
-import asyncio
-from media_status_fetcher import (
-    get_media_status,
-    toggle_media_playback as async_toggle_media_playback,
-)
-
-
-def get_current_media_status():
-    """获取当前媒体播放状态"""
-    try:
-        status = asyncio.run(get_media_status())
-        print(f"当前媒体状态: {status}")
-        return status
-    except Exception as e:
-        print(f"获取媒体状态时出错: {e}")
-        return "未知状态"
-
-
-def toggle_media_playback():
-    """切换媒体播放/暂停状态"""
-    try:
-        result = asyncio.run(async_toggle_media_playback())
-        print(result)
-        return result
-    except Exception as e:
-        print(f"切换媒体播放状态时出错: {e}")
-        try:
-            win32api.keybd_event(win32con.VK_MEDIA_PLAY_PAUSE, 0, 0, 0)
-            time.sleep(0.1)
-            win32api.keybd_event(
-                win32con.VK_MEDIA_PLAY_PAUSE, 0, win32con.KEYEVENTF_KEYUP, 0
-            )
-            print("回退到模拟按键方式切换媒体播放状态")
-        except Exception as e2:
-            print(f"模拟媒体键时出错: {e2}")
-        return "未知结果"
+# 媒体查询和命令在 MediaService 的常驻事件循环中执行，主线程只提交请求
+import media_service
+from media_status_fetcher import connect_media_tracker
+from media_tracker import MediaCommandError, MediaStateTracker
+
+
+def press_media_key():
+    """模拟按下媒体播放/暂停键（媒体命令失败时的回退方式，在后台线程执行）"""
+    win32api.keybd_event(win32con.VK_MEDIA_PLAY_PAUSE, 0, 0, 0)
+    time.sleep(0.1)
+    win32api.keybd_event(win32con.VK_MEDIA_PLAY_PAUSE, 0, win32con.KEYEVENTF_KEYUP, 0)
+    print("回退到模拟按键方式切换媒体播放状态")
+
+
+# --- 弹窗背景图片 ---
+def scan_image_files(image_dir):
+    """遍历图片文件夹及其子文件夹（包括指向文件夹的符号链接），返回所有图片路径"""
+    image_files = []
+    if not os.path.isdir(image_dir):
+        return image_files
+    for root, dirs, files in os.walk(image_dir):
+        for file in files:
+            # 检查文件扩展名是否为图片
+            if file.lower().endswith(POPUP_IMAGE_EXTENSIONS):
+                image_files.append(os.path.join(root, file))
+        # 检查是否存在文件夹的符号链接
+        for lnk_dir in dirs:
+            full_path = os.path.join(root, lnk_dir)
+            if os.path.islink(full_path):  # 如果是符号链接（不包括快捷方式）
+                try:
+                    target_path = os.path.realpath(full_path)  # 解析真实路径
+                    if os.path.isdir(target_path):  # 确保目标是目录
+                        # 仅遍历链接目录第一层的文件（防止无尽的递归）
+                        for link_root, link_dirs, link_files in os.walk(target_path):
+                            for link_file in link_files:
+                                if link_file.lower().endswith(POPUP_IMAGE_EXTENSIONS):
+                                    image_files.append(os.path.join(link_root, link_file))
+                except OSError as e:  # 权限问题或无效链接
+                    print("无效符号链接或权限问题:", e)
+    return image_files
+
+
+def decode_popup_image(image_path, max_size=POPUP_IMAGE_DECODE_SIZE):
+    """解码图片并按比例缩小到 max_size 以内（在后台线程中调用）"""
+    pil_image = Image.open(image_path)
+    pil_image.draft("RGB", max_size)  # JPEG 直接按缩小后的尺寸解码
+    pil_image.load()
+    pil_image.thumbnail(max_size, Image.LANCZOS)
+    return pil_image
 
 
 # --- Settings Page using CustomTkinter ---
@@ -260,6 +313,15 @@ class SettingsPage(customtkinter.CTkToplevel):
         )
         clear_button.pack(pady=(15, 5))
 
+        # --- 媒体控制统计 ---
+        media_stats_button = customtkinter.CTkButton(
+            container,
+            text="媒体控制统计",
+            command=lambda: self.app.show_media_stats(parent=self),
+            **font_args_button,
+        )
+        media_stats_button.pack(pady=(5, 0))
+
         # --- Close Button ---
         close_button = customtkinter.CTkButton(
             container, text="关闭", command=self.close_settings, **font_args_button
@@ -268,6 +330,7 @@ class SettingsPage(customtkinter.CTkToplevel):
 
     def close_settings(self):
         # 关闭设置页面前刷新主界面按钮
+        self.app.settings_saver.flush()
         self.app.show_start_button()
         self.destroy()
 
@@ -299,6 +362,8 @@ class LearningApp:
         
         # 背景图片列表
         self.image_files = []
+        # 后台预先解码好的下一张弹窗图片 (图片目录, 路径, PIL 图片)
+        self.prefetched_image = None
 
         # --- Set CustomTkinter Appearance ---
         customtkinter.set_appearance_mode(
@@ -308,22 +373,41 @@ class LearningApp:
             "blue"
         )  # Options: "blue", "green", "dark-blue"
 
-        self.main_timer_seconds = DEFAULT_MAIN_TIMER_DURATION
         self.long_break_seconds = LONG_BREAK_TIMER_DURATION
-        self.current_timer_id = None
-        self.short_break_timer_id = None
-        self.start_time = None  # Tracks start of the 90-min cycle
-        self.session_start_time = (
-            None  # Tracks start of the current learning segment (since last 'start')
-        )
-        self.paused = False
-        self.media_paused_by_app = False  # Flag to track if media was paused by the app
-        self.is_paused_for_5min = False  # 是否处于5分钟暂停状态
-        self.pause_end_time = None  # 暂停结束时间
-        self.pause_timer_id = None  # 暂停计时器ID
+        self.media_paused_sessions = set()  # 由本程序暂停的媒体会话，休息结束时只恢复这些
+
+        # 所有定时回调都交给同一个 TimerWheel，底层只保留一个 after
+        self.timers = timer_wheel.TimerWheel(self.root.after, self.cancel_after)
+
+        # 每个档案有自己的学习数据和计时引擎，界面一次显示一个档案
+        self.profiles = profiles.ProfileManager(PROFILES_DIR, self.make_profile)
+        self.profile = self.profiles.get(profiles.DEFAULT_PROFILE)
 
         # Load data first
         self.load_data()
+        # 设置项延迟合并写入，避免拖动滑块时每一格都写一次文件
+        self.settings_saver = data_store.WriteBehind(
+            self.flush_settings, self.timers.after, self.timers.cancel
+        )
+        self.root.protocol("WM_DELETE_WINDOW", self.on_app_close)
+        # 统计、文件读写、图片解码放到后台线程，结果回到主线程再更新界面
+        self.tasks = background_tasks.TaskRunner(self.timers.after, self.timers.cancel)
+        # 提前在后台解码提示音，第一次休息时直接播放
+        self.tasks.submit(sound_manager.preload)
+        # 媒体控制：常驻事件循环 + 订阅播放状态通知的 MediaStateTracker，结果通过 self.tasks 回到主线程
+        # 每次调用都有截止时间，延迟和失败次数记录在 self.media.stats 中
+        self.media = media_service.MediaService(
+            connect_media_tracker,
+            deadline=MEDIA_CALL_DEADLINE,
+            connect_timeout=MEDIA_CONNECT_TIMEOUT,
+        )
+        # 启动时就订阅，第一次休息时已经有缓存的状态
+        self.tasks.watch(
+            self.media.connect(),
+            on_error=lambda e: print(f"连接媒体状态通知失败: {e}"),
+        )
+        self.records_request = 0  # 记录窗口的视图请求编号，用于丢弃过期的后台结果
+        self.records_loading_older = False
         # Initialize BooleanVars AFTER loading data, using the loaded values
         self.auto_pause_media_var = tk.BooleanVar(
             value=self.learning_data.get("auto_pause_media", True)
@@ -342,10 +426,135 @@ class LearningApp:
             value=self.learning_data.get("break_interval", DEFAULT_BREAK_INTERVAL)
         )
 
+        self.engine.set_tick_interval(timer_engine.TICK_INTERVAL)
         self.create_main_layout()  # Create layout using CTk widgets
         self.show_start_button()  # Show initial view
+        self.recover_orphaned_session()
+
+    # --- 档案 ---
+    # 界面上的数据和计时状态都来自当前显示的档案
+    @property
+    def engine(self):
+        return self.profile.engine
+
+    @property
+    def store(self):
+        return self.profile.store
+
+    @property
+    def records_model(self):
+        return self.profile.records_model
+
+    @property
+    def learning_data(self):
+        return self.profile.learning_data
+
+    @learning_data.setter
+    def learning_data(self, data):
+        self.profile.learning_data = data
+
+    @property
+    def start_time(self):
+        return self.profile.start_time
+
+    @start_time.setter
+    def start_time(self, value):
+        self.profile.start_time = value
+
+    def make_profile(self, name, directory):
+        # 计时、暂停和短休息的安排都在 TimerEngine 中，界面只订阅事件并显示；
+        # 各档案的定时器在共用的 TimerWheel 中按档案分组
+        engine = timer_engine.TimerEngine(
+            self.timers.group(f"cycle:{name}"),
+            break_interval=lambda: BREAK_INTERVAL_OPTIONS[self.break_interval_var.get()],
+            short_break_seconds=SHORT_BREAK_TIMER_DURATION,
+            tick_interval=None,  # 只有显示在界面上时才刷新
+        )
+        profile = profiles.Profile(name, directory, engine)
+        engine.subscribe("tick", self.profile_event(profile, self.on_timer_tick))
+        engine.subscribe(
+            "short_break_due",
+            self.profile_event(profile, self.trigger_short_break, self.on_background_short_break),
+        )
+        engine.subscribe(
+            "cycle_complete",
+            self.profile_event(profile, self.on_cycle_complete, self.on_background_cycle_complete),
+        )
+        engine.subscribe("pause_tick", self.profile_event(profile, self.on_pause_tick))
+        engine.subscribe("pause_expired", self.profile_event(profile, self.on_pause_expired))
+        return profile
 
-    def load_data(self):
+    def profile_event(self, profile, handler, background=None):
+        """引擎事件交给界面上的 handler；档案不在界面上时交给 background(profile)，没有则忽略"""
+
+        def dispatch(*args):
+            if profile is self.profile:
+                handler(*args)
+            elif background is not None:
+                background(profile, *args)
+
+        return dispatch
+
+    def switch_profile(self, name):
+        """切换界面上显示的档案，其他档案的周期在后台继续计时"""
+        if name == self.profile.name:
+            return
+        self.settings_saver.flush()  # 先把设置写进原来的档案
+        self.timers.cancel_group("break_display")
+        self.engine.set_tick_interval(None)
+
+        self.profile = self.profiles.get(name)
+        if not self.profile.loaded:
+            self.load_data(self.profile)
+        # 设置项跟着档案走
+        self.auto_pause_media_var.set(self.learning_data.get("auto_pause_media", True))
+        self.auto_resume_media_var.set(self.learning_data.get("auto_resume_media", True))
+        self.cycle_duration_var.set(self.learning_data.get("cycle_duration", 90))
+        self.break_interval_var.set(
+            self.learning_data.get("break_interval", DEFAULT_BREAK_INTERVAL)
+        )
+
+        self.create_main_layout()
+        if self.engine.state == timer_engine.IDLE:
+            self.show_start_button()
+        else:
+            self.create_countdown_view()
+            if self.engine.state == timer_engine.PAUSED:
+                self.show_paused_style()
+        self.engine.set_tick_interval(timer_engine.TICK_INTERVAL)
+        self.recover_orphaned_session()
+
+    def on_profile_selected(self, choice):
+        if choice == NEW_PROFILE_OPTION:
+            name = customtkinter.CTkInputDialog(
+                text="新档案的名称：", title="新建档案"
+            ).get_input()
+            if name is None:
+                self.profile_var.set(self.profile.name)
+                return
+            try:
+                choice = self.profiles.create(name).name
+            except (ValueError, OSError) as e:
+                messagebox.showerror("错误", f"无法新建档案: {e}")
+                self.profile_var.set(self.profile.name)
+                return
+        self.switch_profile(choice)
+
+    def on_background_short_break(self, profile):
+        """不在界面上的档案到了短休息：只播放提示音，不弹窗、不控制媒体"""
+        print(f"[{profile.name}] 短休息")
+        sound_manager.play_notification_sound(activate_bluetooth=False)
+        profile.engine.short_break_finished()
+
+    def on_background_cycle_complete(self, profile):
+        """不在界面上的档案完成了周期：记录学习时间，切换到该档案时显示已休息时间"""
+        print(f"[{profile.name}] 周期完成")
+        self.record_learning_session(completed_cycle=True, profile=profile)
+        profile.break_start_time = datetime.now()
+        sound_manager.play_notification_sound(activate_bluetooth=False)
+
+    def load_data(self, profile=None):
+        profile = profile or self.profile
         self.default_data = {
             "total_seconds": 0,
             "total_cycles": 0,
@@ -355,39 +564,89 @@ class LearningApp:
             "cycle_duration": 90,  # 默认周期时间（分钟）
             "break_interval": DEFAULT_BREAK_INTERVAL,  # 默认短休息间隔
         }
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, "r") as f:
-                    loaded_data = json.load(f)
-                    # Ensure all default keys exist
-                    self.learning_data = {**self.default_data, **loaded_data}
-            except (json.JSONDecodeError, IOError):
-                self.learning_data = self.default_data.copy()
-        else:
-            self.learning_data = self.default_data.copy()
+        json_store = data_store.JournalStore(
+            profile.path(DATA_FILE), profile.path(JOURNAL_FILE), profile.path(ARCHIVE_FILE)
+        )
+        try:
+            if STORAGE_BACKEND == "sqlite":
+                profile.store = data_store.SqliteStore(
+                    profile.path(DB_FILE), legacy_store=json_store
+                )
+            else:
+                profile.store = json_store
+            # 快照 + 日志尾部重建数据，旧的单文件数据会被当作快照直接读取
+            profile.learning_data = profile.store.load(self.default_data)
+        except IOError as e:
+            print(f"加载学习数据失败: {e}")
+            profile.store = json_store
+            profile.learning_data = data_store.new_data(self.default_data)
+        # 学习记录窗口直接从内存读取数据，并缓存各视图的汇总结果
+        profile.records_model = RecordsModel(profile.store, lambda: profile.learning_data)
+        # 上次运行留下的检查点说明周期没有正常结束，界面创建后再处理
+        profile.checkpoint = session_checkpoint.SessionCheckpoint(
+            profile.path(CHECKPOINT_FILE)
+        )
+        profile.orphaned_session = profile.checkpoint.load()
 
     def save_data(self, value=None):
+        """设置发生变化：只标记为待写入，安静一段时间后由 flush_settings 统一保存"""
+        self.settings_saver.mark_dirty()
+
+    def flush_settings(self):
         # Update settings from BooleanVars before saving
         self.learning_data["auto_pause_media"] = self.auto_pause_media_var.get()
         self.learning_data["auto_resume_media"] = self.auto_resume_media_var.get()
         self.learning_data["cycle_duration"] = self.cycle_duration_var.get()
         self.learning_data["break_interval"] = self.break_interval_var.get()
+        self.save_keys(SETTINGS_KEYS)
+
+    def save_keys(self, keys):
+        """把 learning_data 中的几个键追加写入存储"""
+        error = None
+        with self.records_model.lock:  # 写日志时可能顺带压缩快照、移动归档
+            try:
+                self.store.save_settings(self.learning_data, keys)
+            except IOError as e:
+                error = e
+        if error is not None:
+            messagebox.showerror("错误", f"无法保存学习数据: {error}")
+
+    def cancel_after(self, timer_id):
         try:
-            with open(DATA_FILE, "w") as f:
-                json.dump(self.learning_data, f, indent=4)
-        except IOError as e:
-            messagebox.showerror("错误", f"无法保存学习数据: {e}")
+            self.root.after_cancel(timer_id)
+        except (ValueError, tk.TclError):
+            pass  # 窗口已销毁或定时器已触发
+
+    def on_app_close(self):
+        """关闭主窗口前先写入挂起的设置和进行中周期的检查点"""
+        self.settings_saver.flush()
+        self.flush_checkpoint()
+        self.tasks.shutdown()
+        self.media.shutdown()
+        self.dump_media_stats()
+        self.root.destroy()
 
     def clear_learning_data(self):
         """Resets learning data to defaults and saves."""
         print("Clearing learning data...")
-        self.learning_data = self.default_data.copy()  # Reset to default
+        # Reset to default (daily_log/rollups 需要新建，不能与 default_data 共用)
+        data = data_store.new_data(self.default_data)
         # Ensure the settings are preserved from the current UI state
-        self.learning_data["auto_pause_media"] = self.auto_pause_media_var.get()
-        self.learning_data["auto_resume_media"] = self.auto_resume_media_var.get()
-        self.learning_data["cycle_duration"] = self.cycle_duration_var.get()
-        self.learning_data["break_interval"] = self.break_interval_var.get()
-        self.save_data()  # Save the cleared data
+        data["auto_pause_media"] = self.auto_pause_media_var.get()
+        data["auto_resume_media"] = self.auto_resume_media_var.get()
+        data["cycle_duration"] = self.cycle_duration_var.get()
+        data["break_interval"] = self.break_interval_var.get()
+        error = None
+        # 后台线程可能正在读取旧数据计算统计视图
+        with self.records_model.lock:
+            self.learning_data = data
+            try:
+                self.store.save_snapshot(self.learning_data)  # 重写快照并清空日志
+            except IOError as e:
+                error = e
+            self.records_model.invalidate()
+        if error is not None:
+            messagebox.showerror("错误", f"无法保存学习数据: {error}")
         self.update_overview_display()  # Update the UI
         print("Learning data cleared and saved.")
 
@@ -440,7 +699,7 @@ class LearningApp:
         )  # Overview Content Cycles (was row 3)
         self.sidebar_frame.grid_rowconfigure(
             3, weight=0, minsize=20
-        )  # Spacer (was row 4)
+        )  # Profile selector
         self.sidebar_frame.grid_rowconfigure(4, weight=0)  # Records Button (was row 5)
         self.sidebar_frame.grid_rowconfigure(5, weight=0)  # Settings Button (was row 6)
         self.sidebar_frame.grid_rowconfigure(6, weight=1)  # Bottom Spacer (was row 7)
@@ -482,6 +741,17 @@ class LearningApp:
             row=2, column=0, pady=(0, 0), padx=20, sticky="ew"
         )  # Adjusted row index
 
+        # 学习档案选择，其他档案的周期在后台继续计时
+        self.profile_var = tk.StringVar(value=self.profile.name)
+        profile_menu = customtkinter.CTkOptionMenu(
+            self.sidebar_frame,
+            values=self.profiles.names() + [NEW_PROFILE_OPTION],
+            variable=self.profile_var,
+            command=self.on_profile_selected,
+            **font_args_overview_text,
+        )
+        profile_menu.grid(row=3, column=0, pady=(10, 0), padx=30, sticky="ew")
+
         font_args_sidebar_button = (
             {"font": (FONT_NAME, 14)}
             if FONT_LOADED
@@ -559,10 +829,10 @@ class LearningApp:
         self.break_time_label.grid(row=1, column=0, pady=(0, 0), sticky="")
 
         # 如果有休息开始时间，显示已休息时间
-        if hasattr(self, "break_start_time"):
+        if self.profile.break_start_time is not None:
+            # 先取消之前的更新，避免每次回到开始界面都多出一条定时链
+            self.timers.cancel_group("break_display")
             self.update_break_time_display()
-            # 每秒更新休息时间显示
-            self.break_timer_id = self.root.after(1000, self.update_break_time_display)
 
     def update_overview_display(self):
         if hasattr(self, "overview_label_hours"):
@@ -642,11 +912,6 @@ class LearningApp:
         self.update_timer_display()  # Initial display update
         self.update_session_duration_display()  # Initial session duration update
 
-        # 初始化暂停相关变量
-        self.is_paused_for_5min = False
-        self.pause_end_time = None
-        self.pause_timer_id = None
-
     def clear_window(self):
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -658,101 +923,182 @@ class LearningApp:
 
     def start_main_timer(self):
         self.start_time = datetime.now()
-        self.session_start_time = datetime.now()  # Initialize session start time here
-        self.timer_start_time = (
-            datetime.now()
-        )  # 记录计时器开始时间，用于基于实际时间的计时
-
-        # 使用用户设置的周期时间
-        cycle_minutes = self.cycle_duration_var.get()
-        self.total_timer_seconds = cycle_minutes * 60  # 总计时时间（不变）
-        self.main_timer_seconds = self.total_timer_seconds  # 初始剩余时间
-
-        self.paused = False
-        self.paused_elapsed_time = 0  # 初始化暂停时已经过的时间
 
         # 取消休息时间显示的定时器（如果存在）
-        if hasattr(self, "break_timer_id") and self.break_timer_id:
-            self.root.after_cancel(self.break_timer_id)
-            self.break_timer_id = None
+        self.timers.cancel_group("break_display")
 
         self.create_countdown_view()
-        self.run_main_timer()
-        self.schedule_short_break()
+        # 使用用户设置的周期时间；整个周期的短休息计划在这里一次生成
+        self.engine.start(self.cycle_duration_var.get() * 60)
+        # 检查点和周期一起保存短休息计划，重启后可以按同一个计划继续
+        self.write_checkpoint()
+        if self.prefetched_image is None:
+            self.prefetch_popup_image()
+
+    def resume_session(self, state, start_time, total_seconds, elapsed):
+        """从检查点继续上次没有结束的周期"""
+        self.start_time = start_time
+        self.timers.cancel_group("break_display")
+        self.create_countdown_view()
+        self.engine.start(
+            total_seconds,
+            break_plan=state.get("break_plan"),
+            break_seed=state.get("break_seed"),
+            elapsed=elapsed,
+        )
+        if state.get("paused"):
+            # 上次退出时正在暂停：继续暂停剩余的时间（程序没有运行的时间也算在暂停里）
+            age = (datetime.now() - datetime.fromisoformat(state["saved_at"])).total_seconds()
+            pause_left = state.get("pause_remaining_seconds", timer_engine.PAUSE_SECONDS) - age
+            if pause_left > 0:
+                self.show_paused_style()
+                self.engine.pause(pause_left)
+        self.write_checkpoint()
+        if self.prefetched_image is None:
+            self.prefetch_popup_image()
+
+    # --- 进行中周期的检查点 ---
+    def checkpoint_state(self, profile):
+        engine = profile.engine
+        return {
+            "start_time": profile.start_time.isoformat(timespec="seconds"),
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "total_seconds": engine.total_seconds,
+            "elapsed_seconds": engine.elapsed_seconds(),
+            "paused": engine.state == timer_engine.PAUSED,
+            "pause_remaining_seconds": engine.pause_remaining_seconds(),
+            "break_seed": engine.break_seed,
+            "break_plan": engine.break_plan,
+        }
+
+    def write_checkpoint(self, profile=None):
+        """在后台线程写入检查点，计时期间每 CHECKPOINT_INTERVAL 秒重复一次。
 
-    def run_main_timer(self):
-        if self.paused:
+        与每秒的显示刷新无关，崩溃时最多丢失 CHECKPOINT_INTERVAL 秒的学习时间。
+        """
+        profile = profile or self.profile
+        group = f"checkpoint:{profile.name}"
+        self.timers.cancel_group(group)
+        if not profile.active or profile.start_time is None:
             return
+        self.tasks.submit(
+            profile.checkpoint.save,
+            self.checkpoint_state(profile),
+            profile.checkpoint.epoch,
+        )
+        self.timers.call_later(
+            CHECKPOINT_INTERVAL, self.write_checkpoint, profile, group=group
+        )
 
-        if self.main_timer_seconds > 0:
-            # 基于实际时间计算剩余时间
-            if hasattr(self, "timer_start_time"):
-                elapsed_seconds = int(
-                    (datetime.now() - self.timer_start_time).total_seconds()
-                )
-                # 使用暂停时已经过的时间作为基准，避免暂停期间的时间被计入
-                adjusted_elapsed = self.paused_elapsed_time + elapsed_seconds
-                self.main_timer_seconds = max(
-                    0, self.total_timer_seconds - adjusted_elapsed
+    def flush_checkpoint(self):
+        """退出前在主线程写入所有进行中周期的检查点，下次启动时可以继续"""
+        for profile in self.profiles.running():
+            self.timers.cancel_group(f"checkpoint:{profile.name}")
+            if profile.start_time is None:
+                continue
+            try:
+                profile.checkpoint.save(
+                    self.checkpoint_state(profile), profile.checkpoint.epoch
                 )
+            except OSError as e:
+                print(f"保存检查点失败（{profile.name}）: {e}")
 
-            self.update_timer_display()
-            self.update_session_duration_display()
+    def clear_checkpoint(self, profile=None):
+        profile = profile or self.profile
+        self.timers.cancel_group(f"checkpoint:{profile.name}")
+        try:
+            profile.checkpoint.clear()
+        except OSError as e:
+            print(f"删除检查点失败（{profile.name}）: {e}")
+
+    def recover_orphaned_session(self):
+        """当前档案上次运行时周期没有结束（程序崩溃或被关闭）：继续计时，或者把已学习的部分记录下来"""
+        state = self.profile.orphaned_session
+        self.profile.orphaned_session = None
+        if state is None:
+            return
+        try:
+            start_time = datetime.fromisoformat(state["start_time"])
+            saved_at = datetime.fromisoformat(state["saved_at"])
+            total_seconds = int(state["total_seconds"])
+            elapsed = max(0, min(int(state["elapsed_seconds"]), total_seconds))
+        except (KeyError, TypeError, ValueError):
+            print("检查点已损坏，忽略")
+            self.clear_checkpoint()
+            return
 
-            # 使用较短的间隔更新，提高精度
-            self.current_timer_id = self.root.after(100, self.run_main_timer)
-        else:
-            # 取消当前计时器，防止重复触发
-            if self.current_timer_id:
-                self.root.after_cancel(self.current_timer_id)
-                self.current_timer_id = None
-            # 计时器结束时不播放声音，因为trigger_long_break中会播放
-            # 直接记录学习会话并触发长休息
-            self.record_learning_session(completed_cycle=True)
-            self.trigger_long_break()
-
-    def update_timer_display(self):
-        mins, secs = divmod(self.main_timer_seconds, 60)
+        age = (datetime.now() - saved_at).total_seconds()
+        if elapsed < total_seconds and 0 <= age <= CHECKPOINT_RESUME_WINDOW:
+            if messagebox.askyesno(
+                "继续学习",
+                f"上次的学习周期没有结束（已学习 {elapsed // 60} 分钟）。\n"
+                "是否继续计时？选择“否”将记录已学习的部分。",
+            ):
+                self.resume_session(state, start_time, total_seconds, elapsed)
+                return
+
+        # 按最后一次检查点补记，结束时间取检查点的写入时间
+        if elapsed > 0:
+            session_data = timer_engine.make_session(
+                start_time, saved_at, elapsed, total_seconds, elapsed >= total_seconds
+            )
+            self.save_session(saved_at.strftime("%Y-%m-%d"), session_data)
+            self.update_overview_display()
+        self.clear_checkpoint()
+
+    def on_timer_tick(self, remaining, elapsed):
+        self.update_timer_display(remaining)
+        self.update_session_duration_display(elapsed)
+
+    def on_cycle_complete(self):
+        # 计时器结束时不播放声音，因为trigger_long_break中会播放
+        # 直接记录学习会话并触发长休息
+        self.record_learning_session(completed_cycle=True)
+        self.trigger_long_break()
+
+    def update_timer_display(self, remaining=None):
+        if remaining is None:
+            remaining = self.engine.remaining_seconds()
+        mins, secs = divmod(remaining, 60)
         time_str = f"{mins:02d}:{secs:02d}"
         if hasattr(self, "timer_label"):
             self.timer_label.configure(text=time_str)
 
-    def update_session_duration_display(self):
+    def update_session_duration_display(self, elapsed=None):
         """Updates the label showing the duration of the current learning segment."""
         if hasattr(self, "session_duration_label"):
-            # 使用总周期时间减去剩余时间来计算已学习时间
-            # 这种方法更准确，不受暂停次数影响
-            cycle_minutes = self.cycle_duration_var.get()
-            total_seconds = cycle_minutes * 60
-            elapsed_seconds = total_seconds - self.main_timer_seconds
-            mins, secs = divmod(elapsed_seconds, 60)
+            # 已学习时间由引擎给出，不包含暂停的时间
+            if elapsed is None:
+                elapsed = self.engine.elapsed_seconds()
+            mins, secs = divmod(elapsed, 60)
             # Display as MM:SS minutes
             duration_str = f"你已学习 {mins:02d}:{secs:02d} "
+            next_break = self.engine.next_break_in()
+            if next_break is not None:
+                break_mins, break_secs = divmod(next_break, 60)
+                duration_str += f" · 下次休息 {break_mins:02d}:{break_secs:02d} 后"
             self.session_duration_label.configure(text=duration_str)
 
     def pause_timer_for_5min(self):
         """暂停计时器5分钟"""
-        if self.is_paused_for_5min:
+        if self.engine.state == timer_engine.PAUSED:
             # 如果已经处于暂停状态，则恢复计时
             self.resume_timer()
             return
 
-        # 设置暂停状态
-        self.paused = True
-        self.is_paused_for_5min = True
+        self.show_paused_style()
 
-        # 计算暂停结束时间（当前时间 + 5分钟）
-        self.pause_end_time = datetime.now() + timedelta(minutes=5)
+        # 开始暂停，引擎每秒发出 pause_tick 更新倒计时
+        self.engine.pause(timer_engine.PAUSE_SECONDS)
+        self.write_checkpoint()
 
-        # 记录暂停时的已经过时间
-        if hasattr(self, "timer_start_time"):
-            elapsed_seconds = int(
-                (datetime.now() - self.timer_start_time).total_seconds()
-            )
-            self.paused_elapsed_time += elapsed_seconds
-            # 重置计时器开始时间，为恢复做准备
-            self.timer_start_time = datetime.now()
+    def resume_timer(self):
+        """恢复计时器"""
+        self.show_running_style()
+        self.engine.resume()
+        self.write_checkpoint()
 
+    def show_paused_style(self):
         # 更新按钮文本
         self.pause_button.configure(text="继续")
 
@@ -764,22 +1110,7 @@ class LearningApp:
         )
         self.timer_label.configure(text="暂停中", justify="center", **font_args_pause)
 
-        # 开始显示暂停倒计时
-        self.update_pause_timer()
-
-    def resume_timer(self):
-        """恢复计时器"""
-        # 取消暂停状态
-        self.paused = False
-        self.is_paused_for_5min = False
-        # 取消暂停计时器
-        if self.pause_timer_id:
-            self.root.after_cancel(self.pause_timer_id)
-            self.pause_timer_id = None
-
-        # 重置计时器开始时间，以便正确计算剩余时间
-        self.timer_start_time = datetime.now()
-
+    def show_running_style(self):
         # 更新按钮文本
         self.pause_button.configure(text="暂停5分钟")
 
@@ -787,52 +1118,19 @@ class LearningApp:
         font_args_normal = {"font": customtkinter.CTkFont(size=80, weight="bold")}
         self.timer_label.configure(**font_args_normal)
 
-        # 恢复计时器显示
-        self.update_timer_display()
-
-        # 继续主计时器
-        self.run_main_timer()
-
-    def update_pause_timer(self):
+    def on_pause_tick(self, remaining):
         """更新暂停倒计时显示"""
-        if not self.is_paused_for_5min or not self.pause_end_time:
-            return
-
-        # 计算剩余暂停时间
-        remaining_delta = self.pause_end_time - datetime.now()
-        remaining_seconds = max(0, int(remaining_delta.total_seconds()))
-
-        mins, secs = divmod(remaining_seconds, 60)
-
+        mins, secs = divmod(remaining, 60)
         # 更新标签文本 - 使用较小的字体显示"暂停中"
         self.timer_label.configure(
             text=f"暂停中\n{mins:02d}:{secs:02d}", justify="center"
         )
 
-        if remaining_seconds <= 0:
-            # 暂停时间结束，恢复计时
-            self.resume_timer()
-        else:
-            # 每秒更新一次
-            self.pause_timer_id = self.root.after(1000, self.update_pause_timer)
-
-    def schedule_short_break(self):
-        if self.paused or self.main_timer_seconds <= 0:
-            return
-
-        # 获取当前选择的短休息间隔范围
-        interval_key = self.break_interval_var.get()
-        min_interval, max_interval = BREAK_INTERVAL_OPTIONS[interval_key]
-
-        delay = random.randint(min_interval, max_interval)
-        if self.main_timer_seconds > delay + SHORT_BREAK_TIMER_DURATION:
-            self.short_break_timer_id = self.root.after(
-                delay * 1000, self.trigger_short_break
-            )
+    def on_pause_expired(self):
+        # 暂停时间结束，引擎接着会恢复计时并发出 tick
+        self.show_running_style()
 
     def trigger_short_break(self):
-        if self.paused or self.main_timer_seconds <= 0:
-            return
         # Play sound using sound_manager BEFORE popup
         print("[Trigger Short Break] Playing sound first...")
         # 短休息时激活蓝牙耳机（这不是周期完成的弹窗，所以保持原有行为）
@@ -840,25 +1138,13 @@ class LearningApp:
         print("[Trigger Short Break] Sound finished, showing popup.")
 
         # Pause media if setting is enabled and media is playing
-        if self.auto_pause_media_var.get():
-            print(
-                "[Trigger Short Break] Auto-pause media enabled, checking media status..."
-            )
-            media_status = get_current_media_status()
-            if media_status == "播放":
-                print("[Trigger Short Break] Media is playing, pausing...")
-                toggle_media_playback()  # Call the media control function
-                self.media_paused_by_app = True  # Set flag to remember we paused it
-                print("[Trigger Short Break] Media paused.")
-            else:
-                print(
-                    f"[Trigger Short Break] Media is not playing (status: {media_status}), not pausing."
-                )
-                self.media_paused_by_app = False  # Make sure flag is not set
+        self.pause_media_for_break("Trigger Short Break")
 
         # Show the larger popup
+        # 弹窗期间可能切换档案，结束时要通知开始这次短休息的档案
+        profile = self.profile
         self.show_popup_countdown(
-            SHORT_BREAK_TIMER_DURATION, self.end_short_break, "休息一下"
+            SHORT_BREAK_TIMER_DURATION, lambda: self.end_short_break(profile), "休息一下"
         )
 
     def trigger_long_break(self):
@@ -870,55 +1156,107 @@ class LearningApp:
         print("[Trigger Long Break] Sound finished, showing popup.")
 
         # 暂停媒体播放（如果设置启用且媒体正在播放）
-        if self.auto_pause_media_var.get():
-            print(
-                "[Trigger Long Break] Auto-pause media enabled, checking media status..."
-            )
-            media_status = get_current_media_status()
-            if media_status == "播放":
-                print("[Trigger Long Break] Media is playing, pausing...")
-                toggle_media_playback()  # 调用媒体控制函数
-                self.media_paused_by_app = True  # 设置标志记住是应用暂停的
-                print("[Trigger Long Break] Media paused.")
-            else:
-                print(
-                    f"[Trigger Long Break] Media is not playing (status: {media_status}), not pausing."
-                )
-                self.media_paused_by_app = False  # 确保标志未设置
+        self.pause_media_for_break("Trigger Long Break")
 
         # 记录休息开始时间
-        self.break_start_time = datetime.now()
+        self.profile.break_start_time = datetime.now()
 
         # 显示恭喜完成周期的弹窗，而不是倒计时
         self.show_completion_popup()
 
-    def end_short_break(self):
+    def end_short_break(self, profile):
         print("[End Short Break] Playing sound...")
         # 短休息结束时激活蓝牙耳机（这不是周期完成的弹窗，所以保持原有行为）
         sound_manager.play_notification_sound(activate_bluetooth=False)  # 激活蓝牙耳机
         print("[End Short Break] Sound finished.")
         # Resume media only if auto-resume is enabled AND media was paused by the app
-        if self.auto_resume_media_var.get() and self.media_paused_by_app:
-            print(
-                "[End Short Break] Auto-resume media enabled and we paused it, checking media status..."
-            )
-            media_status = get_current_media_status()
-            if media_status == "暂停":
-                print("[End Short Break] Media is paused, resuming...")
-                toggle_media_playback()  # Call the media control function
-                print("[End Short Break] Media resumed.")
+        if self.auto_resume_media_var.get() and self.media_paused_sessions:
+            self.resume_media_after_break("End Short Break")
+        self.media_paused_sessions = set()  # Reset
+        profile.engine.short_break_finished()  # Schedule the next one
+
+    def pause_media_for_break(self, tag):
+        """休息开始：同时暂停所有正在播放的媒体会话。
+
+        请求在后台执行，结果回到主线程后再记下由本程序暂停了哪些会话。
+        """
+        self.media_paused_sessions = set()
+        if not self.auto_pause_media_var.get():
+            return
+        print(f"[{tag}] Auto-pause media enabled, pausing all playing sessions...")
+
+        def on_done(paused):
+            self.media_paused_sessions = paused  # 记住是本程序暂停的
+            if paused:
+                print(f"[{tag}] Media paused: {sorted(paused)}")
             else:
-                print(
-                    f"[End Short Break] Media is not paused (status: {media_status}), not resuming."
-                )
-        self.media_paused_by_app = False  # Reset flag
-        self.schedule_short_break()  # Schedule the next one
+                print(f"[{tag}] No media is playing, not pausing.")
+
+        def on_error(e):
+            print(f"[{tag}] 暂停媒体时出错: {e}")
+            if isinstance(e, MediaCommandError):
+                # 媒体正在播放，只是命令都失败了：改用模拟媒体键
+                self.press_media_key()
+                self.media_paused_sessions = e.session_ids
+
+        self.tasks.watch(
+            self.media.submit(MediaStateTracker.pause_all), on_done=on_done, on_error=on_error
+        )
+
+    def resume_media_after_break(self, tag):
+        """休息结束：同时恢复本程序暂停、且仍处于暂停状态的会话，不等待结果"""
+        print(f"[{tag}] Auto-resume media enabled, resuming sessions we paused...")
+
+        def on_done(resumed):
+            if resumed:
+                print(f"[{tag}] Media resumed: {sorted(resumed)}")
+            else:
+                print(f"[{tag}] No session we paused is still paused, not resuming.")
+
+        def on_error(e):
+            print(f"[{tag}] 恢复媒体播放时出错: {e}")
+            if isinstance(e, MediaCommandError):
+                self.press_media_key()
+
+        self.tasks.watch(
+            self.media.submit(MediaStateTracker.resume, self.media_paused_sessions),
+            on_done=on_done,
+            on_error=on_error,
+        )
+
+    def press_media_key(self):
+        """在后台线程模拟媒体键（按下和松开之间要等 100ms），并计入媒体控制统计"""
+        self.tasks.submit(
+            self.media.stats.timed,
+            "press_media_key",
+            press_media_key,
+            on_error=lambda e: print(f"模拟媒体键时出错: {e}"),
+        )
+
+    def show_media_stats(self, parent=None):
+        """显示媒体控制的延迟和失败统计，同时写入 MEDIA_STATS_FILE"""
+        saved = self.dump_media_stats()
+        report = self.media.stats.report()
+        if saved:
+            report += f"\n\n已保存到 {MEDIA_STATS_FILE}"
+        messagebox.showinfo("媒体控制统计", report, parent=parent)
+
+    def dump_media_stats(self):
+        """有媒体调用时把统计写入文件，返回是否写入"""
+        if not self.media.stats.snapshot():
+            return False
+        try:
+            self.media.stats.dump(MEDIA_STATS_FILE)
+        except OSError as e:
+            print(f"保存媒体控制统计失败: {e}")
+            return False
+        return True
 
     def end_long_break(self):
         print("[End Long Break] No sound played at end of long break.")
         # 不再播放提示音
         # 不再自动恢复媒体播放
-        self.media_paused_by_app = False  # 重置标志
+        self.media_paused_sessions = set()  # 重置
         self.show_start_button()  # 长休息后返回开始视图
 
     def show_completion_popup(self):
@@ -977,15 +1315,47 @@ class LearningApp:
 
     def update_break_time_display(self):
         """更新显示休息时间的标签"""
-        if hasattr(self, "break_start_time") and hasattr(self, "break_time_label"):
+        if self.profile.break_start_time is not None and hasattr(self, "break_time_label"):
+            if not self.break_time_label.winfo_exists():
+                return  # 已经离开开始界面
             current_time = datetime.now()
-            elapsed_delta = current_time - self.break_start_time
-            elapsed_minutes = int(elapsed_delta.total_seconds() / 60)
+            elapsed_seconds = (current_time - self.profile.break_start_time).total_seconds()
+            elapsed_minutes = int(elapsed_seconds / 60)
 
             self.break_time_label.configure(text=f"你已经休息 {elapsed_minutes} 分钟")
 
-            # 每秒更新一次
-            self.break_timer_id = self.root.after(1000, self.update_break_time_display)
+            # 只显示分钟数，到下一个整分钟再更新
+            self.timers.call_later(
+                60 - elapsed_seconds % 60 + timer_engine.TICK_SLACK,
+                self.update_break_time_display,
+                group="break_display",
+            )
+
+    def prefetch_popup_image(self, image_dir=POPUP_IMAGE_DIR):
+        """在后台扫描图片文件夹并解码下一次弹窗要用的图片"""
+        image_files = list(self.image_files)
+
+        def load():
+            files = image_files or scan_image_files(image_dir)
+            if not files:
+                return files, None
+            image_path = random.choice(files)
+            return files, (image_dir, image_path, decode_popup_image(image_path))
+
+        def on_done(result):
+            files, prefetched = result
+            if not self.image_files:
+                self.image_files = files
+            self.prefetched_image = prefetched
+
+        self.tasks.submit(load, on_done=on_done)
+
+    def take_prefetched_image(self, image_dir):
+        """取出预先解码好的 (路径, PIL 图片)，没有或目录不同时返回 None"""
+        prefetched, self.prefetched_image = self.prefetched_image, None
+        if prefetched is None or prefetched[0] != image_dir:
+            return None
+        return prefetched[1], prefetched[2]
 
     def show_popup_countdown(
         self,
@@ -1022,46 +1392,27 @@ class LearningApp:
             int(screen_height * 0.12) if popup.winfo_height() <= 1 else popup_height
         )
         
-        # 尝试在图片文件夹下随机加载图片
+        # 优先使用后台预先解码好的图片，没有时才在这里读取
         image_path = ""
-        # 支持的图片扩展名
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']
-        
-        if os.path.isdir(image_dir):
+        pil_image = None
+        prefetched = self.take_prefetched_image(image_dir)
+        if prefetched is not None:
+            image_path, pil_image = prefetched
+        else:
             # 如果image_files没有被初始化，就先初始化
             if not self.image_files:
-                # 遍历文件夹及其子文件夹
-                for root, dirs, files in os.walk(image_dir):
-                    for file in files:
-                        # 检查文件扩展名是否为图片
-                        if any(file.lower().endswith(ext) for ext in image_extensions):
-                            self.image_files.append(os.path.join(root, file))
-                    # 检查是否存在文件夹的符号链接
-                    for lnk_dir in dirs:                        
-                        full_path = os.path.join(root, lnk_dir)
-                        if os.path.islink(full_path):  # 如果是符号链接（不包括快捷方式）
-                            try:
-                                target_path = os.path.realpath(full_path)  # 解析真实路径
-                                if os.path.isdir(target_path):  # 确保目标是目录
-                                    # 仅遍历链接目录第一层的文件（防止无尽的递归）
-                                    for link_root, link_dirs, link_files in os.walk(target_path):
-                                        for link_file in link_files:
-                                            # 检查文件扩展名是否为图片
-                                            if any(link_file.lower().endswith(ext) for ext in image_extensions):
-                                                self.image_files.append(os.path.join(link_root, link_file))
-                            except OSError as e:  # 权限问题或无效链接
-                                print("无效符号链接或权限问题:",e)
-                
+                self.image_files = scan_image_files(image_dir)
             if self.image_files:
                 # 如果存在图片文件
                 image_path = random.choice(self.image_files)
-                print("image_path =",image_path)
+        print("image_path =",image_path)
                     
         # 根据图片的长宽和配置来综合确定窗口大小
         background_image_tk = None
-        if image_path and os.path.exists(image_path):
+        if image_path and (pil_image is not None or os.path.exists(image_path)):
             try:
-                pil_image = Image.open(image_path)
+                if pil_image is None:
+                    pil_image = Image.open(image_path)
                 # 确定图片的原始大小和长宽比
                 original_image_width = 0
                 original_image_height = 0
@@ -1186,74 +1537,41 @@ class LearningApp:
         def update_popup_timer(secs):
             if secs >= 0:
                 label.configure(text=f"{secs}")
-                popup.after_id = popup.after(1000, update_popup_timer, secs - 1)
+                self.timers.call_later(1, update_popup_timer, secs - 1, group="popup")
             else:
                 popup.destroy()
                 if callback:
                     callback()
 
         update_popup_timer(duration)
+        # 趁休息时在后台准备下一次弹窗的图片
+        self.prefetch_popup_image(image_dir)
 
         # Handle closing the popup manually
         def on_popup_close():
-            if hasattr(popup, "after_id"):
-                try:
-                    popup.after_cancel(popup.after_id)
-                except ValueError:
-                    pass  # Ignore if ID is invalid (already cancelled/finished)
+            self.timers.cancel_group("popup")
             popup.destroy()
             # If popup closed manually during break, still call the end break logic
-            # but don't reschedule short break if it was a short break popup
-            if callback == self.end_short_break:
-                self.end_short_break()  # Run end logic (plays sound, potentially resumes)
-                # Crucially, DO NOT reschedule the next short break here
-            elif callback == self.end_long_break:
-                self.end_long_break()  # Run end logic
+            # (plays sound, potentially resumes media)
+            if callback:
+                callback()
         popup.protocol("WM_DELETE_WINDOW", on_popup_close)
 
     # pause_media_if_enabled函数已被移除，使用更精确的媒体状态检测逻辑替代
 
     def stop_timer_and_return(self):
-        if self.current_timer_id:
-            self.root.after_cancel(self.current_timer_id)
-            self.current_timer_id = None
-        if self.short_break_timer_id:
-            try:  # Add try-except for robustness
-                self.root.after_cancel(self.short_break_timer_id)
-                self.short_break_timer_id = None
-            except ValueError:
-                pass  # Timer might have already fired or been cancelled
-            except AttributeError:  # Handle cases where after_id might not exist
-                pass
+        # 停止计时，取消所有计时、暂停和短休息定时器
+        self.engine.stop()
 
         # 取消休息时间显示的定时器（如果存在）
-        if hasattr(self, "break_timer_id") and self.break_timer_id:
-            try:
-                self.root.after_cancel(self.break_timer_id)
-                self.break_timer_id = None
-            except ValueError:
-                pass
-            except AttributeError:
-                pass
-
-        # 取消暂停计时器（如果存在）
-        if hasattr(self, "pause_timer_id") and self.pause_timer_id:
-            try:
-                self.root.after_cancel(self.pause_timer_id)
-                self.pause_timer_id = None
-            except ValueError:
-                pass
-            except AttributeError:
-                pass
-
-        self.paused = True
-        self.is_paused_for_5min = False
+        self.timers.cancel_group("break_display")
+
         if self.start_time:
             self.record_learning_session(
                 completed_cycle=False
             )  # Call the correct (second) implementation
             self.start_time = None
-        self.media_paused_by_app = False  # Reset flag when stopping manually
+        self.media_paused_sessions = set()  # Reset when stopping manually
         self.show_start_button()
 
     # --- REMOVED REDUNDANT record_learning_session METHOD ---
@@ -1267,6 +1585,7 @@ class LearningApp:
             self.settings_window.protocol("WM_DELETE_WINDOW", self.on_settings_close)
 
     def on_settings_close(self):
+        self.settings_saver.flush()
         if hasattr(self, "settings_window"):
             self.settings_window.destroy()
             del self.settings_window  # Ensure reference is removed
@@ -1291,23 +1610,62 @@ class LearningApp:
         self.view_var = tk.StringVar(value="日")  # Default view
         segmented_button = customtkinter.CTkSegmentedButton(
             view_frame,
-            values=["日", "周", "月", "年"],
+            values=["日", "周", "月", "年", "分布", "区间"],
             variable=self.view_var,
             command=self.update_records_display,  # Command to update text box
             **font_args_segmented,
         )
         segmented_button.pack(expand=True)
 
+        # --- Date Range Inputs (区间视图) ---
+        font_args_range = {"font": (FONT_NAME, 12)} if FONT_LOADED else {}
+        self.range_frame = customtkinter.CTkFrame(
+            self.records_window, fg_color="transparent"
+        )
+        today = date.today()
+        self.range_start_var = tk.StringVar(value=today.replace(day=1).isoformat())
+        self.range_end_var = tk.StringVar(value=today.isoformat())
+        customtkinter.CTkEntry(
+            self.range_frame, textvariable=self.range_start_var, width=110, **font_args_range
+        ).pack(side="left", padx=(0, 5))
+        customtkinter.CTkLabel(self.range_frame, text="至", **font_args_range).pack(
+            side="left", padx=5
+        )
+        customtkinter.CTkEntry(
+            self.range_frame, textvariable=self.range_end_var, width=110, **font_args_range
+        ).pack(side="left", padx=5)
+        customtkinter.CTkButton(
+            self.range_frame,
+            text="查询",
+            width=60,
+            command=lambda: self.update_records_display("区间"),
+            **font_args_range,
+        ).pack(side="left", padx=(5, 0))
+        self.records_view_frame = view_frame
+
         # --- Records Text Area ---
         font_args_textbox = {"font": (FONT_NAME, 12)} if FONT_LOADED else {}
         self.records_text = customtkinter.CTkTextbox(
             self.records_window, wrap="word", **font_args_textbox
         )
         self.records_text.pack(expand=True, fill="both", padx=20, pady=(0, 10))
+        self.records_text.tag_config(records_view.HEADER_TAG, foreground="#3B8ED0")
         self.records_text.configure(state="disabled")  # Make read-only initially
+        # 日视图滚动到底部时自动加载更早的一页
+        self.records_text.bind("<MouseWheel>", self.on_records_scroll, add="+")
 
-        # --- Close Button ---
+        # --- Load Older Button (日视图分页) ---
         font_args_button = {"font": (FONT_NAME, 12)} if FONT_LOADED else {}
+        self.load_older_button = customtkinter.CTkButton(
+            self.records_window,
+            text="加载更早的记录",
+            command=self.load_older_records,
+            fg_color="transparent",
+            border_width=1,
+            **font_args_button,
+        )
+
+        # --- Close Button ---
         close_button = customtkinter.CTkButton(
             self.records_window,
             text="关闭",
@@ -1321,298 +1679,145 @@ class LearningApp:
 
     def update_records_display(self, selected_view):
         """Updates the records text box based on the selected view."""
-        self.records_text.configure(state="normal")  # Enable editing
-        self.records_text.delete("1.0", tk.END)
+        # 统计和文本生成在后台线程中进行，期间先显示占位文字，计时器不会被卡住
+        self.records_page = 0
+        self.records_has_more = False
+        self.records_request += 1
+        self.records_loading_older = False
+        if selected_view == "区间":
+            self.range_frame.pack(after=self.records_view_frame, pady=(0, 10))
+        else:
+            self.range_frame.pack_forget()
+        records_view.render(self.records_text, records_view.message("正在加载..."))
+        self.update_load_older_button()
+        self.tasks.submit(
+            self.build_records_view,
+            selected_view,
+            0,
+            self.parse_records_range() if selected_view == "区间" else None,
+            on_done=lambda result, request=self.records_request: self.show_records_view(
+                request, result, append=False
+            ),
+        )
 
+    def parse_records_range(self):
+        """读取区间视图输入的起止日期，返回 (起始, 结束) 或出错信息"""
         try:
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-            daily_log = data.get("daily_log", {})
-        except (FileNotFoundError, json.JSONDecodeError):
-            daily_log = {}
-
-        if not daily_log:
-            self.records_text.insert(tk.END, "暂无学习记录。")
-            self.records_text.configure(state="disabled")
-            return
-
-        # Sort dates for consistent display
-        sorted_dates = sorted(daily_log.keys(), reverse=True)
-
-        if selected_view == "日":
-            self.display_daily_records(daily_log, sorted_dates)
-        elif selected_view == "周":
-            self.display_weekly_records(daily_log)
-        elif selected_view == "月":
-            self.display_monthly_records(daily_log)
-        elif selected_view == "年":
-            self.display_yearly_records(daily_log)
-
-        self.records_text.configure(state="disabled")  # Make read-only again
-
-    def display_daily_records(self, daily_log, sorted_dates):
-        """Formats and displays daily records."""
-        for date_str in sorted_dates:
-            sessions_data = daily_log[date_str]
-            self.records_text.insert(tk.END, f"{date_str}:\n")
-
-            if isinstance(sessions_data, list):
-                # New format: List of session dictionaries
-                for session in sessions_data:
-                    if isinstance(session, dict):
-                        start_time_str = session.get("start_time", "N/A")
-                        end_time_str = session.get("end_time", "N/A")
-                        duration_sec = session.get("duration_seconds", 0)
-                        duration_min = duration_sec / 60
-                        completed = session.get("completed", False)
-                        status = (
-                            "完成"
-                            if completed
-                            else f"中断 ({session.get('cycle_fraction', 0.0):.2f}周期)"
-                        )
-                        # Try to format time nicely
-                        try:
-                            start_dt = datetime.fromisoformat(start_time_str)
-                            start_formatted = start_dt.strftime("%H:%M:%S")
-                        except (ValueError, TypeError):
-                            start_formatted = start_time_str
-                        try:
-                            end_dt = datetime.fromisoformat(end_time_str)
-                            end_formatted = end_dt.strftime("%H:%M:%S")
-                        except (ValueError, TypeError):
-                            end_formatted = end_time_str
-
-                        self.records_text.insert(
-                            tk.END,
-                            f"  - {start_formatted} -> {end_formatted} ({duration_min:.1f}分钟) - {status}\n",
-                        )
-                    else:
-                        self.records_text.insert(tk.END, "  - [无效或格式错误的记录]\n")
-            elif isinstance(sessions_data, dict):
-                # Old format: Dictionary with daily totals
-                total_sec = sessions_data.get("seconds", 0)
-                total_cyc = sessions_data.get("cycles", 0.0)
-                total_min = total_sec / 60
-                # Remove the prefix '[旧格式数据]'
-                self.records_text.insert(
-                    tk.END,
-                    f"  - 总时长: {total_min:.1f} 分钟, 总周期: {total_cyc:.2f}\n",
-                )
-            else:
-                # Unknown format
-                self.records_text.insert(tk.END, "  - [未知格式数据]\n")
-            self.records_text.insert(tk.END, "\n")  # Add space between days
-
-    # --- Placeholder functions for other views ---
-    def display_weekly_records(self, daily_log):
-        """Aggregates and displays records by week."""
-        weekly_data = {}
-        for date_str, sessions_data in daily_log.items():
-            try:
-                date_obj = datetime.fromisoformat(date_str)
-                # Get ISO week number and year
-                year, week, _ = date_obj.isocalendar()
-                week_key = f"{year}-W{week:02d}"
-
-                if week_key not in weekly_data:
-                    weekly_data[week_key] = {
-                        "total_seconds": 0,
-                        "total_cycles": 0.0,
-                        "start_date": date_obj,
-                        "end_date": date_obj,
-                    }
+            start = date.fromisoformat(self.range_start_var.get().strip())
+            end = date.fromisoformat(self.range_end_var.get().strip())
+        except ValueError:
+            return "日期格式应为 YYYY-MM-DD，例如 2025-01-31。"
+        if start > end:
+            start, end = end, start
+        return start, end
+
+    def build_records_view(self, selected_view, page=0, date_range=None):
+        """后台线程：生成视图文本，返回 (RecordsText, 日视图是否还有更早的记录)"""
+        has_more = False
+        model = self.records_model
+        # 只在读取汇总结果时持有锁（各方法自己加锁），格式化在锁外进行，
+        # 主线程记录会话或保存设置时不会等待整个视图生成
+        try:
+            if selected_view == "区间":
+                if isinstance(date_range, str):
+                    records = records_view.message(date_range)
                 else:
-                    # Update start/end dates for the week range
-                    weekly_data[week_key]["start_date"] = min(
-                        weekly_data[week_key]["start_date"], date_obj
-                    )
-                    weekly_data[week_key]["end_date"] = max(
-                        weekly_data[week_key]["end_date"], date_obj
-                    )
-
-                # Aggregate data based on format
-                if isinstance(sessions_data, list):
-                    for session in sessions_data:
-                        if isinstance(session, dict):
-                            weekly_data[week_key]["total_seconds"] += session.get(
-                                "duration_seconds", 0
-                            )
-                            weekly_data[week_key]["total_cycles"] += session.get(
-                                "cycle_fraction",
-                                1.0 if session.get("completed", False) else 0.0,
-                            )
-                elif isinstance(sessions_data, dict):
-                    weekly_data[week_key]["total_seconds"] += sessions_data.get(
-                        "seconds", 0
-                    )
-                    weekly_data[week_key]["total_cycles"] += sessions_data.get(
-                        "cycles", 0.0
+                    # 前缀和索引：任意区间只需两次二分查找
+                    records = records_view.format_range(
+                        *date_range, model.range_totals(*date_range)
                     )
-
-            except ValueError:
-                continue  # Skip invalid date strings
-
-        if not weekly_data:
-            self.records_text.insert(tk.END, "暂无周记录数据。\n")
+            elif selected_view == "日":
+                # 日视图只显示一页，更早的记录按需加载；本页的会话列表在锁内复制，
+                # 格式化时主线程可以继续追加会话
+                with model.lock:
+                    daily_log, page_dates, has_more = model.daily_page(page)
+                    page_log = {date_str: list(daily_log[date_str]) for date_str in page_dates}
+                if page_dates:
+                    records = records_view.format_daily(page_log, page_dates)
+                else:
+                    records = records_view.message("暂无学习记录。")
+            elif selected_view == "周":
+                records = records_view.format_weekly(model.aggregate("week"))
+            elif selected_view == "月":
+                records = records_view.format_monthly(model.aggregate("month"))
+            elif selected_view == "年":
+                records = records_view.format_yearly(model.aggregate("year"))
+            else:  # 分布
+                records = records_view.format_distribution(*model.distribution())
+        except IOError as e:
+            records = records_view.message(f"读取学习记录失败: {e}")
+        except Exception as e:
+            # 其他错误也要显示出来，不然窗口会一直停在“正在加载...”
+            print(f"生成学习记录视图时出错: {e!r}")
+            records = records_view.message(f"生成学习记录视图时出错: {e}")
+        return records, has_more
+
+    def show_records_view(self, request, result, append):
+        """主线程：显示后台生成的视图；窗口已关闭或视图已切换时丢弃结果"""
+        if request != self.records_request or not self.records_window.winfo_exists():
             return
-
-        # Sort weeks chronologically (descending)
-        sorted_weeks = sorted(weekly_data.keys(), reverse=True)
-
-        for week_key in sorted_weeks:
-            data = weekly_data[week_key]
-            total_min = data["total_seconds"] / 60
-            start_date_str = data["start_date"].strftime("%Y-%m-%d")
-            end_date_str = data["end_date"].strftime("%Y-%m-%d")
-            self.records_text.insert(
-                tk.END, f"{week_key} ({start_date_str} 至 {end_date_str}):\n"
-            )
-            self.records_text.insert(
-                tk.END,
-                f"  - 总时长: {total_min:.1f} 分钟, 总周期: {data['total_cycles']:.2f}\n\n",
-            )
-
-    def display_monthly_records(self, daily_log):
-        """Aggregates and displays records by month."""
-        monthly_data = {}
-        for date_str, sessions_data in daily_log.items():
-            try:
-                date_obj = datetime.fromisoformat(date_str)
-                month_key = date_obj.strftime("%Y-%m")  # Format as YYYY-MM
-
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = {"total_seconds": 0, "total_cycles": 0.0}
-
-                # Aggregate data based on format
-                if isinstance(sessions_data, list):
-                    for session in sessions_data:
-                        if isinstance(session, dict):
-                            monthly_data[month_key]["total_seconds"] += session.get(
-                                "duration_seconds", 0
-                            )
-                            monthly_data[month_key]["total_cycles"] += session.get(
-                                "cycle_fraction",
-                                1.0 if session.get("completed", False) else 0.0,
-                            )
-                elif isinstance(sessions_data, dict):
-                    monthly_data[month_key]["total_seconds"] += sessions_data.get(
-                        "seconds", 0
-                    )
-                    monthly_data[month_key]["total_cycles"] += sessions_data.get(
-                        "cycles", 0.0
-                    )
-
-            except ValueError:
-                continue  # Skip invalid date strings
-
-        if not monthly_data:
-            self.records_text.insert(tk.END, "暂无月记录数据。\n")
+        records, self.records_has_more = result
+        records_view.render(self.records_text, records, append=append)
+        self.records_loading_older = False
+        self.update_load_older_button()
+
+    def load_older_records(self):
+        """日视图：在末尾追加更早的一页记录"""
+        if not self.records_has_more or self.records_loading_older:
             return
+        self.records_loading_older = True
+        self.records_page += 1
+        self.tasks.submit(
+            self.build_records_view,
+            "日",
+            self.records_page,
+            on_done=lambda result, request=self.records_request: self.show_records_view(
+                request, result, append=True
+            ),
+        )
 
-        # Sort months chronologically (descending)
-        sorted_months = sorted(monthly_data.keys(), reverse=True)
-
-        for month_key in sorted_months:
-            data = monthly_data[month_key]
-            total_min = data["total_seconds"] / 60
-            self.records_text.insert(tk.END, f"{month_key}:\n")
-            self.records_text.insert(
-                tk.END,
-                f"  - 总时长: {total_min:.1f} 分钟, 总周期: {data['total_cycles']:.2f}\n\n",
-            )
-
-    def display_yearly_records(self, daily_log):
-        """Aggregates and displays records by year."""
-        yearly_data = {}
-        for date_str, sessions_data in daily_log.items():
-            try:
-                date_obj = datetime.fromisoformat(date_str)
-                year_key = str(date_obj.year)  # Format as YYYY
-
-                if year_key not in yearly_data:
-                    yearly_data[year_key] = {"total_seconds": 0, "total_cycles": 0.0}
-
-                # Aggregate data based on format
-                if isinstance(sessions_data, list):
-                    for session in sessions_data:
-                        if isinstance(session, dict):
-                            yearly_data[year_key]["total_seconds"] += session.get(
-                                "duration_seconds", 0
-                            )
-                            yearly_data[year_key]["total_cycles"] += session.get(
-                                "cycle_fraction",
-                                1.0 if session.get("completed", False) else 0.0,
-                            )
-                elif isinstance(sessions_data, dict):
-                    yearly_data[year_key]["total_seconds"] += sessions_data.get(
-                        "seconds", 0
-                    )
-                    yearly_data[year_key]["total_cycles"] += sessions_data.get(
-                        "cycles", 0.0
-                    )
-
-            except ValueError:
-                continue  # Skip invalid date strings
-
-        if not yearly_data:
-            self.records_text.insert(tk.END, "暂无年记录数据。\n")
-            return
+    def update_load_older_button(self):
+        if self.records_has_more:
+            self.load_older_button.pack(after=self.records_text, pady=(0, 5))
+        else:
+            self.load_older_button.pack_forget()
 
-        # Sort years chronologically (descending)
-        sorted_years = sorted(yearly_data.keys(), reverse=True)
+    def on_records_scroll(self, event=None):
+        # 等滚动生效后再检查是否到了底部
+        self.records_window.after_idle(self.check_records_scroll_end)
 
-        for year_key in sorted_years:
-            data = yearly_data[year_key]
-            total_min = data["total_seconds"] / 60
-            self.records_text.insert(tk.END, f"{year_key}年:\n")
-            self.records_text.insert(
-                tk.END,
-                f"  - 总时长: {total_min:.1f} 分钟, 总周期: {data['total_cycles']:.2f}\n\n",
-            )
+    def check_records_scroll_end(self):
+        if self.records_has_more and self.records_text.yview()[1] >= 0.99:
+            self.load_older_records()
 
-    def record_learning_session(self, completed_cycle=False):
-        if self.start_time:
+    def record_learning_session(self, completed_cycle=False, profile=None):
+        profile = profile or self.profile
+        if profile.start_time:
             end_time = datetime.now()
-            # 使用总周期时间减去剩余时间来计算已学习时间
-            # 这种方法更准确，不受暂停次数影响
-            cycle_minutes = self.cycle_duration_var.get()
-            total_seconds = cycle_minutes * 60
-            duration_seconds = total_seconds - self.main_timer_seconds
             today_str = end_time.strftime("%Y-%m-%d")
-
-            # Calculate cycle fraction
-            if completed_cycle:
-                cycle_fraction = 1.0
-            else:
-                # 使用总周期时间计算周期分数
-                cycle_fraction = duration_seconds / total_seconds
-                cycle_fraction = max(
-                    0.0, min(1.0, cycle_fraction)
-                )  # Clamp between 0 and 1
-
-            session_data = {
-                "start_time": self.start_time.strftime("%H:%M:%S"),
-                "end_time": end_time.strftime("%H:%M:%S"),
-                "duration_seconds": int(duration_seconds),
-                "completed_cycle": completed_cycle,
-                "cycle_fraction": cycle_fraction,
-            }
-
-            if today_str not in self.learning_data["daily_log"]:
-                self.learning_data["daily_log"][today_str] = []
-            self.learning_data["daily_log"][today_str].append(session_data)
-
-            # Update totals only if the cycle was completed or partially completed
-            self.learning_data["total_seconds"] = self.learning_data.get(
-                "total_seconds", 0
-            ) + int(duration_seconds * cycle_fraction)
-            self.learning_data["total_cycles"] = (
-                self.learning_data.get("total_cycles", 0) + cycle_fraction
+            # 已学习时间由引擎给出，不受暂停次数影响
+            session_data = profile.engine.make_session(
+                profile.start_time, end_time, completed_cycle
             )
-
-            self.save_data()
-            self.update_overview_display()
-            self.start_time = None  # Reset start time
+            self.save_session(today_str, session_data, profile)
+            # 周期已经记录，不再需要检查点
+            self.clear_checkpoint(profile)
+            if profile is self.profile:
+                self.update_overview_display()
+            profile.start_time = None  # Reset start time
+
+    def save_session(self, date_str, session_data, profile=None):
+        profile = profile or self.profile
+        # 追加到日志并更新总时长/总周期，不重写整个数据文件
+        error = None
+        with profile.records_model.lock:  # 后台线程可能正在计算统计视图
+            try:
+                profile.store.append_session(profile.learning_data, date_str, session_data)
+            except IOError as e:
+                error = e
+            profile.records_model.session_added(date_str, session_data)
+        if error is not None:
+            messagebox.showerror("错误", f"无法保存学习数据: {error}")
 
 
 # --- Main Execution ---
@@ -1622,7 +1827,15 @@ if __name__ == "__main__":
 
     root = customtkinter.CTk()
     app = LearningApp(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        # 程序退出时写入尚未保存的设置和检查点
+        app.settings_saver.flush()
+        app.flush_checkpoint()
+        app.tasks.shutdown()
+        app.media.shutdown()
+        app.dump_media_stats()
 
     # Quit pygame mixer when the application closes
     sound_manager.quit_mixer()
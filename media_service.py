@@ -0,0 +1,209 @@
+import asyncio
+import threading
+import time
+
+import media_stats
+
+# 关闭时等待事件循环线程退出的最长时间（秒）
+SHUTDOWN_TIMEOUT = 2.0
+# 获取会话管理器最多等待的时间（秒）
+DEFAULT_CONNECT_TIMEOUT = 1.0
+# 每次媒体调用（包括获取会话管理器）的默认截止时间（秒），
+# 应大于 connect_timeout 加上调用本身的超时（例如 media_tracker.COMMAND_TIMEOUT），
+# 否则部分成功的结果会在截止时间被丢弃
+DEFAULT_DEADLINE = 3.5
+
+
+class MediaService:
+    """媒体控制服务：后台线程上一个常驻的 asyncio 事件循环 + 缓存的会话管理器。
+
+    submit(func, *args) 在事件循环中执行 await func(manager, *args)，立即返回
+    concurrent.futures.Future，Tk 主线程不会等待媒体查询或命令。
+    request_manager 是获取会话管理器的协程函数（程序中是 media_status_fetcher.connect_media_tracker，
+    返回订阅了状态变化的 MediaStateTracker），只在第一次使用或上一次调用出错后请求，
+    同时到达的调用共用一个请求；出错时丢弃的管理器如果有 close() 会被调用。事件循环线程在第一次 connect / submit 时才启动。
+    获取会话管理器最多等待 connect_timeout 秒，每次调用总共最多执行 deadline 秒，超时按失败处理；
+    从提交到完成的耗时和结果按函数名记录在 stats（media_stats.MediaStats）中。
+    """
+
+    def __init__(
+        self,
+        request_manager,
+        deadline=DEFAULT_DEADLINE,
+        stats=None,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+    ):
+        if deadline <= connect_timeout:
+            raise ValueError("deadline 必须大于 connect_timeout")
+        self._request_manager = request_manager
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.stats = stats if stats is not None else media_stats.MediaStats()
+        self._manager = None
+        self._connecting = None  # 进行中的会话管理器请求（asyncio.Task）
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("媒体控制服务已关闭")
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="media", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _get_manager(self, attempt):
+        # 只在事件循环线程中访问，不需要加锁。同时到达的调用共用同一个进行中的请求，
+        # 不会重复请求（也不会留下没人关闭的管理器）
+        if self._manager is not None:
+            attempt["manager"] = self._manager
+            return self._manager
+        connecting = self._connecting
+        if connecting is None:
+            connecting = self._connecting = asyncio.ensure_future(self._request_manager())
+            connecting.add_done_callback(self._on_connected)
+        attempt["connecting"] = connecting
+        try:
+            # shield：一个调用超时不会取消其他调用也在等待的请求
+            manager = await asyncio.shield(connecting)
+        except asyncio.CancelledError:
+            if connecting.cancelled():
+                raise ConnectionError("获取媒体会话管理器的请求已被放弃") from None
+            raise
+        attempt["manager"] = manager
+        return manager
+
+    def _on_connected(self, connecting):
+        if connecting is not self._connecting:
+            return  # 已被放弃的请求
+        self._connecting = None
+        if not connecting.cancelled() and connecting.exception() is None:
+            self._manager = connecting.result()
+
+    def _discard_manager(self, attempt):
+        """调用出错：这次用到的会话管理器可能已经失效，下次重新请求；
+        还在等待会话管理器时出错（例如超时），放弃这次等待的请求"""
+        manager = attempt.get("manager")
+        if manager is not None:
+            if manager is self._manager:  # 其他调用可能已经丢弃过
+                self._manager = None
+                close = getattr(manager, "close", None)
+                if close is not None:
+                    close()
+            return
+        connecting = attempt.get("connecting")
+        if connecting is not None and connecting is self._connecting:
+            self._connecting = None
+            connecting.cancel()
+
+    async def _call(self, func, args, attempt):
+        manager = await asyncio.wait_for(self._get_manager(attempt), self.connect_timeout)
+        return await func(manager, *args)
+
+    async def _run(self, name, func, args, submitted):
+        attempt = {}  # 这次调用等待的请求和用到的会话管理器
+        try:
+            result = await asyncio.wait_for(self._call(func, args, attempt), self.deadline)
+        except asyncio.TimeoutError:
+            self.stats.record(name, time.perf_counter() - submitted, media_stats.TIMEOUT)
+            self._discard_manager(attempt)
+            raise
+        except Exception:
+            self.stats.record(name, time.perf_counter() - submitted, media_stats.FAILED)
+            self._discard_manager(attempt)
+            raise
+        self.stats.record(name, time.perf_counter() - submitted, media_stats.OK)
+        return result
+
+    def connect(self):
+        """提前启动事件循环并获取会话管理器，返回 Future（结果为管理器）"""
+        return self.submit(_connected)
+
+    def submit(self, func, *args):
+        """在事件循环线程上执行 await func(manager, *args)，返回 concurrent.futures.Future"""
+        name = getattr(func, "__name__", repr(func))
+        return asyncio.run_coroutine_threadsafe(
+            self._run(name, func, args, time.perf_counter()), self._ensure_loop()
+        )
+
+    def shutdown(self):
+        """停止事件循环，未完成的请求被取消"""
+        with self._lock:
+            self._closed = True
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        def stop():
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            close = getattr(self._manager, "close", None)
+            if close is not None:
+                close()  # 取消状态通知的订阅
+            self._manager = None
+            loop.stop()
+
+        loop.call_soon_threadsafe(stop)
+        thread.join(SHUTDOWN_TIMEOUT)
+        if not thread.is_alive():
+            loop.close()
+
+
+async def _connected(manager):
+    return manager
+
+
+if __name__ == "__main__":
+    # 演示：会话管理器的请求耗时 50ms，比较每次 asyncio.run 和常驻事件循环的开销
+    import time
+
+    REQUEST_DELAY = 0.05
+    CALLS = 20
+
+    async def request_manager():
+        await asyncio.sleep(REQUEST_DELAY)
+        return {"status": "播放"}
+
+    async def get_status(manager):
+        return manager["status"]
+
+    async def per_call():
+        return await get_status(await request_manager())
+
+    t0 = time.perf_counter()
+    for _ in range(CALLS):
+        asyncio.run(per_call())
+    per_call_ms = (time.perf_counter() - t0) / CALLS * 1000
+
+    service = MediaService(request_manager)
+    service.submit(get_status).result()  # 第一次请求会话管理器
+    t0 = time.perf_counter()
+    futures = [service.submit(get_status) for _ in range(CALLS)]
+    submit_ms = (time.perf_counter() - t0) / CALLS * 1000
+    results = [future.result() for future in futures]
+    total_ms = (time.perf_counter() - t0) / CALLS * 1000
+    service.shutdown()
+
+    print(f"每次 asyncio.run: {per_call_ms:.2f} ms/次（调用线程一直等待）")
+    print(f"常驻事件循环: 提交 {submit_ms:.3f} ms/次，完成 {total_ms:.3f} ms/次，结果 {results[0]}")
+
+    # 截止时间：卡住的调用在 deadline 后失败，不会一直占着结果
+    async def hang(manager):
+        await asyncio.Event().wait()
+
+    service = MediaService(request_manager, deadline=0.2, connect_timeout=0.1)
+    try:
+        service.submit(hang).result()
+    except asyncio.TimeoutError:
+        print("卡住的调用在 200 ms 后超时")
+    for _ in range(CALLS):
+        service.submit(get_status).result()
+    service.shutdown()
+    print(service.stats.report())
@@ -0,0 +1,117 @@
+import threading
+import time
+from datetime import datetime
+
+from data_store import atomic_write_json
+
+# 延迟直方图各个桶的上限（毫秒），最后还有一个桶收集更慢的调用
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# 调用结果
+OK = "ok"
+FAILED = "failed"
+TIMEOUT = "timeout"
+OUTCOMES = (OK, FAILED, TIMEOUT)
+
+
+class OperationStats:
+    """一种媒体调用（例如 pause_all）的统计"""
+
+    __slots__ = ("outcomes", "buckets", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @property
+    def calls(self):
+        return sum(self.outcomes.values())
+
+    def add(self, ms, outcome):
+        self.outcomes[outcome] += 1
+        index = 0
+        while index < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction):
+        """按直方图估计的分位数（返回所在桶的上限，最慢的桶返回最大值）"""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(LATENCY_BUCKETS_MS[index], self.max_ms)
+                return self.max_ms
+        return 0.0
+
+    def to_dict(self):
+        labels = [f"<={ms}ms" for ms in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        calls = self.calls
+        return {
+            "calls": calls,
+            **self.outcomes,
+            "mean_ms": round(self.total_ms / calls, 3) if calls else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "histogram": {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+
+class MediaStats:
+    """所有媒体控制调用的延迟直方图和失败/超时次数，可以在任意线程记录"""
+
+    def __init__(self):
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, outcome):
+        with self._lock:
+            stats = self._operations.get(name)
+            if stats is None:
+                stats = self._operations[name] = OperationStats()
+            stats.add(seconds * 1000, outcome)
+
+    def timed(self, name, func, *args):
+        """同步执行 func(*args) 并记录耗时，异常照常抛出（用于模拟媒体键等回退操作）"""
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            self.record(name, time.perf_counter() - start, FAILED)
+            raise
+        self.record(name, time.perf_counter() - start, OK)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._operations.items()}
+
+    def report(self):
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "还没有媒体控制调用。"
+        lines = []
+        for name, stats in sorted(snapshot.items()):
+            lines.append(
+                f"{name}: {stats['calls']} 次（失败 {stats[FAILED]}，超时 {stats[TIMEOUT]}）\n"
+                f"  平均 {stats['mean_ms']:.1f} ms，p50 ≤{stats['p50_ms']:.0f} ms，"
+                f"p95 ≤{stats['p95_ms']:.0f} ms，最大 {stats['max_ms']:.1f} ms"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """把统计写入 JSON 文件"""
+        atomic_write_json(
+            path,
+            {
+                "saved_at": datetime.now().isoformat(timespec="seconds"),
+                "operations": self.snapshot(),
+            },
+        )
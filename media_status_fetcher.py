@@ -1,29 +1,40 @@
 import asyncio
+import threading
 from winsdk.windows.media.control import \
     GlobalSystemMediaTransportControlsSessionManager as MediaManager
 from winsdk.windows.media.control import GlobalSystemMediaTransportControlsSessionPlaybackStatus as PlaybackStatus
 
+from media_tracker import MediaStateTracker, NO_SESSION, UNKNOWN
 
-async def get_media_status():
-    sessions = await MediaManager.request_async()
+STATUS_NAMES = {
+    PlaybackStatus.CLOSED: "关闭",
+    PlaybackStatus.PAUSED: "暂停",
+    PlaybackStatus.PLAYING: "播放",
+    PlaybackStatus.STOPPED: "停止",
+    PlaybackStatus.CHANGING: "转变状态"
+}
+
+
+async def request_session_manager():
+    return await MediaManager.request_async()
+
+
+async def get_media_status(sessions=None):
+    """sessions 为缓存的会话管理器，没有时重新请求一个"""
+    if sessions is None:
+        sessions = await request_session_manager()
     current_session = sessions.get_current_session()
     if current_session:
         playback_info = current_session.get_playback_info()
         status = playback_info.playback_status
-        status_mapping = {
-            PlaybackStatus.CLOSED: "关闭",
-            PlaybackStatus.PAUSED: "暂停",
-            PlaybackStatus.PLAYING: "播放",
-            PlaybackStatus.STOPPED: "停止",
-            PlaybackStatus.CHANGING: "转变状态"
-        }
-        return status_mapping.get(status, "未知状态")
-    return "无活动媒体会话"
+        return STATUS_NAMES.get(status, UNKNOWN)
+    return NO_SESSION
 
 
-async def toggle_media_playback():
+async def toggle_media_playback(sessions=None):
     """暂停或播放当前媒体"""
-    sessions = await MediaManager.request_async()
+    if sessions is None:
+        sessions = await request_session_manager()
     current_session = sessions.get_current_session()
     if current_session:
         playback_info = current_session.get_playback_info()
@@ -42,6 +53,103 @@ async def toggle_media_playback():
     return "无活动媒体会话"
 
 
+class WinsdkMediaBackend:
+    """MediaStateTracker 的 Windows 后端：订阅会话列表变化和每个会话的播放状态变化通知。
+
+    会话 id 为来源程序的 source_app_user_model_id；同一个程序有多个会话时（例如浏览器的
+    多个标签页）后出现的会话加上 " #2"、" #3" 区分。会话列表变化时已知的会话保留原来的 id 和订阅，
+    编号不会重复使用：关闭其他标签页或列表顺序变化后，同一个 id 不会指向另一个会话。
+    """
+
+    def __init__(self):
+        self._manager = None
+        self._manager_token = None
+        self._sessions = {}  # 会话 id -> (会话, 订阅令牌)
+        self._next_number = {}  # 来源程序 -> 下一个会话的编号
+        self._on_change = None
+        self._lock = threading.Lock()  # 通知可能在 WinRT 的线程中到达
+
+    async def connect(self, on_change):
+        self._on_change = on_change
+        self._manager = await request_session_manager()
+        self._manager_token = self._manager.add_sessions_changed(
+            lambda manager, args: self._watch_sessions()
+        )
+        self._watch_sessions()
+
+    def _known_id(self, session):
+        for session_id, (known, _) in self._sessions.items():
+            if known == session:
+                return session_id
+        return None
+
+    def _new_id(self, session):
+        app_id = session.source_app_user_model_id
+        number = self._next_number.get(app_id, 1)
+        self._next_number[app_id] = number + 1
+        return app_id if number == 1 else f"{app_id} #{number}"
+
+    def _watch_sessions(self):
+        """同步当前的会话列表：新会话分配 id 并订阅，已关闭的会话取消订阅"""
+        with self._lock:
+            sessions = {}
+            for session in self._manager.get_sessions():
+                session_id = self._known_id(session)
+                if session_id is not None:
+                    sessions[session_id] = self._sessions.pop(session_id)
+                    continue
+                token = session.add_playback_info_changed(
+                    lambda session, args: self._report()
+                )
+                sessions[self._new_id(session)] = (session, token)
+            self._unsubscribe()  # 剩下的是已经关闭的会话
+            self._sessions = sessions
+        self._report()
+
+    def _unsubscribe(self):
+        for session, token in self._sessions.values():
+            session.remove_playback_info_changed(token)
+        self._sessions = {}
+
+    def _report(self):
+        with self._lock:
+            sessions = dict(self._sessions)
+        statuses = {
+            session_id: STATUS_NAMES.get(session.get_playback_info().playback_status, UNKNOWN)
+            for session_id, (session, _) in sessions.items()
+        }
+        on_change = self._on_change
+        if on_change is not None:
+            on_change(statuses)
+
+    def _session(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            raise RuntimeError(f"媒体会话 {session_id} 已关闭")
+        return entry[0]
+
+    async def pause(self, session_id):
+        if not await self._session(session_id).try_pause_async():
+            raise RuntimeError(f"{session_id}: 暂停命令失败")
+
+    async def play(self, session_id):
+        if not await self._session(session_id).try_play_async():
+            raise RuntimeError(f"{session_id}: 播放命令失败")
+
+    def close(self):
+        self._on_change = None
+        with self._lock:
+            self._unsubscribe()
+        if self._manager is not None:
+            self._manager.remove_sessions_changed(self._manager_token)
+            self._manager = self._manager_token = None
+
+
+async def connect_media_tracker():
+    """创建并连接 Windows 媒体状态跟踪器（MediaService 的 request_manager）"""
+    return await MediaStateTracker(WinsdkMediaBackend()).connect()
+
+
 if __name__ == "__main__":
     try:
         # 获取当前媒体状态
@@ -0,0 +1,213 @@
+import asyncio
+import threading
+
+# 媒体状态（与 media_status_fetcher 的显示文字一致）
+PLAYING = "播放"
+PAUSED = "暂停"
+NO_SESSION = "无活动媒体会话"
+UNKNOWN = "未知状态"
+# 每个会话的暂停/播放命令最多等待多少秒，超时的会话视为失败
+COMMAND_TIMEOUT = 2.0
+
+
+class MediaCommandError(Exception):
+    """有需要操作的会话，但所有暂停/播放命令都失败了（可以改用模拟媒体键）。
+
+    session_ids 为命令失败的会话。
+    """
+
+    def __init__(self, session_ids, errors):
+        super().__init__(f"{len(session_ids)} 个媒体会话的命令失败: {errors}")
+        self.session_ids = set(session_ids)
+        self.errors = errors
+
+
+class MediaStateTracker:
+    """缓存所有媒体会话的播放状态，由后端的状态变化通知更新，查询不需要任何往返。
+
+    pause_all() 同时暂停所有正在播放的会话，返回由这里暂停的会话 id；休息结束时
+    resume(session_ids) 只恢复其中仍处于暂停状态的会话。命令用 asyncio.gather 并发发出，
+    每个会话最多等待 timeout 秒，一个会话卡住不会拖住其他会话。
+    backend 需要提供：
+      async connect(on_change)  订阅状态变化，on_change({会话 id: 状态}) 传入所有会话的最新状态，
+                                可以在任意线程调用
+      async pause(session_id) / async play(session_id)  失败时抛出异常
+      close()                   取消订阅
+    Windows 上是 media_status_fetcher.WinsdkMediaBackend，其他环境可以用 FakeMediaBackend。
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.statuses = {}  # 会话 id -> 状态，每次通知整体替换
+        self.changes = 0  # 收到的状态变化通知次数
+        self._connected = False
+
+    def _on_change(self, statuses):
+        self.statuses = dict(statuses)
+        self.changes += 1
+
+    @property
+    def status(self):
+        """整体状态：有会话在播放时为播放，否则有暂停的会话时为暂停"""
+        values = self.statuses.values()
+        if PLAYING in values:
+            return PLAYING
+        if PAUSED in values:
+            return PAUSED
+        return next(iter(values), NO_SESSION)
+
+    async def connect(self):
+        if not self._connected:
+            await self.backend.connect(self._on_change)
+            self._connected = True
+        return self
+
+    async def pause_all(self, timeout=COMMAND_TIMEOUT):
+        """暂停所有正在播放的会话，返回由这里暂停的会话 id 集合"""
+        await self.connect()
+        playing = [sid for sid, status in self.statuses.items() if status == PLAYING]
+        return await self._command_all(playing, PAUSED, self.backend.pause, timeout)
+
+    async def resume(self, session_ids, timeout=COMMAND_TIMEOUT):
+        """恢复 session_ids 中仍处于暂停状态的会话，返回恢复了的会话 id 集合。
+
+        休息期间被用户手动播放或已经关闭的会话不会被操作。
+        """
+        await self.connect()
+        statuses = self.statuses
+        paused = [sid for sid in session_ids if statuses.get(sid) == PAUSED]
+        return await self._command_all(paused, PLAYING, self.backend.play, timeout)
+
+    async def _command_all(self, session_ids, result, command, timeout):
+        if not session_ids:
+            return set()
+        results = await asyncio.gather(
+            *(asyncio.wait_for(command(sid), timeout) for sid in session_ids),
+            return_exceptions=True,
+        )
+        done = set()
+        errors = {}
+        for sid, outcome in zip(session_ids, results):
+            if isinstance(outcome, BaseException):
+                errors[sid] = outcome
+            else:
+                done.add(sid)
+        if not done:
+            raise MediaCommandError(errors.keys(), errors)
+        if errors:
+            print(f"部分媒体会话的命令失败: {errors}")
+        # 通知稍后才到，先按命令结果更新，紧接着的查询不会读到旧状态
+        self.statuses = {**self.statuses, **{sid: result for sid in done}}
+        return done
+
+    def close(self):
+        if self._connected:
+            self._connected = False
+            self.backend.close()
+
+
+class FakeMediaBackend:
+    """进程内的假媒体会话管理器，用于没有 winsdk 的环境（例如 Linux 上测试和演示）。
+
+    sessions 为 {会话 id: 状态}；set_status() 模拟用户在其他程序中播放或暂停，
+    close_session() 模拟会话关闭。latency 为每条命令的耗时（秒），
+    failing / hanging 中的会话命令失败或一直不返回。
+    """
+
+    def __init__(self, sessions=None, latency=0.0):
+        self.sessions = dict(sessions) if sessions is not None else {"player": PLAYING}
+        self.latency = latency
+        self.failing = set()
+        self.hanging = set()
+        self.commands = []
+        self._on_change = None
+        self._lock = threading.Lock()
+
+    async def connect(self, on_change):
+        self._on_change = on_change
+        self._notify()
+
+    def _notify(self):
+        with self._lock:
+            snapshot = dict(self.sessions)
+            on_change = self._on_change
+        if on_change is not None:
+            on_change(snapshot)
+
+    def set_status(self, session_id, status):
+        with self._lock:
+            self.sessions[session_id] = status
+        self._notify()
+
+    def close_session(self, session_id):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+        self._notify()
+
+    async def _command(self, name, session_id, status):
+        if session_id in self.hanging:
+            await asyncio.Event().wait()  # 永远不返回，等待超时
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if session_id in self.failing or session_id not in self.sessions:
+            raise RuntimeError(f"{session_id}: {name} 命令失败")
+        self.commands.append((name, session_id))
+        self.set_status(session_id, status)
+
+    async def pause(self, session_id):
+        await self._command("pause", session_id, PAUSED)
+
+    async def play(self, session_id):
+        await self._command("play", session_id, PLAYING)
+
+    def close(self):
+        self._on_change = None
+
+
+if __name__ == "__main__":
+    # 演示：在常驻事件循环上使用假的会话管理器，同时暂停/恢复多个会话
+    import time
+
+    import media_service
+
+    LATENCY = 0.05
+    backend = FakeMediaBackend(
+        {
+            "浏览器 #1": PLAYING,
+            "浏览器 #2": PLAYING,
+            "音乐播放器": PLAYING,
+            "视频播放器": PAUSED,
+            "卡住的播放器": PLAYING,
+        },
+        latency=LATENCY,
+    )
+    backend.hanging.add("卡住的播放器")
+
+    async def connect_tracker():
+        return await MediaStateTracker(backend).connect()
+
+    service = media_service.MediaService(connect_tracker)
+    tracker = service.connect().result()
+    print(f"连接后缓存的状态: {tracker.statuses}")
+
+    t0 = time.perf_counter()
+    paused = service.submit(MediaStateTracker.pause_all, 0.5).result()
+    print(
+        f"休息开始，暂停了 {sorted(paused)}，耗时 {(time.perf_counter() - t0) * 1000:.0f} ms"
+        f"（每条命令 {LATENCY * 1000:.0f} ms，超时 500 ms）"
+    )
+
+    backend.set_status("音乐播放器", PLAYING)  # 用户在休息时手动继续播放
+    backend.close_session("浏览器 #2")  # 标签页被关闭
+    resumed = service.submit(MediaStateTracker.resume, paused, 0.5).result()
+    print(f"休息结束，恢复了 {sorted(resumed)}（未暂停的会话不受影响）")
+
+    backend.failing.add("浏览器 #1")
+    service.submit(MediaStateTracker.pause_all, 0.5).result()  # 其他会话仍然暂停成功
+    backend.failing.add("音乐播放器")
+    try:
+        service.submit(MediaStateTracker.pause_all, 0.5).result()
+    except MediaCommandError as e:
+        print(f"全部失败: {sorted(e.session_ids)}")
+    service.shutdown()
+    print(f"共发出命令: {backend.commands}")
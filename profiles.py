@@ -0,0 +1,138 @@
+import os
+import re
+
+import timer_engine
+
+# 默认档案使用程序目录下原有的数据文件，其他档案各占 profiles 目录下的一个子目录
+DEFAULT_PROFILE = "默认"
+# 档案名称会用作目录名：不能以点开头，也不能包含 Windows 文件名中不允许的字符
+PROFILE_NAME_PATTERN = re.compile(r'^(?!\.)[^\\/:*?"<>|]{1,32}$')
+
+
+class Profile:
+    """一个学习档案：自己的学习数据、检查点和计时引擎。
+
+    数据（store / learning_data / records_model / checkpoint）在第一次切换到这个档案时
+    才由 LearningApp.load_data 加载。所有档案的引擎共用同一个 TimerWheel，
+    空闲的档案没有任何定时器；不在界面上的档案关闭显示刷新，计时中只有周期结束和
+    下一次短休息两个定时器。
+    """
+
+    def __init__(self, name, directory, engine):
+        self.name = name
+        self.directory = directory
+        self.engine = engine
+        self.start_time = None  # 当前周期的开始时间（datetime）
+        self.break_start_time = None  # 长休息开始时间
+        self.store = None
+        self.learning_data = None
+        self.records_model = None
+        self.checkpoint = None
+        self.orphaned_session = None  # 上次运行留下的检查点，处理后清空
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    @property
+    def loaded(self):
+        return self.learning_data is not None
+
+    @property
+    def active(self):
+        return self.engine.state != timer_engine.IDLE
+
+
+class ProfileManager:
+    """按名称创建并缓存档案，factory(name, directory) 返回新的 Profile"""
+
+    def __init__(self, profiles_dir, factory):
+        self.profiles_dir = profiles_dir
+        self._factory = factory
+        self._profiles = {}
+
+    def names(self):
+        try:
+            entries = sorted(
+                entry.name for entry in os.scandir(self.profiles_dir) if entry.is_dir()
+            )
+        except FileNotFoundError:
+            entries = []
+        return [DEFAULT_PROFILE] + [name for name in entries if name != DEFAULT_PROFILE]
+
+    def directory(self, name):
+        if name == DEFAULT_PROFILE:
+            return ""
+        return os.path.join(self.profiles_dir, name)
+
+    def get(self, name):
+        profile = self._profiles.get(name)
+        if profile is None:
+            profile = self._profiles[name] = self._factory(name, self.directory(name))
+        return profile
+
+    def create(self, name):
+        """新建档案目录，名称不合法或已存在时抛出 ValueError，目录无法创建时抛出 OSError"""
+        name = name.strip()
+        if not PROFILE_NAME_PATTERN.match(name):
+            raise ValueError('档案名称不能为空，不能以点开头，也不能包含 \\ / : * ? " < > |')
+        if name in self.names():
+            raise ValueError(f"档案“{name}”已存在")
+        os.makedirs(self.directory(name))
+        return self.get(name)
+
+    def running(self):
+        """已经创建、且周期正在进行（计时或暂停）的档案"""
+        return [profile for profile in self._profiles.values() if profile.active]
+
+
+if __name__ == "__main__":
+    # 演示：几十个档案共用一个 TimerWheel，在虚拟时钟上运行 90 分钟，
+    # 只有一个档案显示计时，统计底层 after 的唤醒次数
+    import itertools
+    import random
+
+    import timer_wheel
+
+    pending = {}
+    ids = itertools.count()
+    now = [0.0]
+
+    def fake_after(ms, callback):
+        after_id = next(ids)
+        pending[after_id] = (now[0] + ms / 1000, callback)
+        return after_id
+
+    def fake_cancel(after_id):
+        pending.pop(after_id, None)
+
+    wheel = timer_wheel.TimerWheel(fake_after, fake_cancel, clock=lambda: now[0])
+
+    def factory(name, directory):
+        engine = timer_engine.TimerEngine(
+            wheel.group(f"cycle:{name}"),
+            clock=wheel.clock,
+            rng=random.Random(name),
+            tick_interval=None,
+        )
+        # 后台档案的短休息直接结束，和 LearningApp 中一样
+        engine.subscribe("short_break_due", engine.short_break_finished)
+        return Profile(name, directory, engine)
+
+    manager = ProfileManager("profiles", factory)
+    profiles = [manager.get(f"档案{i}") for i in range(50)]
+    running = 5
+    for profile in profiles[:running]:
+        profile.engine.start(90 * 60)
+    profiles[0].engine.set_tick_interval(timer_engine.TICK_INTERVAL)  # 界面上显示的档案
+    profiles[1].engine.pause(timer_engine.PAUSE_SECONDS)
+
+    while pending:
+        after_id = min(pending, key=lambda k: pending[k][0])
+        due, callback = pending.pop(after_id)
+        now[0] = due
+        callback()
+    print(
+        f"{len(profiles)} 个档案（{running} 个计时），"
+        f"显示刷新 {profiles[0].engine.wakeups} 次，底层 after 唤醒 {wheel.wakeups} 次，"
+        f"后台档案唤醒 {sum(p.engine.wakeups for p in profiles[1:])} 次"
+    )
@@ -0,0 +1,201 @@
+import bisect
+import threading
+from collections.abc import Mapping
+from datetime import date
+
+import aggregation
+import data_store
+
+# 日视图每页显示的天数
+PAGE_DAYS = 30
+
+
+class DailyHistory(Mapping):
+    """把归档中的历史和当前的 daily_log 合成一个只读的 daily_log，归档的日期在访问时才解码"""
+
+    def __init__(self, archive, live_log):
+        self._archive = archive
+        self._live = live_log
+        self._archived_days = archive.day_index() if archive is not None else {}
+
+    def __getitem__(self, date_str):
+        live = self._live.get(date_str)
+        if date_str not in self._archived_days:
+            if live is None:
+                raise KeyError(date_str)
+            return live
+        archived = self._archive.day(date_str)
+        return archived if live is None else archived + live
+
+    def __iter__(self):
+        yield from self._archived_days
+        for date_str in self._live:
+            if date_str not in self._archived_days:
+                yield date_str
+
+    def __len__(self):
+        return len(self._archived_days) + sum(
+            1 for date_str in self._live if date_str not in self._archived_days
+        )
+
+
+class RecordsModel:
+    """学习记录窗口的数据模型。
+
+    所有视图都直接使用内存中的 learning_data 和内存映射的归档（不再重新解析数据文件），
+    每个视图的汇总结果在第一次使用后缓存，数据变化时由 session_added() / invalidate() 更新。
+    存储压缩快照时会把已结束的月份从 daily_log 移入归档（保存设置也可能触发），
+    归档的记录条数变化后所有缓存在下次使用前重建。
+    视图在后台线程中计算，修改 learning_data 的代码需要先持有 lock。
+    """
+
+    def __init__(self, store, get_data):
+        self.store = store
+        self._get_data = get_data  # 返回当前的 learning_data
+        self._cache = {}
+        self._dates = None  # 所有有记录的日期，升序
+        self._prefix = None  # 每日合计的前缀和索引（DayPrefixIndex）
+        self._arrays = None  # 归档 + 当前数据的会话列数组（aggregation.SessionBuffer）
+        self._archive_records = self._archive_size()  # 建立缓存时归档的记录条数
+        self.lock = threading.RLock()
+
+    def _archive_size(self):
+        archive = self.store.archive
+        return len(archive) if archive is not None else 0
+
+    def _check_archive(self):
+        """归档变化后 daily_log 和归档的分界变了，缓存的索引都要重建"""
+        if self._archive_size() != self._archive_records:
+            self.invalidate()
+
+    def invalidate(self):
+        """数据被整体替换（例如清空）后调用，所有索引在下次使用时重建"""
+        with self.lock:
+            self._cache.clear()
+            self._dates = None
+            self._prefix = None
+            self._arrays = None
+            self._archive_records = self._archive_size()
+
+    def session_added(self, date_str, session):
+        """记录新会话后调用：清空视图缓存，日期索引、前缀和索引和会话列数组都是原地追加"""
+        with self.lock:
+            self._check_archive()
+            self._cache.clear()
+            if self._dates is not None:
+                i = bisect.bisect_left(self._dates, date_str)
+                if i == len(self._dates) or self._dates[i] != date_str:
+                    self._dates.insert(i, date_str)
+            try:
+                ordinal = date.fromisoformat(date_str).toordinal()
+            except ValueError:
+                return  # Skip invalid date strings
+            if self._arrays is not None:
+                self._arrays.append(
+                    ordinal,
+                    session["duration_seconds"],
+                    session["cycle_fraction"],
+                    session["completed_cycle"],
+                )
+            if self._prefix is not None:
+                self._prefix.add(ordinal, *data_store.session_totals([session]))
+
+    def _history(self):
+        if "day" not in self._cache:
+            self._cache["day"] = DailyHistory(
+                self.store.archive, self._get_data().get("daily_log", {})
+            )
+        return self._cache["day"]
+
+    def daily_page(self, page, page_days=PAGE_DAYS):
+        """日视图的第 page 页（0 为最新）。
+
+        返回 (包含归档的 daily_log, 本页按日期倒序的日期列表, 是否还有更早的记录)；
+        只有本页的日期会被读取，归档中的其他日期不会解码。
+        """
+        with self.lock:
+            self._check_archive()
+            history = self._history()
+            if self._dates is None:
+                self._dates = sorted(history)
+            end = len(self._dates) - page * page_days
+            start = max(0, end - page_days)
+            return history, self._dates[start:end][::-1], start > 0
+
+    def range_totals(self, start_date, end_date):
+        """[start_date, end_date] 闭区间内的 (总秒数, 总周期数, 会话数)，参数为 date 对象"""
+        with self.lock:
+            self._check_archive()
+            if self._prefix is None:
+                # 快照中已归档月份没有日汇总，从包含归档的会话列数组按天合计
+                self._prefix = aggregation.DayPrefixIndex(*self._session_arrays().daily())
+            return self._prefix.query(start_date.toordinal(), end_date.toordinal())
+
+    def aggregate(self, period):
+        """返回按 "week" / "month" / "year" 汇总后的行"""
+        with self.lock:
+            self._check_archive()
+            if period not in self._cache:
+                self._cache[period] = self.store.aggregate(self._get_data(), period)
+            return self._cache[period]
+
+    def distribution(self):
+        """返回 (周一到周日的平均学习秒数, 会话时长分布)"""
+        with self.lock:
+            self._check_archive()
+            if "distribution" not in self._cache:
+                arrays = self._session_arrays()
+                self._cache["distribution"] = (
+                    aggregation.weekday_averages(arrays),
+                    aggregation.duration_histogram(arrays),
+                )
+            return self._cache["distribution"]
+
+    def _session_arrays(self):
+        # 只在第一次使用时逐条转换，之后由 session_added() 追加
+        if self._arrays is None:
+            arrays = aggregation.load_session_arrays(self._get_data().get("daily_log", {}))
+            if self.store.archive is not None:
+                arrays = aggregation.concat_arrays(self.store.archive.session_arrays(), arrays)
+            self._arrays = aggregation.SessionBuffer(arrays)
+        return self._arrays.arrays()
+
+
+if __name__ == "__main__":
+    # 性能测试：30 万条会话，分布视图第一次生成、记录新会话后再次生成的端到端耗时
+    import random
+    import time
+    from types import SimpleNamespace
+
+    session_count = 300_000
+    rng = random.Random(0)
+    first_day = date(2015, 1, 1).toordinal()
+    daily_log = {}
+    for ordinal in sorted(rng.randrange(first_day, first_day + 3650) for _ in range(session_count)):
+        secs = rng.randrange(60, 5400)
+        daily_log.setdefault(date.fromordinal(ordinal).isoformat(), []).append(
+            {
+                "start_time": None,
+                "end_time": None,
+                "duration_seconds": secs,
+                "completed_cycle": False,
+                "cycle_fraction": secs / 5400,
+            }
+        )
+    data = {"daily_log": daily_log}
+    model = RecordsModel(SimpleNamespace(archive=None), lambda: data)
+
+    t0 = time.perf_counter()
+    model.distribution()
+    t1 = time.perf_counter()
+    date_str = date.fromordinal(first_day + 3650).isoformat()
+    session = dict(daily_log[next(iter(daily_log))][0])
+    daily_log.setdefault(date_str, []).append(session)
+    model.session_added(date_str, session)
+    t2 = time.perf_counter()
+    model.distribution()
+    t3 = time.perf_counter()
+    print(f"{session_count} 条会话")
+    print(f"分布视图第一次生成: {(t1 - t0) * 1000:.1f} ms")
+    print(f"记录新会话（原地追加列数组）: {(t2 - t1) * 1000:.2f} ms")
+    print(f"记录新会话后重新生成分布视图: {(t3 - t2) * 1000:.2f} ms")
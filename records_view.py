@@ -0,0 +1,207 @@
+import time
+import tkinter as tk
+from datetime import date
+
+import aggregation
+
+# 标题行（日期、周、月、年）使用的文本标签
+HEADER_TAG = "header"
+
+
+class RecordsText:
+    """一个视图的完整文本，以及需要加 HEADER_TAG 的行号（从 1 开始，与 Tk 一致）"""
+
+    def __init__(self):
+        self.lines = []
+        self.header_lines = []
+
+    def header(self, line):
+        self.lines.append(line)
+        self.header_lines.append(len(self.lines))
+
+    def add(self, line=""):
+        self.lines.append(line)
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+
+def render(textbox, records, append=False):
+    """一次插入整个视图的文本，再用一次调用给所有标题行加标签。
+
+    append=True 时接在已有内容后面（日视图加载更早的一页）。
+    """
+    # CTkTextbox 的 insert/tag_add 只接受一段文本/一个区间，这里直接使用内部的 tk.Text
+    text_widget = getattr(textbox, "_textbox", textbox)
+    text_widget.configure(state="normal")
+    if append:
+        # 新文本从当前最后一行开始
+        line_offset = int(text_widget.index("end-1c").split(".")[0]) - 1
+    else:
+        line_offset = 0
+        text_widget.delete("1.0", tk.END)
+    text_widget.insert("end-1c", records.text)
+    if records.header_lines:
+        ranges = []
+        for line in records.header_lines:
+            line += line_offset
+            ranges += (f"{line}.0", f"{line}.end")
+        text_widget.tag_add(HEADER_TAG, *ranges)
+    text_widget.configure(state="disabled")
+
+
+def message(text):
+    records = RecordsText()
+    records.add(text)
+    return records
+
+
+def format_daily(daily_log, sorted_dates):
+    records = RecordsText()
+    for date_str in sorted_dates:
+        records.header(f"{date_str}:")
+        for session in daily_log[date_str]:
+            duration_min = session["duration_seconds"] / 60
+            if session["start_time"] is None:
+                # 由旧格式当天汇总迁移而来，没有起止时间
+                records.add(
+                    f"  - 总时长: {duration_min:.1f} 分钟, 总周期: {session['cycle_fraction']:.2f}"
+                )
+                continue
+            status = (
+                "完成"
+                if session["completed_cycle"]
+                else f"中断 ({session['cycle_fraction']:.2f}周期)"
+            )
+            records.add(
+                f"  - {session['start_time']} -> {session['end_time']} ({duration_min:.1f}分钟) - {status}"
+            )
+        records.add()  # Add space between days
+    return records
+
+
+def format_periods(rows, title, empty_text):
+    """周/月/年视图：title(row) 返回每个区间的标题行"""
+    if not rows:
+        return message(empty_text)
+    records = RecordsText()
+    for row in rows:
+        total_min = row["total_seconds"] / 60
+        records.header(title(row))
+        records.add(f"  - 总时长: {total_min:.1f} 分钟, 总周期: {row['total_cycles']:.2f}")
+        records.add()
+    return records
+
+
+def format_weekly(rows):
+    return format_periods(
+        rows,
+        lambda row: f"{row['key']} ({row['start_date']} 至 {row['end_date']}):",
+        "暂无周记录数据。",
+    )
+
+
+def format_monthly(rows):
+    return format_periods(rows, lambda row: f"{row['key']}:", "暂无月记录数据。")
+
+
+def format_yearly(rows):
+    return format_periods(rows, lambda row: f"{row['key']}年:", "暂无年记录数据。")
+
+
+def format_range(start_date, end_date, totals):
+    """自定义日期区间视图，totals 为 (总秒数, 总周期数, 会话数)"""
+    total_seconds, total_cycles, sessions = totals
+    days = (end_date - start_date).days + 1
+    records = RecordsText()
+    records.header(f"{start_date.isoformat()} 至 {end_date.isoformat()} ({days}天):")
+    if sessions == 0:
+        records.add("  - 该时间段内暂无学习记录。")
+        return records
+    records.add(f"  - 总时长: {total_seconds / 60:.1f} 分钟 ({total_seconds / 3600:.2f} 小时)")
+    records.add(f"  - 总周期: {total_cycles:.2f}")
+    records.add(f"  - 学习次数: {sessions}")
+    records.add(f"  - 日均时长: {total_seconds / 60 / days:.1f} 分钟")
+    return records
+
+
+def format_distribution(weekday_averages, histogram):
+    if not histogram.any():
+        return message("暂无学习记录。")
+    records = RecordsText()
+    records.header("每个学习日的平均时长:")
+    for name, avg_sec in zip(aggregation.WEEKDAY_NAMES, weekday_averages):
+        records.add(f"  - {name}: {avg_sec / 60:.1f} 分钟")
+
+    records.add()
+    records.header("单次学习时长分布:")
+    bin_minutes = aggregation.HISTOGRAM_BIN_MINUTES
+    longest = max(histogram.max(), 1)
+    for i, count in enumerate(histogram):
+        if i == len(histogram) - 1:
+            label = f"{i * bin_minutes}分钟以上"
+        else:
+            label = f"{i * bin_minutes}-{(i + 1) * bin_minutes}分钟"
+        bar = "█" * int(round(20 * count / longest))
+        records.add(f"  - {label}: {bar} {count}")
+    return records
+
+
+def _sample_daily_log(session_count, sessions_per_day=4):
+    first_day = date(2000, 1, 1).toordinal()
+    daily_log = {}
+    for i in range(session_count):
+        day = date.fromordinal(first_day + i // sessions_per_day).isoformat()
+        daily_log.setdefault(day, []).append(
+            {
+                "start_time": "09:00:00",
+                "end_time": "10:30:00",
+                "duration_seconds": 5400,
+                "completed_cycle": i % 3 == 0,
+                "cycle_fraction": 1.0 if i % 3 == 0 else 0.5,
+            }
+        )
+    return daily_log
+
+
+if __name__ == "__main__":
+    # 渲染耗时与会话数量的关系：逐行 insert（旧方式）对比整体一次 insert
+    try:
+        root = tk.Tk()
+        root.withdraw()
+    except tk.TclError as e:
+        root = None
+        print(f"无法创建 Tk 窗口（{e}），只测量文本生成耗时")
+
+    print(f"{'会话数':>8} {'生成文本':>10} {'逐行插入':>10} {'一次插入':>10}")
+    for session_count in (1_000, 5_000, 20_000, 50_000):
+        daily_log = _sample_daily_log(session_count)
+        sorted_dates = sorted(daily_log, reverse=True)
+
+        t0 = time.perf_counter()
+        records = format_daily(daily_log, sorted_dates)
+        format_ms = (time.perf_counter() - t0) * 1000
+
+        per_line_ms = batched_ms = float("nan")
+        if root is not None:
+            text_widget = tk.Text(root)
+            text_widget.tag_configure(HEADER_TAG, foreground="#1f6aa5")
+            header_lines = set(records.header_lines)
+            t0 = time.perf_counter()
+            for line_no, line in enumerate(records.lines, start=1):
+                tag = HEADER_TAG if line_no in header_lines else ()
+                text_widget.insert(tk.END, line + "\n", tag)
+            text_widget.update_idletasks()
+            per_line_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            render(text_widget, records)
+            text_widget.update_idletasks()
+            batched_ms = (time.perf_counter() - t0) * 1000
+            text_widget.destroy()
+
+        print(f"{session_count:>8} {format_ms:>8.1f}ms {per_line_ms:>8.1f}ms {batched_ms:>8.1f}ms")
+
+    if root is not None:
+        root.destroy()
@@ -0,0 +1,78 @@
+# learning_data 的格式版本与迁移。
+#
+# 每个迁移函数把数据从第 i 版升级到第 i + 1 版，load 时按顺序执行一次，
+# 之后所有统计和显示代码都只需要处理当前版本的格式。
+# 当前版本中 daily_log 的每一天都是会话列表，每个会话包含：
+#   start_time / end_time  "HH:MM:SS"，旧格式的当天汇总为 None
+#   duration_seconds       int
+#   completed_cycle        bool
+#   cycle_fraction         float
+
+from datetime import datetime, time
+
+
+def _normalize_time(value):
+    """把时间统一成 "HH:MM:SS"：旧数据中可能是完整的 ISO 日期时间，无法识别的视为没有时间"""
+    if not isinstance(value, str):
+        return None
+    for parse in (time.fromisoformat, datetime.fromisoformat):
+        try:
+            return parse(value).strftime("%H:%M:%S")
+        except ValueError:
+            continue
+    return None
+
+
+def _normalize_session(session):
+    completed = bool(session.get("completed_cycle", session.get("completed", False)))
+    return {
+        "start_time": _normalize_time(session.get("start_time")),
+        "end_time": _normalize_time(session.get("end_time")),
+        "duration_seconds": int(session.get("duration_seconds", 0)),
+        "completed_cycle": completed,
+        "cycle_fraction": float(
+            session.get("cycle_fraction", 1.0 if completed else 0.0)
+        ),
+    }
+
+
+def _migrate_v0_to_v1(data):
+    """旧格式的当天汇总 {"seconds", "cycles"} 转换成一条会话，统一使用 completed_cycle 键，
+    起止时间统一成 "HH:MM:SS"（旧数据中可能是完整的 ISO 日期时间）"""
+    daily_log = {}
+    for date_str, sessions_data in data.get("daily_log", {}).items():
+        if isinstance(sessions_data, list):
+            daily_log[date_str] = [
+                _normalize_session(session)
+                for session in sessions_data
+                if isinstance(session, dict)
+            ]
+        elif isinstance(sessions_data, dict):
+            daily_log[date_str] = [
+                {
+                    "start_time": None,
+                    "end_time": None,
+                    "duration_seconds": int(sessions_data.get("seconds", 0)),
+                    "completed_cycle": False,
+                    "cycle_fraction": float(sessions_data.get("cycles", 0.0)),
+                }
+            ]
+        # 其他无法识别的格式直接丢弃
+    data["daily_log"] = daily_log
+
+
+MIGRATIONS = [
+    _migrate_v0_to_v1,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(data):
+    """把数据升级到 SCHEMA_VERSION，返回是否做了修改"""
+    version = data.get("schema_version", 0)
+    if version >= SCHEMA_VERSION:
+        return False
+    for step in MIGRATIONS[version:]:
+        step(data)
+    data["schema_version"] = SCHEMA_VERSION
+    return True
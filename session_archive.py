@@ -0,0 +1,170 @@
+import os
+from datetime import date
+
+import numpy as np
+
+from aggregation import SessionArrays
+
+# 文件头：魔数 + 版本号，后面紧跟定长记录
+ARCHIVE_MAGIC = b"T90A"
+ARCHIVE_VERSION = 1
+HEADER_SIZE = 16
+
+# 每条会话一条定长记录；start/end 为当天零点起的秒数，未知时为 -1
+RECORD_DTYPE = np.dtype(
+    [
+        ("day", "<i4"),  # date.toordinal()
+        ("start", "<i4"),
+        ("end", "<i4"),
+        ("duration", "<i4"),
+        ("fraction", "<f8"),
+        ("flags", "u1"),
+    ]
+)
+FLAG_COMPLETED = 1
+
+
+def _time_to_seconds(time_str):
+    try:
+        hours, minutes, seconds = (int(part) for part in time_str.split(":"))
+        return hours * 3600 + minutes * 60 + seconds
+    except (AttributeError, ValueError):
+        return -1
+
+
+def _seconds_to_time(seconds):
+    if seconds < 0:
+        return None
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def daily_log_to_records(daily_log):
+    """把 daily_log 按日期升序转换成定长记录数组"""
+    rows = []
+    for date_str in sorted(daily_log):
+        try:
+            ordinal = date.fromisoformat(date_str).toordinal()
+        except ValueError:
+            continue  # Skip invalid date strings
+        for session in daily_log[date_str]:
+            rows.append(
+                (
+                    ordinal,
+                    _time_to_seconds(session["start_time"]),
+                    _time_to_seconds(session["end_time"]),
+                    session["duration_seconds"],
+                    session["cycle_fraction"],
+                    FLAG_COMPLETED if session["completed_cycle"] else 0,
+                )
+            )
+    return np.array(rows, dtype=RECORD_DTYPE)
+
+
+def records_to_day(records):
+    """把同一天的记录还原成 daily_log 中一天的会话列表"""
+    return [
+        {
+            "start_time": _seconds_to_time(record["start"]),
+            "end_time": _seconds_to_time(record["end"]),
+            "duration_seconds": int(record["duration"]),
+            "completed_cycle": bool(record["flags"] & FLAG_COMPLETED),
+            "cycle_fraction": float(record["fraction"]),
+        }
+        for record in records
+    ]
+
+
+class SessionArchive:
+    """已结束月份的会话归档：定长记录的列式二进制文件，读取时直接内存映射。
+
+    有效记录条数由调用方（快照中的 archive_records）给出，文件中多出来的
+    记录（追加后、写快照前崩溃留下的）会被忽略，并在下次追加前截掉。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        self._day_index = None
+
+    def open(self, count):
+        """映射前 count 条记录"""
+        self._day_index = None
+        available = 0
+        if os.path.exists(self.path):
+            available = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        count = max(0, min(count, available))
+        if count == 0:
+            self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        else:
+            self._records = np.memmap(
+                self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)
+            )
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def records(self):
+        return self._records
+
+    def append(self, records):
+        """在现有 len(self) 条记录之后追加，返回新的记录条数"""
+        count = len(self._records)
+        self._records = np.zeros(0, dtype=RECORD_DTYPE)  # 释放映射后再写文件
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                header = ARCHIVE_MAGIC + ARCHIVE_VERSION.to_bytes(4, "little")
+                f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + count * RECORD_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.open(count + len(records))
+        return len(self._records)
+
+    def clear(self):
+        self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        self._day_index = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def day_index(self):
+        """日期字符串 -> 该日期的记录下标（按日期升序）。
+
+        每次归档的记录都按日期排好序，但系统时间被调整过时不同批次之间可能有重复日期，
+        所以这里按稳定排序后的顺序建立索引。
+        """
+        if self._day_index is None:
+            self._day_index = {}
+            days = self._records["day"]
+            if len(days) == 0:
+                return self._day_index
+            order = np.argsort(days, kind="stable")
+            sorted_days = days[order]
+            starts = np.flatnonzero(np.r_[True, sorted_days[1:] != sorted_days[:-1]])
+            ends = np.r_[starts[1:], len(sorted_days)]
+            for start, end in zip(starts, ends):
+                date_str = date.fromordinal(int(sorted_days[start])).isoformat()
+                self._day_index[date_str] = order[start:end]
+        return self._day_index
+
+    def day(self, date_str):
+        return records_to_day(self._records[self.day_index()[date_str]])
+
+    def to_daily_log(self):
+        return {date_str: self.day(date_str) for date_str in self.day_index()}
+
+    def session_arrays(self):
+        """直接在映射的记录上构造聚合用的列数组"""
+        records = self._records
+        days = records["day"]
+        if len(days) > 1 and np.any(days[1:] < days[:-1]):
+            records = records[np.argsort(days, kind="stable")]
+        return SessionArrays(
+            records["day"].astype(np.int64),
+            records["duration"].astype(np.int64),
+            records["fraction"].astype(np.float64),
+            (records["flags"] & FLAG_COMPLETED).astype(bool),
+        )
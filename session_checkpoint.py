@@ -0,0 +1,46 @@
+import json
+import os
+import threading
+
+from data_store import atomic_write_json
+
+
+class SessionCheckpoint:
+    """进行中周期的检查点：一个很小的 JSON 文件，程序异常退出后用来恢复或补记这次学习。
+
+    save() 可以在后台线程中调用。每次 clear() 都会开始新的一代，
+    之前提交、但还没写入的旧检查点会被丢弃，不会在清除之后重新出现。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._epoch = 0
+
+    @property
+    def epoch(self):
+        return self._epoch
+
+    def save(self, state, epoch):
+        """写入检查点；epoch 为提交时的 self.epoch，已经过时就什么也不做"""
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            atomic_write_json(self.path, state)
+
+    def load(self):
+        """读取上次留下的检查点，没有或无法解析时返回 None"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return state if isinstance(state, dict) else None
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
@@ -1,4 +1,5 @@
 import os
+import threading
 import pygame # Import pygame
 import time # Import time for waiting in test
 
@@ -12,18 +13,103 @@ except pygame.error as init_error:
     pygame = None # Disable pygame if init fails
 
 SOUND_FILE_NAME = "twinkling_sound.mp3" # Updated sound file name 
+# 激活蓝牙耳机时在提示音前播放的静音时长（秒）
+BLUETOOTH_WAKEUP_SECONDS = 0.5
+# 各种提示音对应的文件（相对于本文件所在目录），没有单独配置的类型使用 'default'
+SOUND_FILES = {
+    'default': SOUND_FILE_NAME,
+}
+
+
+class SoundCache:
+    """解码后的 pygame Sound 缓存，按 sound_type 保存。
+
+    每个文件只在 preload() 或第一次播放时解码一次，之后直接复用同一个 Sound。
+    每次取用时检查一次文件的修改时间和大小（一次 stat），文件被替换后自动重新解码。
+    """
+
+    def __init__(self, files=SOUND_FILES, base_dir=None):
+        self.files = files
+        self.base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+        self._entries = {}  # 文件路径 -> (修改时间, 大小, Sound)
+        self._lock = threading.Lock()  # preload 可能在后台线程执行
+        self.decodes = 0
+
+    def path(self, sound_type):
+        file_name = self.files.get(sound_type, self.files['default'])
+        return os.path.abspath(os.path.join(self.base_dir, file_name))
+
+    def get(self, sound_type='default'):
+        """返回解码好的 Sound；文件不存在或 mixer 不可用时返回 None"""
+        if not (pygame and pygame.mixer.get_init()):
+            return None
+        path = self.path(sound_type)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                return entry[2]
+            sound = pygame.mixer.Sound(path)  # 解码整个文件
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, sound)
+            self.decodes += 1
+            return sound
+
+    def preload(self, sound_types=None):
+        """提前解码（默认全部提示音）并生成唤醒蓝牙耳机用的静音，避免第一次播放时的延迟"""
+        for sound_type in sound_types or self.files:
+            try:
+                self.get(sound_type)
+            except pygame.error as e:
+                print(f"[SoundManager] Error decoding {sound_type} sound: {e}")
+        if pygame and pygame.mixer.get_init():
+            silence_sound(BLUETOOTH_WAKEUP_SECONDS)
+
+
+sound_cache = SoundCache()
+
+
+def preload(sound_types=None):
+    sound_cache.preload(sound_types)
+
+# 按时长缓存的静音 Sound，每种时长只生成一次
+_silence_sounds = {}
+
+
+def silence_sound(duration):
+    """返回 duration 秒的静音 Sound（按 mixer 实际的采样率和声道数生成，之后复用）"""
+    sound = _silence_sounds.get(duration)
+    if sound is None:
+        import numpy as np
+        frequency, _, channels = pygame.mixer.get_init()
+        num_samples = int(frequency * duration)
+        # 单声道为一维数组，立体声为 (num_samples, 2) 的二维数组
+        shape = num_samples if channels == 1 else (num_samples, channels)
+        arr = np.zeros(shape, dtype=np.int16)
+        sound = _silence_sounds[duration] = pygame.sndarray.make_sound(arr)
+    return sound
+
+
+def play_after_silence(sound, silence_duration):
+    """在同一个 mixer 通道上先播放静音、紧接着播放 sound，不等待。
+
+    静音用来唤醒蓝牙耳机；Channel.queue 让 sound 在静音结束时由 mixer 接着播放，
+    调用线程（Tk 主线程）不需要 sleep。
+    """
+    channel = pygame.mixer.find_channel(True)  # 没有空闲通道时占用最早开始的那个
+    channel.play(silence_sound(silence_duration))
+    if sound is not None:
+        channel.queue(sound)
+    return channel
+
 
 def play_silence(duration=2.0):
-    """播放指定秒数的静音音频，用于激活蓝牙耳机连接。"""
+    """播放指定秒数的静音音频，用于激活蓝牙耳机连接（立即返回，不等待播放完成）。"""
     if pygame and pygame.mixer.get_init():
-        # 生成2秒静音音频（44100Hz, 16bit, 立体声）
-        import numpy as np
-        num_samples = int(44100 * duration)
-        # 创建一个 (num_samples, 2) 的二维数组，用于立体声
-        arr = np.zeros((num_samples, 2), dtype=np.int16)
-        sound = pygame.sndarray.make_sound(arr)
-        sound.play()
-        time.sleep(duration)  # 等待静音播放完成
+        return play_after_silence(None, duration)
+    return None
 
 def play_notification_sound(sound_type='default', activate_bluetooth=False):
     """Plays the notification sound, falling back to system sound if necessary.
@@ -33,28 +119,24 @@ def play_notification_sound(sound_type='default', activate_bluetooth=False):
         activate_bluetooth: Whether to play silence first to activate bluetooth headphones
     """
     try:
-        # 只有在需要激活蓝牙耳机时才播放静音
-        if activate_bluetooth:
-            play_silence(0.5)
-            
-        # Construct absolute path relative to this script's location
-        script_dir = os.path.dirname(__file__)
-        sound_file_path = os.path.abspath(os.path.join(script_dir, SOUND_FILE_NAME))
-
-        if os.path.exists(sound_file_path):
-            # Play using pygame.mixer (it plays asynchronously by default)
-            if pygame and pygame.mixer.get_init(): # Check if pygame and mixer initialized successfully
-                try:
-                    sound = pygame.mixer.Sound(sound_file_path)
+        # Play using pygame.mixer (it plays asynchronously by default)
+        if pygame and pygame.mixer.get_init(): # Check if pygame and mixer initialized successfully
+            try:
+                # 使用缓存中解码好的 Sound，文件变化时才重新解码
+                sound = sound_cache.get(sound_type)
+                if sound is not None and activate_bluetooth:
+                    # 只有在需要激活蓝牙耳机时才先播放静音，提示音在同一通道上排队
+                    play_after_silence(sound, BLUETOOTH_WAKEUP_SECONDS)
+                elif sound is not None:
                     sound.play()
                     # No need to wait here, play() is non-blocking
-                except pygame.error as play_error:
-                    print(f"[{sound_type}] Error playing sound with pygame: {play_error}")
-            else:
-                print(f"[{sound_type}] Pygame mixer not initialized, cannot play sound.")
+                else:
+                    # Fallback: Pygame also doesn't play system sounds directly.
+                    print(f"[{sound_type}] Sound file not found at {sound_cache.path(sound_type)}. Cannot play sound.")
+            except pygame.error as play_error:
+                print(f"[{sound_type}] Error playing sound with pygame: {play_error}")
         else:
-            # Fallback: Pygame also doesn't play system sounds directly.
-            print(f"[{sound_type}] Sound file not found at {sound_file_path}. Cannot play sound.")
+            print(f"[{sound_type}] Pygame mixer not initialized, cannot play sound.")
     except Exception as e:
         # Error handling is now within the pygame play block.
         print(f"[{sound_type}] Error occurred trying to play sound: {e}") # Keep one error message
@@ -69,7 +151,17 @@ if __name__ == '__main__':
     # Simple test when running this file directly
     if pygame and pygame.mixer.get_init():
         print("Testing notification sound with pygame.mixer...")
+        t0 = time.perf_counter()
+        sound_cache.get('test')
+        t1 = time.perf_counter()
+        sound_cache.get('test')
+        t2 = time.perf_counter()
+        print(f"首次解码 {(t1 - t0) * 1000:.1f} ms，之后取用 {(t2 - t1) * 1000:.3f} ms")
         play_notification_sound('test')
+        time.sleep(3)
+        t0 = time.perf_counter()
+        play_notification_sound('test', activate_bluetooth=True)
+        print(f"先静音再提示音: 调用耗时 {(time.perf_counter() - t0) * 1000:.2f} ms（不等待静音播放）")
         # Wait a bit for the sound to play in the background during test
         print("Waiting for sound to finish (approx 5s)...")
         time.sleep(5)
@@ -0,0 +1,80 @@
+import random
+import unittest
+from datetime import date
+
+import numpy as np
+
+import aggregation
+
+
+class DayPrefixIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.totals = {}  # 日期序号 -> [秒数, 周期数, 会话数]，用来逐项对照
+
+    def add(self, index, ordinal, seconds, cycles):
+        index.add(ordinal, seconds, cycles, 1)
+        row = self.totals.setdefault(ordinal, [0, 0.0, 0])
+        row[0] += seconds
+        row[1] += cycles
+        row[2] += 1
+
+    def expected(self, start, end):
+        rows = [row for ordinal, row in self.totals.items() if start <= ordinal <= end]
+        return (
+            sum(row[0] for row in rows),
+            sum(row[1] for row in rows),
+            sum(row[2] for row in rows),
+        )
+
+    def assert_matches(self, index, start, end):
+        seconds, cycles, sessions = index.query(start, end)
+        exp_seconds, exp_cycles, exp_sessions = self.expected(start, end)
+        self.assertEqual((seconds, sessions), (exp_seconds, exp_sessions), (start, end))
+        self.assertAlmostEqual(cycles, exp_cycles)
+
+    def test_out_of_order_date_is_inserted_in_place(self):
+        index = aggregation.DayPrefixIndex(*(np.zeros(0, dtype=np.int64) for _ in range(4)))
+        for ordinal in (100, 101, 105):
+            self.add(index, ordinal, 600, 0.5)
+        self.add(index, 103, 60, 0.1)  # 系统时间被调回过
+        self.add(index, 90, 30, 0.05)  # 比所有日期都早
+        self.assertEqual(len(index), 5)
+        for start, end in [(0, 200), (103, 103), (102, 104), (91, 101), (90, 90), (106, 200)]:
+            self.assert_matches(index, start, end)
+
+    def test_existing_date_updates_later_prefixes(self):
+        index = aggregation.DayPrefixIndex(*(np.zeros(0, dtype=np.int64) for _ in range(4)))
+        for ordinal in (10, 20, 30):
+            self.add(index, ordinal, 100, 1.0)
+        self.add(index, 20, 50, 0.5)
+        self.assertEqual(len(index), 3)
+        self.assert_matches(index, 20, 20)
+        self.assert_matches(index, 15, 40)
+
+    def test_random_adds_beyond_capacity(self):
+        rng = random.Random(3)
+        days = np.array([1000, 1001], dtype=np.int64)
+        index = aggregation.DayPrefixIndex(
+            days, np.array([10, 20]), np.array([0.1, 0.2]), np.array([1, 1])
+        )
+        self.totals = {1000: [10, 0.1, 1], 1001: [20, 0.2, 1]}
+        for _ in range(300):
+            self.add(index, rng.randint(900, 1200), rng.randint(1, 3600), rng.random())
+        self.assertEqual(len(index), len(self.totals))
+        self.assertGreater(len(index), 16)  # 超过初始容量，至少扩容过一次
+        for _ in range(50):
+            start = rng.randint(850, 1250)
+            self.assert_matches(index, start, start + rng.randint(0, 200))
+
+    def test_from_day_buckets_skips_invalid_dates(self):
+        bucket = {"total_seconds": 60, "total_cycles": 0.1, "sessions": 1}
+        index = aggregation.DayPrefixIndex.from_day_buckets(
+            {"2025-01-02": bucket, "bad": bucket, "2025-01-01": bucket}
+        )
+        self.assertEqual(len(index), 2)
+        first = date(2025, 1, 1).toordinal()
+        self.assertEqual(index.query(first, first + 1), (120, 0.2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
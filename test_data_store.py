@@ -0,0 +1,239 @@
+import itertools
+import os
+import tempfile
+import threading
+import unittest
+
+import data_store
+
+DEFAULTS = {"total_seconds": 0, "total_cycles": 0}
+
+
+def session_record(start="08:00:00", end="09:00:00", duration=3600, fraction=1.0):
+    return {
+        "start_time": start,
+        "end_time": end,
+        "duration_seconds": duration,
+        "completed_cycle": fraction >= 1.0,
+        "cycle_fraction": fraction,
+    }
+
+
+class RollupTest(unittest.TestCase):
+    def setUp(self):
+        self.data = data_store.new_data(DEFAULTS)
+        # 2024-12-30 属于 ISO 周 2025-W01，跨年的周要归到同一个桶
+        for date_str, fraction in [
+            ("2024-12-30", 1.0),
+            ("2025-01-02", 0.5),
+            ("2025-01-02", 0.25),
+            ("2025-02-10", 1.0),
+        ]:
+            data_store.apply_session(
+                self.data, date_str, session_record(duration=int(3600 * fraction), fraction=fraction)
+            )
+
+    def test_apply_session_updates_every_period(self):
+        rollups = self.data["rollups"]
+        self.assertEqual(sorted(rollups["day"]), ["2024-12-30", "2025-01-02", "2025-02-10"])
+        self.assertEqual(sorted(rollups["week"]), ["2025-W01", "2025-W07"])
+        self.assertEqual(sorted(rollups["month"]), ["2024-12", "2025-01", "2025-02"])
+        self.assertEqual(sorted(rollups["year"]), ["2024", "2025"])
+
+        week = rollups["week"]["2025-W01"]
+        self.assertEqual(week["total_seconds"], 3600 + 1800 + 900)
+        self.assertAlmostEqual(week["total_cycles"], 1.75)
+        self.assertEqual(week["sessions"], 3)
+        self.assertEqual((week["start_date"], week["end_date"]), ("2024-12-30", "2025-01-02"))
+        self.assertEqual(rollups["day"]["2025-01-02"]["sessions"], 2)
+
+    def test_incremental_rollups_match_rebuild(self):
+        incremental = self.data["rollups"]
+        data_store.rebuild_rollups(self.data)
+        for period in data_store.ROLLUP_PERIODS:
+            rebuilt = self.data["rollups"][period]
+            self.assertEqual(sorted(rebuilt), sorted(incremental[period]))
+            for key, bucket in incremental[period].items():
+                self.assertEqual(rebuilt[key]["total_seconds"], bucket["total_seconds"])
+                self.assertAlmostEqual(rebuilt[key]["total_cycles"], bucket["total_cycles"])
+                self.assertEqual(rebuilt[key]["sessions"], bucket["sessions"])
+                self.assertEqual(rebuilt[key]["start_date"], bucket["start_date"])
+                self.assertEqual(rebuilt[key]["end_date"], bucket["end_date"])
+
+    def test_rollup_rows_newest_first(self):
+        rows = data_store.rollup_rows(self.data, "month")
+        self.assertEqual([row["key"] for row in rows], ["2025-02", "2025-01", "2024-12"])
+        self.assertEqual(rows[1]["sessions"], 2)
+
+
+class JournalStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmp.name, name) for name in ("data.json", "journal", "archive")]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_store(self, **kwargs):
+        store = data_store.JournalStore(*self.paths, **kwargs)
+        return store, store.load(DEFAULTS)
+
+    def journal_lines(self):
+        if not os.path.exists(self.paths[1]):
+            return []
+        with open(self.paths[1], "rb") as f:
+            return f.read().splitlines()
+
+    def test_replay_after_restart(self):
+        store, data = self.open_store()
+        store.append_session(data, "2099-01-06", session_record(duration=1800, fraction=0.5))
+        data["cycle_duration"] = 45
+        store.save_settings(data, ["cycle_duration"])
+        self.assertFalse(os.path.exists(self.paths[0]))  # 还没有压缩，只写了日志
+
+        _, reloaded = self.open_store()
+        self.assertEqual(reloaded["daily_log"], data["daily_log"])
+        self.assertEqual(reloaded["cycle_duration"], 45)
+        self.assertEqual(reloaded["rollups"]["day"]["2099-01-06"]["sessions"], 1)
+
+    def test_compaction_at_threshold(self):
+        store, data = self.open_store(compact_threshold=3)
+        for _ in range(2):
+            store.append_session(data, "2099-01-06", session_record())
+        self.assertEqual(len(self.journal_lines()), 2)
+        store.append_session(data, "2099-01-06", session_record())
+        self.assertEqual(self.journal_lines(), [])
+        store.append_session(data, "2099-01-07", session_record())
+        self.assertEqual(len(self.journal_lines()), 1)
+
+        _, reloaded = self.open_store(compact_threshold=3)
+        self.assertEqual(len(reloaded["daily_log"]["2099-01-06"]), 3)
+        self.assertEqual(len(reloaded["daily_log"]["2099-01-07"]), 1)
+        self.assertEqual(reloaded["total_cycles"], 4)
+
+    def test_torn_tail_then_append(self):
+        store, data = self.open_store()
+        store.append_session(data, "2099-01-06", session_record())
+        with open(self.paths[1], "ab") as f:
+            f.write(b'{"op":"session","date":"2099-01-06","ses')  # 崩溃时写了一半
+
+        store, data = self.open_store()
+        self.assertEqual(self.journal_lines(), [])  # 加载时立即压缩，去掉坏行
+        store.append_session(data, "2099-01-07", session_record(duration=600, fraction=0.2))
+
+        _, reloaded = self.open_store()
+        self.assertEqual(sorted(reloaded["daily_log"]), ["2099-01-06", "2099-01-07"])
+
+    def test_append_after_unterminated_line_starts_new_line(self):
+        store, data = self.open_store()
+        with open(self.paths[1], "ab") as f:
+            f.write(b'{"op":"session","da')
+        store.append_session(data, "2099-01-06", session_record())
+        self.assertEqual(len(self.journal_lines()), 2)
+
+        _, reloaded = self.open_store()
+        self.assertEqual(len(reloaded["daily_log"]["2099-01-06"]), 1)
+
+
+class WriteBehindTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.timers = {}
+        self.ids = itertools.count()
+        self.flushes = []
+        self.writer = data_store.WriteBehind(
+            lambda: self.flushes.append(self.now), self.schedule, self.timers.pop, delay_ms=1000
+        )
+
+    def schedule(self, delay_ms, callback):
+        timer_id = next(self.ids)
+        self.timers[timer_id] = (self.now + delay_ms, callback)
+        return timer_id
+
+    def advance(self, ms):
+        end = self.now + ms
+        for timer_id, (due, callback) in sorted(self.timers.items(), key=lambda item: item[1][0]):
+            if due <= end and timer_id in self.timers:
+                del self.timers[timer_id]
+                self.now = due
+                callback()
+        self.now = end
+
+    def test_repeated_changes_flush_once_after_quiet_period(self):
+        for _ in range(5):
+            self.writer.mark_dirty()
+            self.advance(500)  # 拖动滑块：每次修改都推迟写入
+        self.assertEqual(self.flushes, [])
+        self.assertEqual(len(self.timers), 1)
+        self.advance(500)
+        self.assertEqual(self.flushes, [3000])
+        self.assertFalse(self.writer.dirty)
+        self.assertEqual(self.timers, {})
+
+    def test_flush_writes_now_and_cancels_timer(self):
+        self.writer.mark_dirty()
+        self.writer.flush()  # 关闭窗口
+        self.assertEqual(self.flushes, [0])
+        self.assertEqual(self.timers, {})
+        self.advance(2000)
+        self.assertEqual(self.flushes, [0])
+
+    def test_flush_without_changes_does_nothing(self):
+        self.writer.flush()
+        self.writer.mark_dirty()
+        self.advance(1000)
+        self.writer.flush()
+        self.assertEqual(self.flushes, [1000])
+
+
+class SqliteStoreThreadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = data_store.SqliteStore(os.path.join(self.tmp.name, "data.db"))
+        self.data = self.store.load(DEFAULTS)
+        self.store.append_session(self.data, "2025-01-06", session_record())
+
+    def tearDown(self):
+        self.store._conn.close()
+        self.tmp.cleanup()
+
+    def test_aggregate_from_worker_thread(self):
+        # 统计视图在 TaskRunner 的后台线程中读取数据库
+        results = {}
+
+        def worker():
+            try:
+                results["week"] = self.store.aggregate(self.data, "week")
+            except Exception as e:
+                results["error"] = e
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertNotIn("error", results)
+        self.assertEqual(results["week"][0]["total_seconds"], 3600)
+
+    def test_concurrent_reads_and_writes(self):
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(50):
+                    self.store.aggregate(self.data, "day")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for _ in range(50):
+            self.store.append_session(self.data, "2025-01-07", session_record(duration=60, fraction=0.1))
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        day = {row["key"]: row for row in self.store.aggregate(self.data, "day")}
+        self.assertEqual(day["2025-01-07"]["sessions"], 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+
+import media_service
+import media_stats
+from media_tracker import PLAYING, FakeMediaBackend, MediaStateTracker
+
+
+class MediaServiceDeadlineTest(unittest.TestCase):
+    def make_service(self, backend, connect_delay, **kwargs):
+        async def connect_tracker():
+            await asyncio.sleep(connect_delay)
+            return await MediaStateTracker(backend).connect()
+
+        service = media_service.MediaService(connect_tracker, **kwargs)
+        self.addCleanup(service.shutdown)
+        return service
+
+    def test_partial_result_survives_slow_connect(self):
+        # 获取管理器和会话命令的超时加起来仍在截止时间以内，卡住的会话按部分失败返回
+        backend = FakeMediaBackend({"player": PLAYING, "stuck": PLAYING})
+        backend.hanging.add("stuck")
+        service = self.make_service(backend, 0.1, deadline=0.6, connect_timeout=0.2)
+        paused = service.submit(MediaStateTracker.pause_all, 0.3).result()
+        self.assertEqual(paused, {"player"})
+
+    def test_connect_timeout(self):
+        backend = FakeMediaBackend()
+        service = self.make_service(backend, 1.0, deadline=0.6, connect_timeout=0.1)
+        with self.assertRaises(asyncio.TimeoutError):
+            service.submit(MediaStateTracker.pause_all, 0.3).result()
+        self.assertEqual(service.stats.snapshot()["pause_all"][media_stats.TIMEOUT], 1)
+
+    def test_deadline_must_cover_connect(self):
+        with self.assertRaises(ValueError):
+            media_service.MediaService(None, deadline=1.0, connect_timeout=1.0)
+
+
+class MediaServiceConnectTest(unittest.TestCase):
+    def test_overlapping_calls_share_one_request(self):
+        requests = []
+
+        class Manager:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        async def request_manager():
+            requests.append(Manager())
+            await asyncio.sleep(0.05)
+            return requests[-1]
+
+        async def get(manager):
+            return manager
+
+        service = media_service.MediaService(request_manager)
+        self.addCleanup(service.shutdown)
+        futures = [service.submit(get) for _ in range(5)]
+        managers = {id(future.result()) for future in futures}
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(managers, {id(requests[0])})
+        self.assertFalse(requests[0].closed)
+
+    def test_timed_out_request_is_abandoned(self):
+        delays = [1.0, 0.0]
+        requests = []
+
+        async def request_manager():
+            requests.append(delays.pop(0))
+            await asyncio.sleep(requests[-1])
+            return len(requests)
+
+        async def get(manager):
+            return manager
+
+        service = media_service.MediaService(
+            request_manager, deadline=0.5, connect_timeout=0.1
+        )
+        self.addCleanup(service.shutdown)
+        first = [service.submit(get) for _ in range(3)]
+        for future in first:
+            with self.assertRaises((asyncio.TimeoutError, ConnectionError)):
+                future.result()
+        # 卡住的请求被放弃，下一次调用重新请求
+        self.assertEqual(service.submit(get).result(), 2)
+        self.assertEqual(len(requests), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
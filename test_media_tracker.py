@@ -0,0 +1,86 @@
+import asyncio
+import time
+import unittest
+
+from media_tracker import (
+    NO_SESSION,
+    PAUSED,
+    PLAYING,
+    FakeMediaBackend,
+    MediaCommandError,
+    MediaStateTracker,
+)
+
+TIMEOUT = 0.2
+
+
+class MediaStateTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeMediaBackend(
+            {"browser": PLAYING, "music": PLAYING, "video": PAUSED}
+        )
+        self.tracker = MediaStateTracker(self.backend)
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_connect_caches_statuses(self):
+        self.run_async(self.tracker.connect())
+        self.assertEqual(self.tracker.statuses, self.backend.sessions)
+        self.assertEqual(self.tracker.status, PLAYING)
+        self.assertEqual(MediaStateTracker(FakeMediaBackend({})).status, NO_SESSION)
+
+    def test_pause_all_only_pauses_playing_sessions(self):
+        paused = self.run_async(self.tracker.pause_all(TIMEOUT))
+        self.assertEqual(paused, {"browser", "music"})
+        self.assertNotIn(("pause", "video"), self.backend.commands)
+        self.assertEqual(self.tracker.status, PAUSED)
+
+    def test_hung_session_times_out_without_blocking_others(self):
+        self.backend.hanging.add("music")
+        t0 = time.perf_counter()
+        paused = self.run_async(self.tracker.pause_all(TIMEOUT))
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(paused, {"browser"})
+        self.assertLess(elapsed, TIMEOUT * 3)
+        self.assertEqual(self.tracker.statuses["music"], PLAYING)
+
+    def test_resume_skips_user_resumed_and_closed_sessions(self):
+        async def scenario():
+            paused = await self.tracker.pause_all(TIMEOUT)
+            self.backend.set_status("music", PLAYING)  # 用户在休息时手动继续播放
+            self.backend.close_session("browser")  # 标签页被关闭
+            return await self.tracker.resume(paused, TIMEOUT)
+
+        backend = FakeMediaBackend(
+            {"browser": PLAYING, "music": PLAYING, "podcast": PLAYING}
+        )
+        self.backend = backend
+        self.tracker = MediaStateTracker(backend)
+        resumed = self.run_async(scenario())
+        self.assertEqual(resumed, {"podcast"})
+        plays = [sid for name, sid in backend.commands if name == "play"]
+        self.assertEqual(plays, ["podcast"])
+
+    def test_partial_failure_returns_successful_sessions(self):
+        self.backend.failing.add("browser")
+        paused = self.run_async(self.tracker.pause_all(TIMEOUT))
+        self.assertEqual(paused, {"music"})
+        self.assertEqual(self.tracker.statuses["browser"], PLAYING)
+
+    def test_total_failure_raises(self):
+        self.backend.failing.add("browser")
+        self.backend.hanging.add("music")
+        with self.assertRaises(MediaCommandError) as cm:
+            self.run_async(self.tracker.pause_all(TIMEOUT))
+        self.assertEqual(cm.exception.session_ids, {"browser", "music"})
+        self.assertIsInstance(cm.exception.errors["music"], asyncio.TimeoutError)
+
+    def test_nothing_to_do(self):
+        self.backend.sessions = {"video": PAUSED}
+        self.assertEqual(self.run_async(self.tracker.pause_all(TIMEOUT)), set())
+        self.assertEqual(self.run_async(self.tracker.resume({"gone"}, TIMEOUT)), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+import profiles
+import timer_engine
+import timer_wheel
+
+
+class VirtualTk:
+    """代替 root.after 的虚拟时钟，advance() 按截止时间顺序执行到期的回调"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._pending = {}
+        self._ids = itertools.count()
+
+    def clock(self):
+        return self.now
+
+    def after(self, ms, callback):
+        after_id = next(self._ids)
+        self._pending[after_id] = (self.now + ms / 1000, after_id, callback)
+        return after_id
+
+    def cancel(self, after_id):
+        self._pending.pop(after_id, None)
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while self._pending:
+            due, after_id, callback = min(self._pending.values())
+            if due > end:
+                break
+            del self._pending[after_id]
+            self.now = due
+            callback()
+        self.now = end
+
+
+class ProfileManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = profiles.ProfileManager(
+            os.path.join(self.tmp.name, "profiles"),
+            lambda name, directory: profiles.Profile(name, directory, None),
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_default_profile_always_listed_first(self):
+        self.assertEqual(self.manager.names(), [profiles.DEFAULT_PROFILE])
+        self.manager.create("数学")
+        self.manager.create("English")
+        self.assertEqual(self.manager.names(), [profiles.DEFAULT_PROFILE, "English", "数学"])
+        self.assertEqual(self.manager.directory(profiles.DEFAULT_PROFILE), "")
+
+    def test_get_caches_profiles(self):
+        self.assertIs(self.manager.get("数学"), self.manager.get("数学"))
+
+    def test_invalid_or_duplicate_names(self):
+        self.manager.create("数学")
+        for name in ("", ".hidden", "a/b", "数学", profiles.DEFAULT_PROFILE):
+            with self.assertRaises(ValueError):
+                self.manager.create(name)
+
+
+class BackgroundProfileTest(unittest.TestCase):
+    def setUp(self):
+        self.tk = VirtualTk()
+        self.wheel = timer_wheel.TimerWheel(self.tk.after, self.tk.cancel, clock=self.tk.clock)
+        self.completed = []
+        self.manager = profiles.ProfileManager("profiles", self.make_profile)
+
+    def make_profile(self, name, directory):
+        engine = timer_engine.TimerEngine(
+            self.wheel.group(f"cycle:{name}"),
+            clock=self.tk.clock,
+            rng=random.Random(name),
+            tick_interval=None,
+        )
+        engine.subscribe("short_break_due", engine.short_break_finished)
+        engine.subscribe("cycle_complete", lambda: self.completed.append((name, self.tk.now)))
+        return profiles.Profile(name, directory, engine)
+
+    def test_background_cycles_complete_without_display_ticks(self):
+        shown, background = self.manager.get("a"), self.manager.get("b")
+        shown.engine.start(600)
+        shown.engine.set_tick_interval(timer_engine.TICK_INTERVAL)
+        background.engine.start(300)
+        self.assertEqual(self.manager.running(), [shown, background])
+
+        self.tk.advance(301)
+        self.assertEqual([name for name, _ in self.completed], ["b"])
+        self.assertAlmostEqual(self.completed[0][1], 300, places=2)
+        self.assertEqual(background.engine.wakeups, 0)  # 后台档案不刷新显示
+        self.assertFalse(background.active)
+        self.assertEqual(self.manager.running(), [shown])
+
+        self.tk.advance(300)
+        self.assertEqual([name for name, _ in self.completed], ["b", "a"])
+        self.assertEqual(self.wheel.pending(), 0)  # 两个档案完成后都不留定时器
+
+    def test_switching_display_keeps_cycle_time(self):
+        a, b = self.manager.get("a"), self.manager.get("b")
+        a.engine.start(600)
+        a.engine.set_tick_interval(timer_engine.TICK_INTERVAL)
+        b.engine.start(600)
+        self.tk.advance(100)
+        # 切换界面：a 关闭显示刷新，b 开启
+        a.engine.set_tick_interval(None)
+        b.engine.set_tick_interval(timer_engine.TICK_INTERVAL)
+        wakeups = a.engine.wakeups
+        self.tk.advance(200)
+        self.assertEqual(a.engine.wakeups, wakeups)
+        self.assertEqual(a.engine.elapsed_seconds(), 300)
+        self.assertEqual(b.engine.elapsed_seconds(), 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+
+import data_store
+from records_model import RecordsModel
+
+
+def session(seconds, fraction=0.5, completed=False):
+    return {
+        "start_time": "08:00:00",
+        "end_time": "09:00:00",
+        "duration_seconds": seconds,
+        "completed_cycle": completed,
+        "cycle_fraction": fraction,
+    }
+
+
+class DistributionTest(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            "daily_log": {
+                "2025-01-06": [session(1800), session(3600, 1.0, True)],
+                "2025-01-08": [session(600)],
+            }
+        }
+        self.model = RecordsModel(SimpleNamespace(archive=None), lambda: self.data)
+
+    def add(self, date_str, new_session):
+        self.data["daily_log"].setdefault(date_str, []).append(new_session)
+        self.model.session_added(date_str, new_session)
+
+    def assert_matches_rebuild(self):
+        weekdays, histogram = self.model.distribution()
+        fresh = RecordsModel(SimpleNamespace(archive=None), lambda: self.data)
+        expected_weekdays, expected_histogram = fresh.distribution()
+        np.testing.assert_allclose(weekdays, expected_weekdays)
+        np.testing.assert_array_equal(histogram, expected_histogram)
+
+    def test_session_added_updates_cached_arrays(self):
+        self.model.distribution()  # 建立列数组缓存
+        self.add("2025-01-08", session(5400))
+        self.add("2025-01-12", session(900))
+        self.add("2025-01-07", session(300))  # 补记更早的日期
+        self.assertEqual(len(self.model._arrays), 6)
+        self.assert_matches_rebuild()
+
+    def test_many_appends_grow_buffer(self):
+        self.model.distribution()
+        for i in range(40):
+            self.add(f"2025-03-{i % 28 + 1:02d}", session(60 * (i + 1), 0.1 * (i % 10)))
+            if i % 7 == 0:
+                self.model.distribution()  # 中间读取过的视图不受之后追加的影响
+        self.add("2025-01-01", session(120))  # 扩容后再补记更早的日期
+        self.assertEqual(len(self.model._arrays), 44)
+        self.assert_matches_rebuild()
+        self.assertEqual(self.model.range_totals(date(2025, 1, 1), date(2025, 3, 31))[2], 44)
+
+    def test_invalidate_rebuilds(self):
+        self.model.distribution()
+        self.data["daily_log"] = {"2025-02-03": [session(60)]}
+        self.model.invalidate()
+        self.assert_matches_rebuild()
+        self.assertEqual(self.model.distribution()[1].sum(), 1)
+
+
+class CompactionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = data_store.JournalStore(
+            *(os.path.join(self.tmp.name, name) for name in ("data.json", "journal", "archive")),
+            compact_threshold=3,
+        )
+        self.data = self.store.load({"total_seconds": 0, "total_cycles": 0})
+        self.model = RecordsModel(self.store, lambda: self.data)
+
+    def tearDown(self):
+        self.store.archive.clear()
+        self.tmp.cleanup()
+
+    def test_settings_write_that_archives_a_month(self):
+        today = date.today().isoformat()
+        self.store.append_session(self.data, "2024-03-01", session(1800))
+        self.model.session_added("2024-03-01", self.data["daily_log"]["2024-03-01"][-1])
+        self.store.append_session(self.data, today, session(600))
+        self.model.session_added(today, self.data["daily_log"][today][-1])
+        history, dates, _ = self.model.daily_page(0)
+        self.assertEqual(dates, [today, "2024-03-01"])
+        self.model.distribution()
+
+        # 第三条日志触发压缩，2024-03 移入归档
+        self.data["cycle_duration"] = 60
+        self.store.save_settings(self.data, ["cycle_duration"])
+        self.assertNotIn("2024-03-01", self.data["daily_log"])
+
+        history, dates, _ = self.model.daily_page(0)
+        self.assertEqual(dates, [today, "2024-03-01"])
+        self.assertEqual(history["2024-03-01"][0]["duration_seconds"], 1800)
+        self.assertEqual(self.model.distribution()[1].sum(), 2)
+        self.assertEqual(
+            self.model.range_totals(date(2024, 1, 1), date.today())[0], 2400
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+import schema
+
+
+class MigrateTest(unittest.TestCase):
+    def test_v0_iso_times_become_clock_times(self):
+        data = {
+            "daily_log": {
+                "2024-03-01": [
+                    {
+                        "start_time": "2024-03-01T08:15:30.123456",
+                        "end_time": "2024-03-01 09:00:00",
+                        "duration_seconds": 2670,
+                        "completed": True,
+                    }
+                ],
+                "2024-03-02": {"seconds": 600, "cycles": 0.5},
+            }
+        }
+        self.assertTrue(schema.migrate(data))
+        session = data["daily_log"]["2024-03-01"][0]
+        self.assertEqual((session["start_time"], session["end_time"]), ("08:15:30", "09:00:00"))
+        self.assertTrue(session["completed_cycle"])
+        self.assertIsNone(data["daily_log"]["2024-03-02"][0]["start_time"])
+        self.assertEqual(data["schema_version"], schema.SCHEMA_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import data_store
+import session_archive
+from records_model import RecordsModel
+
+DEFAULTS = {"total_seconds": 0, "total_cycles": 0}
+
+
+def session_record(duration, fraction):
+    return {
+        "start_time": "08:00:00",
+        "end_time": "09:00:00",
+        "duration_seconds": duration,
+        "completed_cycle": False,
+        "cycle_fraction": fraction,
+    }
+
+
+class SessionArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "archive.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fraction_round_trips_exactly(self):
+        fraction = 4711 / 5400
+        archive = session_archive.SessionArchive(self.path)
+        archive.append(
+            session_archive.daily_log_to_records(
+                {"2024-03-01": [session_record(4711, fraction)]}
+            )
+        )
+        self.assertEqual(archive.day("2024-03-01")[0]["cycle_fraction"], fraction)
+
+
+class ClosedMonthRollupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = data_store.JournalStore(
+            *(os.path.join(self.tmp.name, name) for name in ("data.json", "journal", "archive"))
+        )
+
+    def tearDown(self):
+        self.store.archive.clear()
+        self.tmp.cleanup()
+
+    def test_archived_days_leave_day_rollups(self):
+        data = self.store.load(DEFAULTS)
+        today = date.today().isoformat()
+        self.store.append_session(data, "2024-03-01", session_record(1800, 0.5))
+        self.store.append_session(data, today, session_record(600, 0.1))
+        self.store.save_snapshot(data)
+
+        self.assertNotIn("2024-03-01", data["daily_log"])
+        self.assertEqual(list(data["rollups"]["day"]), [today])
+        self.assertIn("2024-03", data["rollups"]["month"])
+
+        # 区间统计仍然包含已归档的日期
+        model = RecordsModel(self.store, lambda: data)
+        seconds, cycles, sessions = model.range_totals(date(2024, 1, 1), date.today())
+        self.assertEqual((seconds, sessions), (2400, 2))
+        self.assertAlmostEqual(cycles, 0.6)
+        seconds, _, sessions = model.range_totals(date(2024, 3, 1), date(2024, 3, 1))
+        self.assertEqual((seconds, sessions), (1800, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
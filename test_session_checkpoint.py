@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+import session_checkpoint
+
+
+class SessionCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "learning_data.checkpoint")
+        self.checkpoint = session_checkpoint.SessionCheckpoint(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load(self):
+        state = {"start_time": "2025-01-06T08:00:00", "elapsed_seconds": 600, "paused": False}
+        self.checkpoint.save(state, self.checkpoint.epoch)
+        self.assertEqual(session_checkpoint.SessionCheckpoint(self.path).load(), state)
+
+    def test_stale_epoch_is_ignored(self):
+        # 后台线程提交的检查点在周期结束（clear）之后才执行
+        epoch = self.checkpoint.epoch
+        self.checkpoint.clear()
+        self.checkpoint.save({"elapsed_seconds": 600}, epoch)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(self.checkpoint.load())
+
+        self.checkpoint.save({"elapsed_seconds": 30}, self.checkpoint.epoch)
+        self.assertEqual(self.checkpoint.load(), {"elapsed_seconds": 30})
+
+    def test_clear_without_file(self):
+        self.checkpoint.clear()
+        self.assertEqual(self.checkpoint.epoch, 1)
+
+    def test_corrupt_or_unexpected_file(self):
+        for content in ("{", "[1, 2]"):
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(content)
+            self.assertIsNone(self.checkpoint.load())
+
+
+if __name__ == "__main__":
+    unittest.main()
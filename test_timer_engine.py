@@ -0,0 +1,171 @@
+import itertools
+import random
+import unittest
+
+import timer_engine
+import timer_wheel
+
+
+class VirtualTk:
+    """代替 root.after 的虚拟时钟，advance() 按截止时间顺序执行到期的回调"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._pending = {}
+        self._ids = itertools.count()
+
+    def clock(self):
+        return self.now
+
+    def after(self, ms, callback):
+        after_id = next(self._ids)
+        self._pending[after_id] = (self.now + ms / 1000, after_id, callback)
+        return after_id
+
+    def cancel(self, after_id):
+        self._pending.pop(after_id, None)
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while self._pending:
+            due, after_id, callback = min(self._pending.values())
+            if due > end:
+                break
+            del self._pending[after_id]
+            self.now = due
+            callback()
+        self.now = end
+
+
+class TimerEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.tk = VirtualTk()
+        self.wheel = timer_wheel.TimerWheel(self.tk.after, self.tk.cancel, clock=self.tk.clock)
+        self.events = []
+
+    def make_engine(self, **kwargs):
+        kwargs.setdefault("rng", random.Random(0))
+        engine = timer_engine.TimerEngine(self.wheel.group("cycle"), clock=self.tk.clock, **kwargs)
+        for event in ("short_break_due", "cycle_complete", "pause_expired"):
+            engine.subscribe(event, lambda event=event: self.events.append((self.tk.now, event)))
+        return engine
+
+    def test_cycle_completes_on_time(self):
+        engine = self.make_engine(break_interval=lambda: (10_000, 10_000))
+        engine.start(60)
+        self.tk.advance(59.5)
+        self.assertEqual(engine.state, timer_engine.RUNNING)
+        self.assertEqual(engine.remaining_seconds(), 1)
+        self.tk.advance(1)
+        self.assertEqual(engine.state, timer_engine.IDLE)
+        self.assertEqual([event for _, event in self.events], ["cycle_complete"])
+        self.assertAlmostEqual(self.events[0][0], 60, places=2)
+
+    def test_pause_and_resume_keep_remaining_time(self):
+        engine = self.make_engine(break_interval=lambda: (10_000, 10_000))
+        engine.start(100)
+        self.tk.advance(30)
+        engine.pause(50)
+        self.assertEqual(engine.state, timer_engine.PAUSED)
+        self.tk.advance(20)
+        self.assertEqual(engine.remaining_seconds(), 70)  # 暂停不计入学习时间
+        self.assertEqual(engine.pause_remaining_seconds(), 30)
+        engine.resume()
+        self.tk.advance(69)
+        self.assertEqual(engine.remaining_seconds(), 1)
+        self.tk.advance(2)
+        self.assertEqual(engine.state, timer_engine.IDLE)
+        self.assertAlmostEqual(self.events[-1][0], 120, places=2)
+
+    def test_pause_expires_and_resumes(self):
+        engine = self.make_engine(break_interval=lambda: (10_000, 10_000), tick_interval=None)
+        engine.start(100)
+        self.tk.advance(10)
+        engine.pause(30)
+        self.tk.advance(31)
+        self.assertEqual(engine.state, timer_engine.RUNNING)
+        self.assertEqual(engine.elapsed_seconds(), 11)
+        self.assertEqual([event for _, event in self.events], ["pause_expired"])
+
+    def test_no_short_break_while_paused(self):
+        engine = self.make_engine(tick_interval=None)
+        engine.start(1000, break_plan=[100])
+        self.tk.advance(90)
+        engine.pause(60)
+        self.tk.advance(59)
+        self.assertEqual(self.events, [])
+        self.tk.advance(20)  # 暂停结束后再学习 10 秒
+        self.assertEqual([event for _, event in self.events], ["pause_expired", "short_break_due"])
+        self.assertAlmostEqual(self.events[-1][0], 160, places=2)
+
+    def test_stop_cancels_all_timers(self):
+        engine = self.make_engine()
+        engine.start(100)
+        self.tk.advance(10)
+        self.assertEqual(engine.stop(), 10)
+        self.assertEqual(self.wheel.pending(), 0)
+        self.tk.advance(200)
+        self.assertEqual(self.events, [])
+
+
+
+class BreakPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.tk = VirtualTk()
+        self.wheel = timer_wheel.TimerWheel(self.tk.after, self.tk.cancel, clock=self.tk.clock)
+        self.breaks = []
+
+    def make_engine(self, **kwargs):
+        engine = timer_engine.TimerEngine(
+            self.wheel.group("cycle"), clock=self.tk.clock, tick_interval=None, **kwargs
+        )
+        engine.subscribe("short_break_due", lambda: self.breaks.append(self.tk.now))
+        engine.subscribe("short_break_due", engine.short_break_finished)
+        return engine
+
+    def test_plan_follows_the_interval_rules(self):
+        plan = timer_engine.make_break_plan(90 * 60, (180, 300), 30, random.Random(1))
+        self.assertTrue(plan)
+        gaps = [b - a - 30 for a, b in zip([-30] + plan, plan)]
+        self.assertTrue(all(180 <= gap <= 300 for gap in gaps))
+        self.assertLess(plan[-1] + 30, 90 * 60)
+
+    def test_same_seed_gives_same_plan(self):
+        engine = self.make_engine(rng=random.Random(7))
+        engine.start(5400)
+        plan, seed = engine.break_plan, engine.break_seed
+        engine.stop()
+        engine.start(5400, break_seed=seed)
+        self.assertEqual(engine.break_plan, plan)
+
+    def test_breaks_are_skipped_while_previous_break_is_open(self):
+        engine = timer_engine.TimerEngine(
+            self.wheel.group("cycle"), clock=self.tk.clock, tick_interval=None
+        )
+        engine.subscribe("short_break_due", lambda: self.breaks.append(self.tk.now))
+        engine.start(1000, break_plan=[100, 200, 300])
+        self.tk.advance(250)
+        self.assertEqual(self.breaks, [100])  # 200 时上一次休息还没有结束
+        engine.short_break_finished()
+        self.tk.advance(100)
+        self.assertEqual(self.breaks, [100, 300])
+
+    def test_resume_skips_plan_points_already_passed(self):
+        engine = self.make_engine()
+        engine.start(1000, break_plan=[100, 300, 500], elapsed=350)
+        self.assertEqual(engine.next_break_in(), 150)
+        self.tk.advance(700)
+        # 只剩 500 这一个计划点：恢复后再学习 150 秒
+        self.assertEqual(self.breaks, [150])
+        self.assertEqual(engine.state, timer_engine.IDLE)
+
+    def test_resume_exactly_on_a_plan_point(self):
+        engine = self.make_engine()
+        engine.start(1000, break_plan=[100, 300], elapsed=300)
+        self.assertIsNone(engine.next_break_in())
+        self.tk.advance(800)
+        self.assertEqual(self.breaks, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import itertools
+import unittest
+
+import timer_wheel
+
+
+class VirtualTk:
+    """代替 root.after 的虚拟时钟，advance() 按截止时间顺序执行到期的回调"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.pending = {}
+        self._ids = itertools.count()
+
+    def clock(self):
+        return self.now
+
+    def after(self, ms, callback):
+        after_id = next(self._ids)
+        self.pending[after_id] = (self.now + ms / 1000, after_id, callback)
+        return after_id
+
+    def cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while self.pending:
+            due, after_id, callback = min(self.pending.values())
+            if due > end:
+                break
+            del self.pending[after_id]
+            self.now = due
+            callback()
+        self.now = end
+
+
+class TimerWheelTest(unittest.TestCase):
+    def setUp(self):
+        self.tk = VirtualTk()
+        self.wheel = timer_wheel.TimerWheel(self.tk.after, self.tk.cancel, clock=self.tk.clock)
+        self.fired = []
+
+    def test_callbacks_fire_in_deadline_order_with_one_after(self):
+        for delay in (3, 1, 2, 1):
+            self.wheel.call_later(delay, self.fired.append, delay)
+        self.assertEqual(len(self.tk.pending), 1)  # 底层只保留一个 after
+        self.tk.advance(5)
+        self.assertEqual(self.fired, [1, 1, 2, 3])
+        self.assertEqual(self.wheel.wakeups, 3)
+        self.assertEqual(self.tk.pending, {})
+
+    def test_cancel_group(self):
+        for i in range(10):
+            self.wheel.call_later(i + 1, self.fired.append, i, group="odd" if i % 2 else "even")
+        self.wheel.call_later(20, self.fired.append, "other")
+        self.wheel.cancel_group("odd")
+        self.assertEqual(self.wheel.pending(), 6)
+        self.tk.advance(30)
+        self.assertEqual(self.fired, [0, 2, 4, 6, 8, "other"])
+
+    def test_cancel_group_only_affects_existing_timers(self):
+        self.wheel.call_later(1, self.fired.append, "old", group="g")
+        self.wheel.cancel_group("g")
+        self.wheel.call_later(2, self.fired.append, "new", group="g")
+        self.tk.advance(3)
+        self.assertEqual(self.fired, ["new"])
+
+    def test_cancelling_everything_releases_the_after(self):
+        group = self.wheel.group("g")
+        group.call_later(1, self.fired.append, 1)
+        handle = self.wheel.call_later(2, self.fired.append, 2)
+        group.cancel_all()
+        self.wheel.cancel(handle)
+        self.assertEqual(self.tk.pending, {})
+        self.tk.advance(5)
+        self.assertEqual(self.fired, [])
+
+    def test_callback_error_does_not_stop_other_timers(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        self.wheel.call_later(1, fail)
+        self.wheel.call_later(1, self.fired.append, "after")
+        self.tk.advance(2)
+        self.assertEqual(self.fired, ["after"])
+
+    def test_after_uses_milliseconds(self):
+        self.wheel.after(1500, self.fired.append, "x")
+        self.tk.advance(1.4)
+        self.assertEqual(self.fired, [])
+        self.tk.advance(0.2)
+        self.assertEqual(self.fired, ["x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,332 @@
+import math
+import random
+import time
+
+# 引擎状态
+IDLE = "idle"
+RUNNING = "running"
+PAUSED = "paused"
+
+# 显示的最小单位（秒）：只在显示的数字变化时（跨过整秒）唤醒一次
+TICK_INTERVAL = 1
+# 唤醒时刻比整秒边界稍晚一点，避免 after 按毫秒取整后提前唤醒、显示没有变化
+TICK_SLACK = 0.002
+# “暂停5分钟”的时长（秒）
+PAUSE_SECONDS = 5 * 60
+# 短休息时长（秒）
+SHORT_BREAK_SECONDS = 30
+# 截止定时器提前不超过这么多秒（after 的毫秒精度）就直接视为周期结束
+FINISH_TOLERANCE = 0.001
+
+
+def make_break_plan(total_seconds, break_interval, short_break_seconds, rng):
+    """预先生成整个周期的短休息时间点（学习时间的偏移，秒）。
+
+    规则与逐次安排时相同：上一次休息结束后随机等待 break_interval 内的秒数，
+    剩余时间不够再休息一次时停止。暂停不计入学习时间，所以暂停只会整体推迟计划。
+    """
+    min_interval, max_interval = break_interval
+    plan = []
+    start = 0
+    while True:
+        delay = rng.randint(min_interval, max_interval)
+        if total_seconds - start <= delay + short_break_seconds:
+            return plan
+        plan.append(start + delay)
+        start += delay + short_break_seconds
+
+
+def make_session(start_time, end_time, duration_seconds, total_seconds, completed_cycle):
+    """按 daily_log 的格式生成一条学习记录（也用于补记程序异常退出时未结束的周期）"""
+    if completed_cycle:
+        cycle_fraction = 1.0
+    else:
+        # 使用总周期时间计算周期分数
+        cycle_fraction = duration_seconds / total_seconds if total_seconds else 0.0
+        cycle_fraction = max(0.0, min(1.0, cycle_fraction))  # Clamp between 0 and 1
+    return {
+        "start_time": start_time.strftime("%H:%M:%S"),
+        "end_time": end_time.strftime("%H:%M:%S"),
+        "duration_seconds": int(duration_seconds),
+        "completed_cycle": completed_cycle,
+        "cycle_fraction": cycle_fraction,
+    }
+
+
+class TimerEngine:
+    """学习周期的状态机，不依赖 Tk，可以在测试、命令行或后台进程中运行。
+
+    clock 返回单调递增的秒数，scheduler 提供 call_later(delay, callback, *args) / cancel(handle)
+    （程序中是 TimerWheel 的一个组），
+    break_interval 返回当前的短休息间隔范围 (最短秒数, 最长秒数)，在 start 时用来生成本周期的
+    短休息计划（break_plan，学习时间偏移）；任何时候都只有下一次短休息的一个定时器。
+    周期结束由单独的截止定时器触发，tick 只用于刷新显示；tick_interval=None 时不发出 tick
+    （没有界面时使用，例如 timer_simulator）。
+    每次唤醒都根据 clock 重新计算下一个整秒边界，迟到的唤醒（系统休眠、主线程繁忙）
+    不会累积误差；clock 默认是 time.monotonic，不受系统时间调整影响。
+    界面通过 subscribe 订阅以下事件，只负责显示：
+      tick(remaining, elapsed)   学习计时刷新
+      short_break_due()          该短休息了，休息结束后调用 short_break_finished()，
+                                 在那之前到期的短休息被跳过
+      cycle_complete()           整个周期完成
+      pause_tick(remaining)      暂停倒计时刷新（tick_interval=None 时只在开始和到期时发出）
+      pause_expired()            暂停时间到，随后自动继续计时
+    """
+
+    EVENTS = ("tick", "short_break_due", "cycle_complete", "pause_tick", "pause_expired")
+
+    def __init__(
+        self,
+        scheduler,
+        clock=time.monotonic,
+        rng=None,
+        break_interval=lambda: (3 * 60, 5 * 60),
+        short_break_seconds=SHORT_BREAK_SECONDS,
+        tick_interval=TICK_INTERVAL,
+    ):
+        self.scheduler = scheduler
+        self.clock = clock
+        self.rng = rng if rng is not None else random.Random()
+        self.break_interval = break_interval
+        self.short_break_seconds = short_break_seconds
+        self.tick_interval = tick_interval
+        self._listeners = {event: [] for event in self.EVENTS}
+
+        self.state = IDLE
+        self.total_seconds = 0
+        self.in_short_break = False  # 已发出 short_break_due，等待休息结束
+        self.break_seed = None  # 生成本周期短休息计划的随机种子
+        self.break_plan = []  # 本周期所有短休息的学习时间偏移（秒），升序
+        self._next_break = 0  # break_plan 中下一次短休息的下标
+        self._banked = 0.0  # 之前各段（暂停前）已学习的秒数
+        self._segment_start = None  # 当前这一段开始计时的时刻
+        self._pause_end = None
+        self._tick_handle = None
+        self._finish_handle = None
+        self._break_handle = None
+        self._pause_handle = None
+        self._last_tick = None  # 上一次 tick 发出的剩余秒数，没有变化时不重复发出
+        self.wakeups = 0  # tick 和暂停倒计时的唤醒次数（用于测量）
+
+    def subscribe(self, event, callback):
+        self._listeners[event].append(callback)
+
+    def _emit(self, event, *args):
+        for callback in self._listeners[event]:
+            callback(*args)
+
+    # --- 查询 ---
+    def _elapsed_exact(self):
+        elapsed = self._banked
+        if self.state == RUNNING:
+            elapsed += self.clock() - self._segment_start
+        return elapsed
+
+    def elapsed_seconds(self):
+        """本周期已学习的秒数（不含暂停时间）"""
+        return min(int(self._elapsed_exact()), self.total_seconds)
+
+    def remaining_seconds(self):
+        return self.total_seconds - self.elapsed_seconds()
+
+    def next_break_in(self):
+        """距离下一次短休息还要学习多少秒，本周期没有更多短休息时返回 None"""
+        if self._next_break >= len(self.break_plan):
+            return None
+        return max(0, math.ceil(self.break_plan[self._next_break] - self._elapsed_exact()))
+
+    def pause_remaining_seconds(self):
+        if self.state != PAUSED:
+            return 0
+        return max(0, math.ceil(self._pause_end - self.clock() - FINISH_TOLERANCE))
+
+    # --- 控制 ---
+    def start(self, total_seconds, break_plan=None, break_seed=None, elapsed=0):
+        """开始一个新的周期。
+
+        恢复中断的周期时传入之前保存的 break_plan / break_seed 和已学习的秒数 elapsed。
+        """
+        self._cancel_all()
+        self.total_seconds = int(total_seconds)
+        if break_plan is None:
+            if break_seed is None:
+                break_seed = self.rng.randrange(2**32)
+            break_plan = make_break_plan(
+                self.total_seconds,
+                self.break_interval(),
+                self.short_break_seconds,
+                random.Random(break_seed),
+            )
+        self.break_seed = break_seed
+        self.break_plan = list(break_plan)
+        self._banked = float(elapsed)
+        self._next_break = 0
+        self._segment_start = self.clock()
+        self.in_short_break = False
+        self.state = RUNNING
+        self._arm()
+
+    def stop(self):
+        """停止计时，返回本周期已学习的秒数；之后仍可查询 elapsed_seconds()"""
+        elapsed = self.elapsed_seconds()
+        self._bank_segment()
+        self._cancel_all()
+        self.in_short_break = False
+        self.state = IDLE
+        return elapsed
+
+    def pause(self, seconds=PAUSE_SECONDS):
+        """暂停学习计时 seconds 秒，到时自动继续；暂停期间不会触发短休息"""
+        if self.state != RUNNING:
+            return
+        self._bank_segment()
+        self._cancel_all()
+        self.state = PAUSED
+        self._pause_end = self.clock() + seconds
+        self._pause_tick()
+
+    def resume(self):
+        if self.state != PAUSED:
+            return
+        self._cancel(self._pause_handle)
+        self._pause_handle = None
+        self._pause_end = None
+        self._segment_start = self.clock()
+        self.state = RUNNING
+        self._arm()
+
+    def make_session(self, start_time, end_time, completed_cycle):
+        """按 daily_log 的格式生成本周期的学习记录，start_time / end_time 为 datetime"""
+        return make_session(
+            start_time, end_time, self.elapsed_seconds(), self.total_seconds, completed_cycle
+        )
+
+    def set_tick_interval(self, tick_interval):
+        """开启（显示单位，秒）或关闭（None）显示刷新，例如界面切换到另一个档案时。
+
+        关闭后计时中只剩周期结束和下一次短休息的定时器，暂停只剩一个到期定时器。
+        """
+        self.tick_interval = tick_interval
+        self._cancel(self._tick_handle)
+        self._tick_handle = None
+        if self.state == RUNNING and tick_interval:
+            self._last_tick = None
+            self._tick()
+        elif self.state == PAUSED:
+            self._cancel(self._pause_handle)
+            self._pause_tick()
+
+    def short_break_finished(self):
+        """短休息结束（下一次短休息已经按计划安排好了）"""
+        self.in_short_break = False
+
+    # --- 内部 ---
+    def _bank_segment(self):
+        if self.state == RUNNING:
+            self._banked += self.clock() - self._segment_start
+            self._segment_start = None
+
+    def _cancel(self, handle):
+        if handle is not None:
+            self.scheduler.cancel(handle)
+
+    def _cancel_all(self):
+        for name in ("_tick_handle", "_finish_handle", "_break_handle", "_pause_handle"):
+            self._cancel(getattr(self, name))
+            setattr(self, name, None)
+
+    def _arm(self):
+        """开始（或继续）计时：设置周期结束和下一次短休息的截止时间，并开始刷新显示"""
+        self._finish_handle = self.scheduler.call_later(
+            max(0.0, self.total_seconds - self._elapsed_exact()), self._on_finish
+        )
+        self._arm_break()
+        if self.tick_interval:
+            self._last_tick = None
+            self._tick()
+
+    def _until_boundary(self, value):
+        """递增的 value（秒）到下一个显示单位边界还要多久"""
+        unit = self.tick_interval or 1
+        return unit - value % unit + TICK_SLACK
+
+    def _tick(self):
+        self._tick_handle = None
+        if self.state != RUNNING:
+            return
+        self.wakeups += 1
+        elapsed = self._elapsed_exact()
+        remaining = self.total_seconds - min(int(elapsed), self.total_seconds)
+        if remaining <= 0:
+            self._complete()
+            return
+        if remaining != self._last_tick:
+            self._last_tick = remaining
+            self._emit("tick", remaining, self.total_seconds - remaining)
+        self._tick_handle = self.scheduler.call_later(
+            self._until_boundary(elapsed), self._tick
+        )
+
+    def _on_finish(self):
+        self._finish_handle = None
+        if self.state != RUNNING:
+            return
+        rest = self.total_seconds - self._elapsed_exact()
+        if rest > FINISH_TOLERANCE:
+            # 定时器提前触发（after 按毫秒取整），补上剩下的时间
+            self._finish_handle = self.scheduler.call_later(rest, self._on_finish)
+        else:
+            self._complete()
+
+    def _complete(self):
+        self.stop()
+        self._banked = self.total_seconds
+        self._emit("tick", 0, self.total_seconds)
+        self._emit("cycle_complete")
+
+    def _arm_break(self):
+        """按计划只安排下一次短休息；学习时间已经越过的计划点（例如恢复周期时）直接跳过"""
+        elapsed = self._elapsed_exact()
+        plan = self.break_plan
+        while self._next_break < len(plan) and plan[self._next_break] <= elapsed:
+            self._next_break += 1
+        if self._next_break < len(plan):
+            self._break_handle = self.scheduler.call_later(
+                plan[self._next_break] - elapsed, self._on_short_break
+            )
+
+    def _on_short_break(self):
+        self._break_handle = None
+        if self.state != RUNNING:
+            return
+        rest = self.break_plan[self._next_break] - self._elapsed_exact()
+        if rest > FINISH_TOLERANCE:
+            self._break_handle = self.scheduler.call_later(rest, self._on_short_break)
+            return
+        self._next_break += 1
+        # 上一次短休息还没有结束（例如弹窗还开着）时跳过这一次
+        if not self.in_short_break:
+            self.in_short_break = True
+            self._emit("short_break_due")
+        if self.state == RUNNING:
+            self._arm_break()
+
+    def _pause_tick(self):
+        self._pause_handle = None
+        if self.state != PAUSED:
+            return
+        self.wakeups += 1
+        rest = self._pause_end - self.clock()
+        remaining = self.pause_remaining_seconds()
+        self._emit("pause_tick", remaining)
+        if remaining <= 0:
+            self._emit("pause_expired")
+            self.resume()
+        elif self.tick_interval:
+            # 倒计时向上取整显示，在它降到下一个整数时唤醒
+            self._pause_handle = self.scheduler.call_later(
+                self._until_boundary(-rest), self._pause_tick
+            )
+        else:
+            # 不刷新显示时只在暂停到期时唤醒一次
+            self._pause_handle = self.scheduler.call_later(rest, self._pause_tick)
@@ -0,0 +1,243 @@
+import argparse
+import heapq
+import random
+import time
+from datetime import datetime, timedelta
+
+import data_store
+import timer_engine
+
+# 模拟用户行为的默认概率（每个周期）
+PAUSE_PROBABILITY = 0.3  # 中途暂停5分钟
+EARLY_RESUME_PROBABILITY = 0.5  # 暂停后提前点“继续”
+STOP_PROBABILITY = 0.1  # 中途点“停止并记录”
+EARLY_CLOSE_PROBABILITY = 0.2  # 短休息弹窗被提前关闭
+LONG_BREAK_SECONDS = 20 * 60
+
+
+class VirtualScheduler:
+    """虚拟时钟 + 定时器堆，实现 TimerEngine 需要的 call_later / cancel 接口。
+
+    时间只在 run() 中跳到下一个到期的定时器，不会真的等待。
+    jitter 模拟定时器迟到（0 到 jitter 秒的随机延迟，例如主线程繁忙），
+    sleep_probability 模拟系统休眠：每次唤醒有这个概率先“睡” 1 到 30 分钟。
+    """
+
+    def __init__(self, start=0.0, rng=None, jitter=0.0, sleep_probability=0.0):
+        self.now = start
+        self._queue = []
+        self._seq = 0  # 同一时刻到期的定时器按加入顺序执行
+        self.fired = 0
+        self.rng = rng if rng is not None else random.Random(0)
+        self.jitter = jitter
+        self.sleep_probability = sleep_probability
+
+    def clock(self):
+        return self.now
+
+    def call_later(self, delay, callback, *args):
+        self._seq += 1
+        entry = [self.now + max(0.0, delay), self._seq, callback, args]
+        heapq.heappush(self._queue, entry)
+        return entry
+
+    def cancel(self, handle):
+        handle[2] = None  # 懒删除，出堆时跳过
+
+    def run(self, until=None):
+        """执行到期的定时器，直到队列为空或虚拟时间到达 until"""
+        while self._queue:
+            entry = self._queue[0]
+            if until is not None and entry[0] > until:
+                break
+            heapq.heappop(self._queue)
+            due, _, callback, args = entry
+            if callback is None:
+                continue
+            if self.jitter:
+                due += self.rng.uniform(0, self.jitter)
+            if self.sleep_probability and self.rng.random() < self.sleep_probability:
+                due += self.rng.uniform(60, 1800)
+            self.now = max(self.now, due)
+            self.fired += 1
+            callback(*args)
+        if until is not None:
+            self.now = max(self.now, until)
+
+
+class CycleSimulation:
+    """在虚拟时钟上连续运行完整的学习周期，模拟短休息、暂停、停止和长休息"""
+
+    def __init__(
+        self,
+        seed=0,
+        cycle_seconds=90 * 60,
+        break_interval=(3 * 60, 5 * 60),
+        tick_interval=None,
+        jitter=0.0,
+        sleep_probability=0.0,
+    ):
+        self.rng = random.Random(seed)
+        self.cycle_seconds = cycle_seconds
+        self.scheduler = VirtualScheduler(
+            rng=random.Random(seed + 2), jitter=jitter, sleep_probability=sleep_probability
+        )
+        self.engine = timer_engine.TimerEngine(
+            self.scheduler,
+            clock=self.scheduler.clock,
+            rng=random.Random(seed + 1),
+            break_interval=lambda: break_interval,
+            tick_interval=tick_interval,
+        )
+        self.engine.subscribe("tick", self._on_tick)
+        self.engine.subscribe("short_break_due", self._on_short_break)
+        self.engine.subscribe("cycle_complete", self._on_cycle_complete)
+        self.engine.subscribe("pause_expired", self._on_pause_end)
+
+        # 虚拟的墙上时间，用于生成记录中的开始/结束时间
+        self.wall_start = datetime(2025, 1, 1, 8, 0, 0)
+        self.data = data_store.new_data({"total_seconds": 0, "total_cycles": 0})
+
+        self.ticks = 0
+        self.short_breaks = 0
+        self.pauses = 0
+        self.completed = 0
+        self.stopped = 0
+        self.durations = []
+        self.drifts = []  # 周期实际结束时刻 - 理论结束时刻（秒）
+        self.duration_errors = []  # 记录的时长 - 实际学习时长（秒）
+        self.display_lags = []  # 每次刷新时：实际已学习时间 - 显示的已学习时间（秒）
+
+    def _wall(self):
+        return self.wall_start + timedelta(seconds=self.scheduler.now)
+
+    def _on_tick(self, remaining, elapsed):
+        self.ticks += 1
+        if remaining > 0:
+            studied = self.scheduler.now - self._cycle_start - self._paused_total
+            self.display_lags.append(studied - elapsed)
+
+    def _on_short_break(self):
+        self.short_breaks += 1
+        duration = timer_engine.SHORT_BREAK_SECONDS
+        if self.rng.random() < EARLY_CLOSE_PROBABILITY:
+            duration = self.rng.uniform(1, duration)
+        self.scheduler.call_later(duration, self.engine.short_break_finished)
+
+    def _on_pause_end(self):
+        self._paused_total += self.scheduler.now - self._pause_started
+
+    def _pause(self):
+        if self.engine.state != timer_engine.RUNNING:
+            return
+        self.pauses += 1
+        self._pause_started = self.scheduler.now
+        self.engine.pause(timer_engine.PAUSE_SECONDS)
+        if self.rng.random() < EARLY_RESUME_PROBABILITY:
+            self.scheduler.call_later(
+                self.rng.uniform(1, timer_engine.PAUSE_SECONDS - 1), self._resume
+            )
+
+    def _resume(self):
+        if self.engine.state != timer_engine.PAUSED:
+            return
+        self._on_pause_end()
+        self.engine.resume()
+
+    def _stop(self):
+        if self.engine.state == timer_engine.IDLE:
+            return
+        if self.engine.state == timer_engine.PAUSED:
+            self._on_pause_end()
+        self.engine.stop()
+        self.stopped += 1
+        self._record(completed_cycle=False)
+
+    def _on_cycle_complete(self):
+        self.completed += 1
+        expected_end = self._cycle_start + self.cycle_seconds + self._paused_total
+        self.drifts.append(self.scheduler.now - expected_end)
+        self._record(completed_cycle=True)
+
+    def _record(self, completed_cycle):
+        """与 LearningApp.record_learning_session 相同：生成记录并合并进数据"""
+        session = self.engine.make_session(self._wall_start, self._wall(), completed_cycle)
+        studied = self.scheduler.now - self._cycle_start - self._paused_total
+        self.durations.append(session["duration_seconds"])
+        self.duration_errors.append(session["duration_seconds"] - studied)
+        data_store.apply_session(self.data, self._wall().strftime("%Y-%m-%d"), session)
+        for action in self._pending_actions:
+            self.scheduler.cancel(action)
+
+    def run_cycle(self):
+        self._cycle_start = self.scheduler.now
+        self._wall_start = self._wall()
+        self._paused_total = 0.0
+        self._pending_actions = []
+        self.engine.start(self.cycle_seconds)
+        if self.rng.random() < PAUSE_PROBABILITY:
+            self._pending_actions.append(
+                self.scheduler.call_later(self.rng.uniform(0, self.cycle_seconds), self._pause)
+            )
+        if self.rng.random() < STOP_PROBABILITY:
+            self._pending_actions.append(
+                self.scheduler.call_later(self.rng.uniform(0, self.cycle_seconds), self._stop)
+            )
+        self.scheduler.run()
+        # 长休息，之后开始下一个周期
+        self.scheduler.run(self.scheduler.now + LONG_BREAK_SECONDS)
+
+    def run(self, cycles):
+        for _ in range(cycles):
+            self.run_cycle()
+        return self
+
+    def report(self):
+        def summary(values):
+            if not values:
+                return "-"
+            return f"最小 {min(values):.3f} / 平均 {sum(values) / len(values):.3f} / 最大 {max(values):.3f}"
+
+        cycles = self.completed + self.stopped
+        return "\n".join(
+            [
+                f"周期: {cycles}（完成 {self.completed}，中途停止 {self.stopped}）",
+                f"短休息: {self.short_breaks}，暂停: {self.pauses}，刷新: {self.ticks}，定时器: {self.scheduler.fired}",
+                f"每周期显示唤醒: {self.engine.wakeups / max(cycles, 1):.1f}",
+                f"显示误差（实际 - 显示，秒）: {summary(self.display_lags)}",
+                f"记录时长（秒）: {summary(self.durations)}",
+                f"记录时长误差（秒）: {summary(self.duration_errors)}",
+                f"周期结束漂移（秒）: {summary(self.drifts)}",
+                f"总时长: {self.data['total_seconds'] / 3600:.1f} 小时，总周期: {self.data['total_cycles']:.2f}",
+            ]
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在虚拟时钟上模拟完整的学习周期")
+    parser.add_argument("--cycles", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--minutes", type=int, default=90, help="每个周期的分钟数")
+    parser.add_argument(
+        "--tick",
+        type=float,
+        default=None,
+        help="显示单位（秒），默认不刷新显示；设为 1 可测量界面的唤醒次数和显示误差",
+    )
+    parser.add_argument("--jitter", type=float, default=0.0, help="定时器最多迟到多少秒")
+    parser.add_argument(
+        "--sleep", type=float, default=0.0, help="每次唤醒前系统休眠的概率"
+    )
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    simulation = CycleSimulation(
+        seed=args.seed,
+        cycle_seconds=args.minutes * 60,
+        tick_interval=args.tick,
+        jitter=args.jitter,
+        sleep_probability=args.sleep,
+    ).run(args.cycles)
+    elapsed = time.perf_counter() - t0
+    print(simulation.report())
+    print(f"耗时 {elapsed:.2f} 秒，{args.cycles / elapsed:.0f} 周期/秒")
@@ -0,0 +1,178 @@
+import heapq
+import itertools
+import math
+import time
+
+# 截止时间在这么多秒以内的定时器在同一次唤醒中一起执行（after 的精度是毫秒）
+FIRE_TOLERANCE = 0.001
+
+
+class TimerHandle:
+    __slots__ = ("deadline", "seq", "callback", "args", "group", "generation")
+
+    def __init__(self, deadline, seq, callback, args, group, generation):
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.group = group
+        self.generation = generation
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class TimerGroup:
+    """一组定时器的视图，提供 TimerEngine 需要的 call_later / cancel 接口"""
+
+    def __init__(self, wheel, name):
+        self.wheel = wheel
+        self.name = name
+
+    def call_later(self, delay, callback, *args):
+        return self.wheel.call_later(delay, callback, *args, group=self.name)
+
+    def cancel(self, handle):
+        self.wheel.cancel(handle)
+
+    def cancel_all(self):
+        self.wheel.cancel_group(self.name)
+
+
+class TimerWheel:
+    """程序中所有定时回调的唯一持有者。
+
+    定时器按截止时间放在一个堆里，底层只保留一个 Tk after，对应最早的截止时间；
+    同一时刻到期的回调在一次唤醒中执行完。取消只做标记（出堆时跳过），
+    按组取消只是把该组的代数加一，都是 O(1)。
+    after / cancel 一般传 root.after 和对应的取消函数，clock 为单调时钟（秒）。
+    """
+
+    def __init__(self, after, cancel, clock=time.monotonic):
+        self._after = after
+        self._cancel = cancel
+        self.clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._generations = {}  # 组名 -> 当前代数，旧代数的定时器视为已取消
+        self._armed_id = None
+        self._armed_deadline = None
+        self._compact_at = 64
+        self.fired = 0
+        self.wakeups = 0
+
+    # --- 接口 ---
+    def call_later(self, delay, callback, *args, group=None):
+        """delay 秒后在 Tk 主线程执行 callback(*args)，返回可用于 cancel 的句柄"""
+        handle = TimerHandle(
+            self.clock() + max(0.0, delay),
+            next(self._seq),
+            callback,
+            args,
+            group,
+            self._generations.get(group, 0),
+        )
+        heapq.heappush(self._heap, handle)
+        if len(self._heap) > self._compact_at:
+            self._compact()
+        self._arm()
+        return handle
+
+    def after(self, ms, callback, *args):
+        """与 root.after 相同的参数（毫秒），供 WriteBehind / TaskRunner 使用"""
+        return self.call_later(ms / 1000, callback, *args)
+
+    def cancel(self, handle):
+        if handle is not None:
+            handle.callback = None
+            handle.args = ()
+            self._arm()
+
+    def cancel_group(self, group):
+        self._generations[group] = self._generations.get(group, 0) + 1
+        self._arm()  # 全部取消后不再保留底层的 after
+
+    def group(self, name):
+        return TimerGroup(self, name)
+
+    def pending(self):
+        """尚未执行、也没有被取消的定时器个数（用于测量）"""
+        return sum(1 for handle in self._heap if self._alive(handle))
+
+    # --- 内部 ---
+    def _alive(self, handle):
+        return handle.callback is not None and handle.generation == self._generations.get(
+            handle.group, 0
+        )
+
+    def _compact(self):
+        """丢掉已取消的定时器；堆每增长一倍才做一次，均摊 O(1)"""
+        self._heap = [handle for handle in self._heap if self._alive(handle)]
+        heapq.heapify(self._heap)
+        self._compact_at = max(64, 2 * len(self._heap))
+
+    def _arm(self):
+        """让底层唯一的 after 对准最早的截止时间"""
+        heap = self._heap
+        while heap and not self._alive(heap[0]):
+            heapq.heappop(heap)
+        if not heap:
+            if self._armed_id is not None:
+                self._cancel(self._armed_id)
+                self._armed_id = self._armed_deadline = None
+            return
+        deadline = heap[0].deadline
+        if self._armed_id is not None:
+            if self._armed_deadline <= deadline:
+                return  # 已经会在更早（或相同）的时间唤醒
+            self._cancel(self._armed_id)
+        delay_ms = max(0, math.ceil((deadline - self.clock()) * 1000))
+        self._armed_id = self._after(delay_ms, self._fire)
+        self._armed_deadline = deadline
+
+    def _fire(self):
+        self._armed_id = self._armed_deadline = None
+        self.wakeups += 1
+        now = self.clock() + FIRE_TOLERANCE
+        # 本次唤醒中新加入的定时器（例如 delay=0）留到下一次唤醒，避免死循环
+        last_seq = next(self._seq)
+        heap = self._heap
+        while heap and heap[0].deadline <= now and heap[0].seq < last_seq:
+            handle = heapq.heappop(heap)
+            if not self._alive(handle):
+                continue
+            callback, args = handle.callback, handle.args
+            handle.callback = None  # 已执行，之后再 cancel 也没有影响
+            self.fired += 1
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"定时回调 {getattr(callback, '__name__', callback)} 出错: {e}")
+        self._arm()
+
+
+if __name__ == "__main__":
+    # 演示：在虚拟的 after 上运行，统计底层 after 的调用次数
+    pending = {}
+    ids = itertools.count()
+    now = [0.0]
+
+    def fake_after(ms, callback):
+        after_id = next(ids)
+        pending[after_id] = (now[0] + ms / 1000, callback)
+        return after_id
+
+    def fake_cancel(after_id):
+        pending.pop(after_id, None)
+
+    wheel = TimerWheel(fake_after, fake_cancel, clock=lambda: now[0])
+    results = []
+    for i in range(1000):
+        wheel.call_later(i % 10, results.append, i, group="demo" if i % 2 else None)
+    wheel.cancel_group("demo")  # 一次取消 500 个
+    while pending:
+        after_id = min(pending, key=lambda k: pending[k][0])
+        due, callback = pending.pop(after_id)
+        now[0] = due
+        callback()
+    print(f"执行 {len(results)} 个回调，底层 after 唤醒 {wheel.wakeups} 次")